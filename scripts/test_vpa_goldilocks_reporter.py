@@ -0,0 +1,903 @@
+"""Table-driven tests of the VPA Goldilocks reporter, run against stand-ins rather than a cluster.
+
+Run with: python -m pytest scripts/
+"""
+
+import importlib.util
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+# The script's file name is not importable as a module name, so it is loaded from its path
+SPEC = importlib.util.spec_from_file_location(
+    'vpa_goldilocks_reporter', Path(__file__).resolve().parent / 'vpa-goldilocks-reporter.py')
+reporter = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(reporter)
+
+MIB = 2 ** 20
+GIB = 2 ** 30
+
+PARSE_CASES = [
+    # Binary suffixes
+    ('128Ki', 'memory', 128 * 2 ** 10),
+    ('512Mi', 'memory', 512 * MIB),
+    ('1.5Gi', 'memory', 3 * GIB // 2),
+    ('1Mi', 'cpu', MIB * 1000),
+    # Decimal suffixes
+    ('128M', 'memory', 128 * 10 ** 6),
+    ('100k', 'memory', 100 * 10 ** 3),
+    ('1G', 'memory', 10 ** 9),
+    ('250m', 'cpu', 250),
+    ('1500m', 'memory', 2),
+    ('100u', 'cpu', 1),
+    ('1000000u', 'cpu', 1000),
+    ('500000n', 'cpu', 1),
+    ('1500000n', 'cpu', 2),
+    ('1n', 'cpu', 1),
+    ('1n', 'memory', 1),
+    # Exponents
+    ('1e3', 'memory', 1000),
+    ('1E3', 'cpu', 1000 * 1000),
+    ('12e-3', 'cpu', 12),
+    ('1.5e-4', 'cpu', 1),
+    ('1E', 'memory', 10 ** 18),
+    # Bare integers and fractions
+    ('2', 'cpu', 2000),
+    ('2', 'memory', 2),
+    ('0.1', 'cpu', 100),
+    ('0.0001', 'cpu', 1),
+    ('.5', 'cpu', 500),
+    ('1.', 'cpu', 1000),
+    ('0', 'cpu', 0),
+    (' 250m ', 'cpu', 250),
+    # Numbers as found in JSON dumps
+    (2, 'cpu', 2000),
+    (134217728, 'memory', 134217728),
+    (0.5, 'cpu', 500),
+    # Invalid or empty input
+    (None, 'cpu', None),
+    ('', 'cpu', None),
+    ('   ', 'memory', None),
+    (True, 'cpu', None),
+    ('abc', 'cpu', None),
+    ('1Xi', 'memory', None),
+    ('1mi', 'memory', None),
+    ('1e', 'cpu', None),
+    ('Mi', 'memory', None),
+    ('1 Gi', 'memory', None),
+    ('--1', 'cpu', None),
+]
+
+
+@pytest.mark.parametrize('value, resource_type, expected', PARSE_CASES)
+def test_parse_quantity(value, resource_type, expected):
+    assert reporter.parse_quantity(value, resource_type) == expected
+
+
+@pytest.mark.parametrize('value, resource_type, expected', PARSE_CASES)
+def test_parse_quantity_cached_matches(value, resource_type, expected):
+    assert reporter.parse_quantity_cached(value, resource_type) == expected
+
+
+FORMAT_CASES = [
+    # CPU millicores round up to standard request sizes
+    (0, 'cpu', '25m'),
+    (1, 'cpu', '25m'),
+    (49, 'cpu', '25m'),
+    (50, 'cpu', '50m'),
+    (99, 'cpu', '50m'),
+    (100, 'cpu', '100m'),
+    (249, 'cpu', '100m'),
+    (250, 'cpu', '250m'),
+    (500, 'cpu', '500m'),
+    (999, 'cpu', '500m'),
+    (1000, 'cpu', '1'),
+    (2500, 'cpu', '2'),
+    # Memory bytes
+    (100 * MIB, 'memory', '128Mi'),
+    (128 * MIB, 'memory', '256Mi'),
+    (300 * MIB, 'memory', '512Mi'),
+    (600 * MIB, 'memory', '640Mi'),
+    (1000 * MIB, 'memory', '1024Mi'),
+    (GIB, 'memory', '1Gi'),
+    (3 * GIB, 'memory', '2Gi'),
+    (5 * GIB, 'memory', '4Gi'),
+    (10 * GIB, 'memory', '8Gi'),
+    (17 * GIB, 'memory', '18Gi'),
+    # Missing values
+    (None, 'cpu', 'N/A'),
+    (None, 'memory', 'N/A'),
+]
+
+
+@pytest.mark.parametrize('value, resource_type, expected', FORMAT_CASES)
+def test_format_quantity(value, resource_type, expected):
+    assert reporter.format_quantity(value, resource_type) == expected
+
+
+FORMAT_STRING_CASES = [
+    ('250m', 'cpu', '250m'),
+    ('12e-3', 'cpu', '25m'),
+    ('0.1', 'cpu', '100m'),
+    ('500000n', 'cpu', '25m'),
+    ('2', 'cpu', '2'),
+    ('1500m', 'CPU', '1'),
+    ('262144k', 'memory', '256Mi'),
+    ('1e9', 'memory', '1024Mi'),
+    ('1Gi', 'memory', '1Gi'),
+    ('100Mi', 'memory', '128Mi'),
+    ('128M', 'memory', '128Mi'),
+    # Invalid and empty values are returned unchanged
+    ('N/A', 'cpu', 'N/A'),
+    ('', 'cpu', ''),
+    (None, 'memory', None),
+    ('abc', 'cpu', 'abc'),
+    # Other resources are not rounded
+    ('1', 'nvidia.com/gpu', '1'),
+    ('10Gi', 'ephemeral-storage', '10Gi'),
+]
+
+
+@pytest.mark.parametrize('value, resource_type, expected', FORMAT_STRING_CASES)
+def test_format_quantity_string(value, resource_type, expected):
+    assert reporter.format_quantity_string(value, resource_type) == expected
+
+
+class FakeResponse:
+    """Stand-in for the unread urllib3 response returned with _preload_content=False."""
+
+    def __init__(self, body: bytes):
+        self.data = body
+        self.released = False
+
+    def __iter__(self):
+        return iter(self.data.splitlines(keepends=True))
+
+    def close(self):
+        pass
+
+    def drain_conn(self):
+        pass
+
+    def release_conn(self):
+        self.released = True
+
+
+class FakeDeploymentAPI:
+    """Stand-in for a client list function serving one list and the events of every watch on it."""
+
+    def __init__(self, items, resource_version, events=()):
+        self.items = items
+        self.resource_version = resource_version
+        self.events = list(events)
+        self.calls = []
+        self.responses = []
+
+    def list_namespaced_deployment(self, namespace, watch=False, _preload_content=True, **kwargs):
+        self.calls.append(('watch' if watch else 'list', kwargs))
+        if watch:
+            body = b''.join(json.dumps(event).encode() + b'\n' for event in self.events)
+        else:
+            body = json.dumps({'metadata': {'resourceVersion': self.resource_version}, 'items': self.items}).encode()
+        self.responses.append(FakeResponse(body))
+        return self.responses[-1]
+
+
+@pytest.fixture
+def offline_reporter(tmp_path):
+    """A reporter built from an empty snapshot, so it never connects to a cluster."""
+    snapshot = tmp_path / 'empty.json'
+    snapshot.write_text('{"kind": "List", "items": []}')
+    return reporter.VPARecommendationReporter(snapshot_path=str(snapshot))
+
+
+DEPLOYMENT = {'metadata': {'namespace': 'shop', 'name': 'web', 'resourceVersion': '100'}}
+BOOKMARK = {'type': 'BOOKMARK', 'object': {'metadata': {'resourceVersion': '250'}}}
+MODIFIED = {'type': 'MODIFIED', 'object': {**DEPLOYMENT, 'metadata': {**DEPLOYMENT['metadata'], 'resourceVersion': '240'}}}
+GONE = {'type': 'ERROR', 'object': {'code': 410, 'reason': 'Expired', 'message': 'too old resource version: 100'}}
+
+
+@pytest.mark.parametrize('events, reused', [
+    ([], True),
+    ([BOOKMARK], True),
+    ([MODIFIED], False),
+    ([BOOKMARK, MODIFIED], False),
+    ([GONE], False),
+])
+def test_snapshot_cache_validated_by_watch(offline_reporter, tmp_path, events, reused):
+    offline_reporter.cache = reporter.SnapshotCache('test', cache_dir=tmp_path / 'cache')
+    api = FakeDeploymentAPI([DEPLOYMENT], '200', events)
+
+    assert list(offline_reporter._list_cached('deployment-shop', api.list_namespaced_deployment, 'shop')) == [DEPLOYMENT]
+    assert list(offline_reporter._list_cached('deployment-shop', api.list_namespaced_deployment, 'shop')) == [DEPLOYMENT]
+
+    verbs = [verb for verb, _ in api.calls]
+    assert verbs == ['list', 'watch'] + ([] if reused else ['list'])
+    watch_kwargs = api.calls[1][1]
+    assert watch_kwargs['resource_version'] == '200'
+    assert watch_kwargs['allow_watch_bookmarks'] is True
+    assert all(response.released for response in api.responses[1:2])
+    assert offline_reporter.timings.api[('watch', 'deployment')]['count'] == 1
+
+
+class FakeClusterReporter:
+    """Stand-in for the reporter of one cluster, answering after a delay."""
+
+    def __init__(self, cluster, names, delay=0.0, error=None):
+        self.cluster = cluster
+        self.names = names
+        self.delay = delay
+        self.error = error
+
+    def iter_vpa_recommendations(self, namespace=None):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        for name in self.names:
+            yield (self.cluster, name)
+
+
+def test_fan_out_yields_clusters_in_context_order():
+    fan_out = reporter.ClusterFanOut({
+        'slow': FakeClusterReporter('slow', ['a', 'b'], delay=0.2),
+        'broken': FakeClusterReporter('broken', ['x'], error=RuntimeError('unreachable')),
+        'fast': FakeClusterReporter('fast', ['c']),
+    })
+
+    assert list(fan_out.iter_vpa_recommendations()) == [('slow', 'a'), ('slow', 'b'), ('fast', 'c')]
+    assert fan_out.failed == ['broken']
+
+
+def test_fan_out_leaves_out_contexts_that_cannot_connect():
+    def factory(context):
+        if context == 'stale':
+            raise reporter.config.ConfigException(f"Invalid kube-config file. No configuration found for {context}")
+        return FakeClusterReporter(context, [])
+
+    fan_out = reporter.ClusterFanOut.connect(['prod', 'stale', 'staging'], factory)
+
+    assert list(fan_out.reporters) == ['prod', 'staging']
+    assert fan_out.failed == ['stale']
+    with pytest.raises(RuntimeError):
+        reporter.ClusterFanOut.connect(['stale'], factory)
+
+
+REQUESTS_PATH = ('pods', 'web', 'resources', 'requests')
+
+VALUES_CASES = [
+    # Existing values keep their quoting and comments
+    (
+        'pods:\n  web:\n    resources:\n      requests:\n        cpu: 100m  # tuned\n        memory: "128Mi"\n',
+        'pods:\n  web:\n    resources:\n      requests:\n        cpu: 250m  # tuned\n        memory: "256Mi"\n',
+    ),
+    (
+        "pods:\n  web:\n    resources:\n      requests:\n        cpu: '100m'\n        memory: 128Mi\n",
+        "pods:\n  web:\n    resources:\n      requests:\n        cpu: '250m'\n        memory: 256Mi\n",
+    ),
+    # Missing mappings are inserted with the file's indentation step
+    (
+        'pods:\n  web:\n    image: nginx\n',
+        'pods:\n  web:\n    image: nginx\n    resources:\n      requests:\n        cpu: "250m"\n        memory: "256Mi"\n',
+    ),
+    (
+        'pods:\n    web:\n        image: nginx\n',
+        'pods:\n    web:\n        image: nginx\n        resources:\n            requests:\n                cpu: "250m"\n'
+        '                memory: "256Mi"\n',
+    ),
+    (
+        '# Chart values\npods:\n    web:\n        resources:\n            limits:\n                cpu: 1\n',
+        '# Chart values\npods:\n    web:\n        resources:\n            limits:\n                cpu: 1\n'
+        '            requests:\n                cpu: "250m"\n                memory: "256Mi"\n',
+    ),
+    (
+        'pods:\n    web:\n        resources:\n',
+        'pods:\n    web:\n        resources:\n            requests:\n                cpu: "250m"\n'
+        '                memory: "256Mi"\n',
+    ),
+    # Empty and null mappings
+    (
+        'pods:\n  web:\n    resources: {}\n',
+        'pods:\n  web:\n    resources:\n      requests:\n        cpu: "250m"\n        memory: "256Mi"\n',
+    ),
+    (
+        'pods:\n    web:\n        resources: {}  # set by VPA\n',
+        'pods:\n    web:\n        resources:  # set by VPA\n            requests:\n                cpu: "250m"\n'
+        '                memory: "256Mi"\n',
+    ),
+    (
+        'pods:\n  web:\n    resources:\n      requests: ~\n',
+        'pods:\n  web:\n    resources:\n      requests:\n        cpu: "250m"\n        memory: "256Mi"\n',
+    ),
+    # Flow mappings are expanded
+    (
+        'pods:\n    web:\n        resources:\n            requests: {cpu: 100m, memory: "128Mi"}\n',
+        'pods:\n    web:\n        resources:\n            requests:\n                cpu: 250m\n'
+        '                memory: "256Mi"\n',
+    ),
+    (
+        'pods:\n  web:\n    resources:\n      requests: {cpu: 100m}\n',
+        'pods:\n  web:\n    resources:\n      requests:\n        cpu: 250m\n        memory: "256Mi"\n',
+    ),
+    # Null scalars are replaced
+    (
+        'pods:\n  web:\n    resources:\n      requests:\n        cpu: null\n        memory: ~  # unset\n',
+        'pods:\n  web:\n    resources:\n      requests:\n        cpu: "250m"\n        memory: "256Mi"  # unset\n',
+    ),
+]
+
+
+@pytest.mark.parametrize('original, expected', VALUES_CASES)
+def test_values_file_set(tmp_path, original, expected):
+    path = tmp_path / 'values.yaml'
+    path.write_text(original)
+    values_file = reporter.ValuesFile(path)
+
+    values_file.set(REQUESTS_PATH + ('cpu',), '250m')
+    values_file.set(REQUESTS_PATH + ('memory',), '256Mi')
+
+    assert values_file.text == expected
+    assert yaml.safe_load(values_file.text)['pods']['web']['resources']['requests'] == {'cpu': '250m', 'memory': '256Mi'}
+
+
+@pytest.mark.parametrize('original, expected', [
+    ('pods:\n  web:\n    resources:\n      requests:\n        cpu: 100m\n', '100m'),
+    ('pods:\n  web:\n    resources:\n      requests:\n        cpu: "1"  # one core\n', '1'),
+    ('pods:\n  web:\n    resources:\n      requests:\n        cpu: null\n', None),
+    ('pods:\n  web:\n    resources:\n      requests:\n        cpu: ~\n', None),
+    ('pods:\n  web:\n    resources:\n      requests:\n        cpu:\n', None),
+    ('pods:\n  web:\n    resources: {}\n', None),
+])
+def test_values_file_get(tmp_path, original, expected):
+    path = tmp_path / 'values.yaml'
+    path.write_text(original)
+    assert reporter.ValuesFile(path).get(REQUESTS_PATH + ('cpu',)) == expected
+
+
+@pytest.mark.parametrize('original', [
+    'pods:\n  web:\n    resources:\n      requests: {cpu: {value: 100m}}\n',
+    'pods:\n  web:\n    resources:\n      requests: [cpu]\n',
+    'pods:\n  web:\n    resources:\n      requests: 100m\n',
+])
+def test_values_file_rejects_unsupported_mappings(tmp_path, original):
+    path = tmp_path / 'values.yaml'
+    path.write_text(original)
+    values_file = reporter.ValuesFile(path)
+
+    with pytest.raises(ValueError, match='requests'):
+        values_file.set(REQUESTS_PATH + ('cpu',), '250m')
+
+
+TEMPLATE_CASES = [
+    ('kind: Deployment\nmetadata:\n  name: {{ .Release.Name }}-web\n', ('shop', 'Deployment', 'shop-web')),
+    ('kind: StatefulSet\nmetadata:\n    name: "db"\n    namespace: data\n', ('data', 'StatefulSet', 'db')),
+    ('kind: DaemonSet\nmetadata:\n  # node agent\n  labels:\n    name: other\n  name: agent\n',
+     ('shop', 'DaemonSet', 'agent')),
+    ('kind: Deployment\nmetadata:\n    labels:\n        name: other\n    name: api\nspec:\n  name: spec\n',
+     ('shop', 'Deployment', 'api')),
+    ('kind: Deployment\nmetadata:\n  name: {{ include "fullname" . }}\n', None),
+    ('kind: Service\nmetadata:\n  name: web\n', None),
+]
+
+
+@pytest.mark.parametrize('document, expected', TEMPLATE_CASES)
+def test_template_workload(document, expected):
+    rewriter = reporter.ValuesRewriter.__new__(reporter.ValuesRewriter)
+    assert rewriter._template_workload(document, 'shop') == expected
+
+
+def owner_reference(kind, name):
+    return [{'apiVersion': 'apps/v1', 'kind': kind, 'name': name, 'controller': True}]
+
+
+def workload(kind, name, containers):
+    return {
+        'kind': kind,
+        'metadata': {'namespace': 'shop', 'name': name},
+        'spec': {'replicas': 1, 'template': {'spec': {'containers': [
+            {'name': container, 'resources': {'requests': {'cpu': '100m', 'memory': '64Mi'}}}
+            for container in containers
+        ]}}}
+    }
+
+
+def pod(name, owner_kind, owner_name, containers):
+    return {
+        'metadata': {'namespace': 'shop', 'name': name, 'creationTimestamp': '2026-01-01T00:00:00Z',
+                     'ownerReferences': owner_reference(owner_kind, owner_name)},
+        'spec': {'containers': [{'name': container, 'resources': {}} for container in containers]},
+        'status': {'phase': 'Running'}
+    }
+
+
+# Deployment db and StatefulSet db-primary: the pods of db-primary also fit the naming of db's pods
+STAND_IN_LISTS = {
+    '/apis/apps/v1/deployments': [workload('Deployment', 'db', ['app'])],
+    '/apis/apps/v1/statefulsets': [workload('StatefulSet', 'db-primary', ['postgres', 'exporter'])],
+    '/apis/apps/v1/replicasets': [{'metadata': {'namespace': 'shop', 'name': 'db-7d9f8b6c5d',
+                                                'ownerReferences': owner_reference('Deployment', 'db')}}],
+    '/api/v1/pods': [
+        pod('db-7d9f8b6c5d-x2x4z', 'ReplicaSet', 'db-7d9f8b6c5d', ['app']),
+        pod('db-primary-0', 'StatefulSet', 'db-primary', ['postgres', 'exporter']),
+    ],
+}
+
+STAND_IN_USAGE = {
+    'db-7d9f8b6c5d-x2x4z': {'app': ('200m', '300Mi')},
+    'db-primary-0': {'postgres': ('400m', '1Gi')},
+}
+
+
+class StandInAPIHandler(reporter.BaseHTTPRequestHandler):
+    """Serves the lists above and a fresh PodMetrics sample on every metrics API request."""
+
+    metrics_requests = 0
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        items = STAND_IN_LISTS.get(path, [])
+        if path == '/apis/metrics.k8s.io/v1beta1/pods':
+            type(self).metrics_requests += 1
+            items = [{
+                'metadata': {'namespace': 'shop', 'name': pod_name},
+                'timestamp': f"2026-01-01T00:00:{type(self).metrics_requests:02d}Z",
+                'containers': [{'name': container, 'usage': {'cpu': cpu, 'memory': memory}}
+                               for container, (cpu, memory) in containers.items()]
+            } for pod_name, containers in STAND_IN_USAGE.items()]
+        body = json.dumps({'kind': 'List', 'metadata': {'resourceVersion': '1'}, 'items': items}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_kubeconfig(tmp_path):
+    """A kubeconfig pointing at a local stand-in for the API and metrics servers."""
+    server = reporter.ThreadingHTTPServer(('127.0.0.1', 0), StandInAPIHandler)
+    StandInAPIHandler.metrics_requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    kubeconfig = tmp_path / 'kubeconfig'
+    kubeconfig.write_text(yaml.safe_dump({
+        'apiVersion': 'v1',
+        'kind': 'Config',
+        'clusters': [{'name': 'stand-in', 'cluster': {'server': f"http://127.0.0.1:{server.server_port}"}}],
+        'users': [{'name': 'stand-in', 'user': {'token': 'test'}}],
+        'contexts': [{'name': 'stand-in', 'context': {'cluster': 'stand-in', 'user': 'stand-in'}}],
+        'current-context': 'stand-in',
+    }))
+    yield str(kubeconfig)
+    server.shutdown()
+    server.server_close()
+
+
+def test_usage_sampled_from_stand_in_metrics_server(stand_in_kubeconfig):
+    usage_reporter = reporter.VPARecommendationReporter(stand_in_kubeconfig, cache_ttl=None)
+    usage_reporter.usage = reporter.UsageRecommender(usage_reporter, samples=3, interval=0)
+
+    records = {(vpa.kind, vpa.workload): vpa for vpa in usage_reporter.iter_vpa_recommendations()}
+
+    assert StandInAPIHandler.metrics_requests == 3
+    assert set(records) == {('Deployment', 'db'), ('StatefulSet', 'db-primary')}
+    recommended = {key: [row.name for row in vpa.containers if row.recommended] for key, vpa in records.items()}
+    assert recommended == {('Deployment', 'db'): ['app'], ('StatefulSet', 'db-primary'): ['postgres']}
+
+
+@pytest.mark.parametrize('pod_name, expected', [
+    ('web-7d9f8b6c5d-x2x4z', ('Deployment', 'web')),
+    ('web-0', ('StatefulSet', 'web')),
+    ('agent-x2x4z', ('DaemonSet', 'agent')),
+    # Both the StatefulSet web-primary and, by a looser reading, the Deployment web fit
+    ('web-primary-0', ('StatefulSet', 'web-primary')),
+    ('web-7d9f8b6c5d-aaaaa', None),
+    ('unknown-0', None),
+])
+def test_usage_matches_vanished_pods_by_name(offline_reporter, pod_name, expected):
+    for kind, name in (('Deployment', 'web'), ('StatefulSet', 'web'), ('StatefulSet', 'web-primary'),
+                       ('DaemonSet', 'agent')):
+        offline_reporter.workload_index[('shop', kind, name)] = {'replicas': 1, 'containers': {}}
+    usage = reporter.UsageRecommender(offline_reporter)
+
+    assert usage._owner('shop', pod_name) == expected
+
+
+class FakeAppsAPI:
+    """Stand-in for AppsV1Api recording the patches it receives."""
+
+    def __init__(self):
+        self.patches = []
+        self.responses = []
+
+    def patch_namespaced_deployment(self, name, namespace, body, _preload_content=True, **kwargs):
+        self.patches.append((namespace, name, body, kwargs))
+        self.responses.append(FakeResponse(json.dumps({'metadata': {'name': name}}).encode()))
+        return self.responses[-1]
+
+
+def test_applier_releases_patch_connections(offline_reporter):
+    offline_reporter.apps_v1 = FakeAppsAPI()
+    applier = reporter.RecommendationApplier(offline_reporter)
+    applier.patches = {('shop', 'Deployment', f"web-{index}"): {'app': {'cpu': '250m'}} for index in range(3)}
+
+    applier.apply()
+
+    assert [entry['result'] for entry in applier.results] == ['patched'] * 3
+    assert len(offline_reporter.apps_v1.patches) == 3
+    assert all(response.released for response in offline_reporter.apps_v1.responses)
+
+
+def test_report_entry_keeps_parsed_values_apart():
+    record = reporter.VPARecord.from_containers(
+        {'app': {'lowerBound': {'cpu': '50m'}, 'target': {'cpu': '120m', 'memory': '300Mi'},
+                 'upperBound': {'cpu': '1'}, 'uncappedTarget': {'cpu': '120m'}}},
+        {'app': {'requests': {'cpu': '500m', 'memory': '1Gi'}, 'limits': {}},
+         'sidecar': {'requests': {'cpu': '10m'}, 'limits': {'memory': '64Mi'}}},
+        name='web', namespace='shop', kind='Deployment', workload='web', api_version='apps/v1',
+        update_mode='Off', replicas=2)
+
+    entry = json.loads(json.dumps(record.to_dict()))
+
+    assert set(entry['recommendations']['app']) == set(reporter.RECOMMENDATION_BOUNDS)
+    assert set(entry['currentResources']['sidecar']) == set(reporter.RESOURCE_GROUPS)
+    assert entry['numeric']['app']['target'] == {'cpu': 120, 'memory': 300 * MIB}
+    assert entry['numeric']['sidecar'] == {'requests': {'cpu': 10}, 'limits': {'memory': 64 * MIB}}
+    assert reporter.VPARecord.from_dict(entry).to_dict() == entry
+
+
+def vpa_record(name, containers, replicas=1, namespace='shop', cluster=None, kind='Deployment'):
+    """A processed VPA whose containers map to (request, target) quantities of CPU and memory."""
+    recommendations = {}
+    current = {}
+    for container, (requests, target) in containers.items():
+        recommendations[container] = {'target': target}
+        current[container] = {'requests': requests, 'limits': {}}
+    return reporter.VPARecord.from_containers(
+        recommendations, current, name=name, namespace=namespace, kind=kind, workload=name,
+        api_version='apps/v1', update_mode='Off', replicas=replicas, cluster=cluster)
+
+
+def savings_of(vpas, top_n=2):
+    savings = reporter.SavingsAnalysis(top_n)
+    for vpa in vpas:
+        savings.add(vpa)
+    return savings
+
+
+def test_savings_totals_are_replica_weighted():
+    summary = savings_of([
+        vpa_record('web', {'app': ({'cpu': '500m', 'memory': '1Gi'}, {'cpu': '200m', 'memory': '512Mi'})}, replicas=3),
+        vpa_record('db', {'app': ({'cpu': '100m', 'memory': '256Mi'}, {'cpu': '300m', 'memory': '256Mi'})}, replicas=2,
+                   namespace='data'),
+        vpa_record('batch', {'app': ({'memory': '128Mi'}, {'cpu': '100m', 'memory': '64Mi'})}),
+    ]).summary()
+
+    assert summary['containers'] == 3
+    assert summary['containersWithoutRequests'] == 1
+    assert summary['cpuMillicores'] == {'requested': 1700, 'recommended': 1200, 'overProvisioned': 900,
+                                        'underProvisioned': 400, 'net': 500}
+    assert summary['memoryBytes'] == {'requested': 3712 * MIB, 'recommended': 2112 * MIB,
+                                      'overProvisioned': 1600 * MIB, 'underProvisioned': 0, 'net': 1600 * MIB}
+    assert [entry['namespace'] for entry in summary['namespaces']] == ['shop', 'data']
+    assert summary['namespaces'][1]['cpuMillicores']['net'] == -400
+
+
+def test_savings_top_ranks_positive_deltas_only():
+    savings = savings_of([
+        vpa_record('small', {'app': ({'cpu': '300m', 'memory': '1Gi'}, {'cpu': '200m', 'memory': '1Gi'})}),
+        vpa_record('large', {'app': ({'cpu': '2', 'memory': '1Gi'}, {'cpu': '500m', 'memory': '1Gi'})}),
+        vpa_record('wide', {'app': ({'cpu': '300m', 'memory': '1Gi'}, {'cpu': '100m', 'memory': '1Gi'})}, replicas=5),
+        vpa_record('short', {'app': ({'cpu': '100m', 'memory': '1Gi'}, {'cpu': '1', 'memory': '1Gi'})}),
+    ])
+
+    top = savings.summary()['top']
+    assert [(entry['vpa'], entry['reclaimable']) for entry in top['cpuMillicores']] == [('large', 1500), ('wide', 1000)]
+    assert top['memoryBytes'] == []
+    # Requests and targets are rounded like the other tables, the reclaimable amount is exact
+    assert savings.top_rows('cpu') == [('shop/Deployment/large', 'app', '1', '2', '500m', '1.5'),
+                                       ('shop/Deployment/wide', 'app', '5', '250m', '100m', '1')]
+
+
+def diff_of(old, new, threshold=10.0):
+    diff = reporter.RecommendationDiff(threshold)
+    diff.index(old)
+    return diff, diff.compare(new)
+
+
+def test_diff_classifies_added_removed_and_changed():
+    old = [
+        vpa_record('web', {'app': ({}, {'cpu': '250m', 'memory': '512Mi'}),
+                           'proxy': ({}, {'cpu': '100m', 'memory': '128Mi'})}),
+        vpa_record('db', {'app': ({}, {'cpu': '1', 'memory': '4Gi'})}, namespace='data'),
+        vpa_record('cache', {'app': ({}, {'cpu': '500m', 'memory': '1Gi'})}),
+    ]
+    new = [
+        vpa_record('web', {'app': ({}, {'cpu': '500m', 'memory': '512Mi'}),
+                           'proxy': ({}, {'cpu': '100m', 'memory': '128Mi'}),
+                           'sidecar': ({}, {'cpu': '50m', 'memory': '64Mi'})}),
+        vpa_record('db', {'app': ({}, {'cpu': '1', 'memory': '4Gi'})}, namespace='data'),
+        # Rounds to the same 500m as before
+        vpa_record('cache', {'app': ({}, {'cpu': '520m', 'memory': '1Gi'})}),
+        vpa_record('queue', {'app': ({}, {'cpu': '100m', 'memory': '256Mi'})}),
+    ]
+
+    diff, changes = diff_of(old, new)
+
+    assert [(change['namespace'], change['workload'], change['container'], change['change']) for change in changes] == [
+        ('shop', 'Deployment/queue', 'app', 'added'),
+        ('shop', 'Deployment/web', 'app', 'changed'),
+        ('shop', 'Deployment/web', 'sidecar', 'added'),
+    ]
+    assert changes[1]['cpu'] == {'old': '250m', 'new': '500m', 'changePercent': 100.0}
+    assert changes[1]['memory'] == {'old': '512Mi', 'new': '512Mi', 'changePercent': 0.0}
+    assert diff.compared == 6
+
+    _, changes = diff_of(new, old)
+    assert [(change['workload'], change['container'], change['change']) for change in changes] == [
+        ('Deployment/queue', 'app', 'removed'),
+        ('Deployment/web', 'app', 'changed'),
+        ('Deployment/web', 'sidecar', 'removed'),
+    ]
+
+
+@pytest.mark.parametrize('before, after, threshold, changed', [
+    ('1', '2', 10.0, True),
+    ('1', '2', 100.0, False),
+    ('2', '1', 10.0, True),
+    ('1Gi', '1Gi', 0.0, False),
+    ('512Mi', '640Mi', 25.0, False),
+    ('512Mi', '640Mi', 20.0, True),
+])
+def test_diff_threshold(before, after, threshold, changed):
+    _, changes = diff_of([vpa_record('web', {'app': ({}, {'cpu': before})})],
+                         [vpa_record('web', {'app': ({}, {'cpu': after})})], threshold)
+    assert bool(changes) == changed
+
+
+def test_diff_keeps_clusters_apart():
+    target = {'app': ({}, {'cpu': '250m'})}
+    _, changes = diff_of([vpa_record('web', target, cluster='prod')], [vpa_record('web', target, cluster='staging')])
+    assert [(change['cluster'], change['change']) for change in changes] == [('prod', 'removed'), ('staging', 'added')]
+
+
+def owned(kind, name, owner_kind=None, owner_name=None, **fields):
+    metadata = {'namespace': 'shop', 'name': name}
+    if owner_kind:
+        metadata['ownerReferences'] = [{'apiVersion': 'batch/v1' if owner_kind in ('Job', 'CronJob') else 'apps/v1',
+                                        'kind': owner_kind, 'name': owner_name, 'controller': True}]
+    return {'kind': kind, 'metadata': metadata, **fields}
+
+
+def resolved_pod(name, owner_kind, owner_name, cpu, phase='Running', created='2026-01-01T00:00:00Z', init=None):
+    spec = {'containers': [{'name': 'app', 'resources': {'requests': {'cpu': cpu}}}]}
+    if init:
+        spec['initContainers'] = [{'name': 'migrate', 'resources': {'requests': {'cpu': init}}}]
+    item = owned('Pod', name, owner_kind, owner_name, spec=spec, status={'phase': phase})
+    item['metadata']['creationTimestamp'] = created
+    return item
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    """A PodResolver indexed from a dump of pods, their owners and a LimitRange."""
+    items = [
+        owned('Deployment', 'web', spec={'replicas': 3, 'template': {'spec': {'containers': [
+            {'name': 'app', 'resources': {'requests': {'cpu': '100m'}}}]}}}),
+        owned('Deployment', 'idle', spec={'replicas': 0, 'template': {'spec': {'containers': [
+            {'name': 'app', 'resources': {'limits': {'cpu': '1'}}}]}}}),
+        owned('ReplicaSet', 'web-old', 'Deployment', 'web'),
+        owned('ReplicaSet', 'web-new', 'Deployment', 'web'),
+        owned('Job', 'report-28000', 'CronJob', 'report'),
+        owned('LimitRange', 'defaults', spec={'limits': [
+            {'type': 'Container', 'defaultRequest': {'memory': '128Mi'}, 'default': {'memory': '256Mi'}}]}),
+        resolved_pod('web-old-aaaaa', 'ReplicaSet', 'web-old', '100m', created='2026-01-01T00:00:00Z'),
+        resolved_pod('web-new-bbbbb', 'ReplicaSet', 'web-new', '200m', created='2026-01-02T00:00:00Z'),
+        resolved_pod('web-new-ccccc', 'ReplicaSet', 'web-new', '200m', phase='Pending', created='2026-01-02T00:00:00Z'),
+        resolved_pod('report-28000-ddddd', 'Job', 'report-28000', '500m', phase='Succeeded', init='50m'),
+        resolved_pod('debug', None, None, '10m'),
+    ]
+    snapshot = tmp_path / 'cluster.json'
+    snapshot.write_text(json.dumps({'kind': 'List', 'items': items}))
+    pod_reporter = reporter.VPARecommendationReporter(snapshot_path=str(snapshot), resolve_pods=True)
+    pod_reporter.pod_resolver.index()
+    return pod_reporter.pod_resolver
+
+
+@pytest.mark.parametrize('pod_name, expected', [
+    ('web-old-aaaaa', ('Deployment', 'web')),
+    ('web-new-bbbbb', ('Deployment', 'web')),
+    ('report-28000-ddddd', ('CronJob', 'report')),
+    ('debug', None),
+    ('gone-0', None),
+])
+def test_pod_resolver_follows_owner_chain(resolver, pod_name, expected):
+    assert resolver.pod_owner('shop', pod_name) == expected
+
+
+def test_pod_resolver_resolves_newest_active_pod(resolver):
+    # Desired replicas come from the template, resources from the newest running pod
+    assert resolver.resolve('shop', 'Deployment', 'web') == {
+        'replicas': 3,
+        'containers': {'app': {'requests': {'cpu': '200m'}, 'limits': {}}}
+    }
+    assert resolver.api_versions['CronJob'] == 'batch/v1'
+
+
+def test_pod_resolver_counts_finished_pods_of_other_owners(resolver):
+    # Only finished pods: no active replicas, resources of the newest pod, init containers included
+    assert resolver.resolve('shop', 'CronJob', 'report') == {
+        'replicas': 0,
+        'containers': {'app': {'requests': {'cpu': '500m'}, 'limits': {}},
+                       'migrate': {'requests': {'cpu': '50m'}, 'limits': {}}}
+    }
+
+
+def test_pod_resolver_applies_defaults_to_templates_without_pods(resolver):
+    # A request defaults to the container's limit before the LimitRange default
+    assert resolver.resolve('shop', 'Deployment', 'idle') == {
+        'replicas': 0,
+        'containers': {'app': {'requests': {'cpu': '1', 'memory': '128Mi'}, 'limits': {'cpu': '1', 'memory': '256Mi'}}}
+    }
+    assert resolver.resolve('shop', 'StatefulSet', 'missing') is None
+
+
+NAMESPACE_FILTER_CASES = [
+    # No patterns cover everything
+    ((), (), None, 'anything', True),
+    # Exact names, prefixes, globs and regular expressions
+    (('shop',), (), None, 'shop', True),
+    (('shop',), (), None, 'shop-dev', False),
+    (('team-',), (), None, 'team-a', True),
+    (('team-',), (), None, 'teams', False),
+    (('app-*',), (), None, 'app-web', True),
+    (('app-?',), (), None, 'app-web', False),
+    (('re:^prod-[0-9]+$',), (), None, 'prod-12', True),
+    (('re:prod',), (), None, 'preprod-x', True),
+    (('re:^prod',), (), None, 'preprod-x', False),
+    # Excludes win over includes
+    ((), ('kube-system',), None, 'kube-system', False),
+    ((), ('openshift-',), None, 'openshift-monitoring', False),
+    ((), ('openshift-',), None, 'openshift', True),
+    (('team-*',), ('team-legacy',), None, 'team-legacy', False),
+    (('team-*',), ('re:-tmp$',), None, 'team-a-tmp', False),
+    (('team-*',), ('team-legacy',), None, 'team-a', True),
+    # A label selector narrows whatever the patterns cover to the selected namespaces
+    ((), (), {'team-a', 'shop'}, 'shop', True),
+    ((), (), {'team-a', 'shop'}, 'data', False),
+    (('team-*',), (), {'team-a', 'shop'}, 'shop', False),
+    ((), ('shop',), {'team-a', 'shop'}, 'shop', False),
+]
+
+
+@pytest.mark.parametrize('include, exclude, selected, namespace, expected', NAMESPACE_FILTER_CASES)
+def test_namespace_filter(include, exclude, selected, namespace, expected):
+    namespace_filter = reporter.NamespaceFilter(include, exclude, 'team=payments' if selected else None)
+    namespace_filter.selected = selected
+    assert namespace_filter.matches(namespace) is expected
+
+
+def test_namespace_filter_excludes_exact_names_server_side():
+    namespace_filter = reporter.NamespaceFilter(exclude=['kube-system', 'openshift-', 'app-*', 're:tmp', 'default'])
+    assert namespace_filter.field_selector() == 'metadata.namespace!=default,metadata.namespace!=kube-system'
+    assert reporter.NamespaceFilter(exclude=['openshift-']).field_selector() is None
+
+
+def test_requested_namespace_bypasses_the_filter(offline_reporter):
+    offline_reporter.namespace_filter = reporter.NamespaceFilter(exclude=['kube-system'])
+    assert offline_reporter._covers_namespace('kube-system', 'kube-system')
+    assert not offline_reporter._covers_namespace('kube-system')
+    assert not offline_reporter._covers_namespace('shop', 'kube-system')
+
+
+def record_run(store, targets, recorded_at):
+    """Record one run with the given (vpa, cpu target, memory target) of the app container."""
+    vpas = [vpa_record(name, {'app': ({'cpu': '1'}, {'cpu': cpu, 'memory': memory})})
+            for name, cpu, memory in targets]
+    list(store.recording(vpas, recorded_at))
+
+
+class DescendingHistoryStore(reporter.HistoryStore):
+    """A store whose trend query hands each series' values to group_concat largest first.
+
+    group_concat does not guarantee any order, so trends must not depend on the index scan.
+    """
+
+    TREND_QUERY = reporter.HistoryStore.TREND_QUERY.replace(
+        'samples INDEXED BY samples_{column}', '(SELECT * FROM samples ORDER BY series_id, {column} DESC)')
+
+
+@pytest.fixture(params=[reporter.HistoryStore, DescendingHistoryStore])
+def history(request, tmp_path):
+    store = request.param(tmp_path / 'history.db')
+    yield store
+    store.close()
+
+
+def test_history_trend_percentiles_do_not_depend_on_recording_order(history):
+    now = time.time()
+    # Twenty runs of 100m..2000m recorded out of order, the last of them with 1500m
+    cpu_targets = [700, 1200, 300, 2000, 100, 1600, 900, 1100, 400, 1900,
+                   200, 1300, 800, 1800, 500, 1000, 600, 1400, 1700, 1500]
+    for day, cpu in enumerate(cpu_targets):
+        record_run(history, [('web', f"{cpu}m", '256Mi')], now - (len(cpu_targets) - day) * 3600)
+
+    [trend] = history.trends(window_days=7)
+
+    assert trend['samples'] == 20
+    cpu = trend['cpu']
+    assert (cpu['p50'], cpu['p90'], cpu['p95'], cpu['max']) == (1000, 1800, 1900, 2000)
+    assert cpu['mean'] == pytest.approx(1050)
+    assert (cpu['first'], cpu['last']) == (700, 1500)
+    assert cpu['drift'] == pytest.approx(8 / 7)
+    assert trend['memory']['p50'] == trend['memory']['p95'] == 256 * MIB
+    assert trend['memory']['variation'] == 0
+    assert not trend['stable']
+
+
+@pytest.mark.parametrize('samples, expected', [
+    ([500], (500, 500, 500)),
+    ([400, 200], (200, 400, 400)),
+    ([300, 100, 200], (200, 300, 300)),
+    ([50] * 9 + [5000], (50, 50, 5000)),
+])
+def test_history_nearest_rank_percentiles(history, samples, expected):
+    now = time.time()
+    for index, cpu in enumerate(samples):
+        record_run(history, [('web', f"{cpu}m", '1Gi')], now - 3600 + index)
+
+    [trend] = history.trends(window_days=1)
+    assert (trend['cpu']['p50'], trend['cpu']['p90'], trend['cpu']['p95']) == expected
+
+
+def test_history_trends_window_namespace_and_stability(history):
+    now = time.time()
+    record_run(history, [('web', '4', '4Gi')], now - 30 * 86400)
+    for day in range(5):
+        record_run(history, [('web', '1', '1Gi'), ('api', f"{100 * (day + 1)}m", '1Gi')], now - (5 - day) * 86400)
+
+    trends = {entry['vpa']: entry for entry in history.trends(window_days=7)}
+
+    # The run a month ago is outside the window
+    assert trends['web']['samples'] == 5
+    assert trends['web']['cpu']['max'] == 1000
+    assert trends['web']['stable']
+    assert not trends['api']['stable']
+    assert [entry['vpa'] for entry in history.trends(window_days=7, namespace='data')] == []
+
+
+class FakeVPAWatchAPI:
+    """Stand-in for the custom objects API serving one watch stream, then stopping the watcher."""
+
+    def __init__(self, events):
+        self.events = events
+        self.watcher = None
+        self.calls = []
+
+    def list_cluster_custom_object(self, group, version, plural, watch=False, _preload_content=True, **kwargs):
+        self.calls.append(kwargs)
+        self.watcher.stop()
+        return FakeResponse(b''.join(json.dumps(event).encode() + b'\n' for event in self.events))
+
+
+def test_watcher_requests_are_timed(offline_reporter):
+    vpa = {'metadata': {'namespace': 'shop', 'name': 'web', 'resourceVersion': '12'},
+           'spec': {'targetRef': {'kind': 'Deployment', 'name': 'web'}}}
+    api = FakeVPAWatchAPI([{'type': 'ADDED', 'object': vpa},
+                           {'type': 'BOOKMARK', 'object': {'metadata': {'resourceVersion': '15'}}}])
+    watcher = reporter.VPAWatcher(offline_reporter)
+    api.watcher = watcher
+
+    watcher._watch('VerticalPodAutoscaler', api.list_cluster_custom_object,
+                   (offline_reporter.VPA_GROUP, offline_reporter.VPA_VERSION, offline_reporter.VPA_PLURAL), '10')
+
+    assert api.calls[0]['resource_version'] == '10'
+    assert api.calls[0]['allow_watch_bookmarks'] is True
+    assert set(watcher.vpa_items) == {('shop', 'web')}
+    assert offline_reporter.api_calls == 1
+    assert offline_reporter.timings.api[('watch', 'verticalpodautoscalers')]['count'] == 1
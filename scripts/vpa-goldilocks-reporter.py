@@ -12,15 +12,63 @@ Usage:
 """
 
 import argparse
+import bisect
+import difflib
+import fnmatch
+import functools
+import hashlib
+import heapq
+import itertools
 import json
 import logging
+import math
+import os
+import queue
+import re
+import shlex
+import shutil
+import sqlite3
 import sys
+import tempfile
+import textwrap
+import threading
+import time
 import warnings
+from array import array
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_CEILING
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from operator import gt, mul, sub
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Any, Set, Tuple
 import yaml
 
+# The libyaml based dumper is an order of magnitude faster, fall back when PyYAML lacks it
+try:
+    from yaml import CSafeDumper as YAMLDumper
+except ImportError:
+    from yaml import SafeDumper as YAMLDumper
+
+# orjson parses API responses several times faster than the json module when installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# The html format renders a Jinja2 template, the other formats do not need it
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+# Peak resident set size is only available on Unix
+try:
+    from resource import RUSAGE_SELF, getrusage
+except ImportError:
+    getrusage = None
+
 # Suppress SSL warnings for self-signed certificates
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -45,483 +93,4383 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class VPARecommendationReporter:
-    """Main class for generating VPA resource recommendation reports."""
+# Configuration file read when --config is not given, if it exists
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent / 'vpa-reporter-config.yaml'
 
-    def __init__(self, kubeconfig_path: Optional[str] = None, insecure: bool = False):
-        """Initialize the reporter with Kubernetes configuration."""
-        self.console = Console()
-        self.k8s_client = None
-        self.custom_objects_api = None
+# Helm charts deployed by the cluster app-of-apps, one directory per application and group
+DEFAULT_CHARTS_DIR = Path(__file__).resolve().parent.parent / 'charts'
+
+# Supported report formats
+REPORT_FORMATS = ['console', 'json', 'ndjson', 'yaml', 'markdown', 'html', 'kubectl']
+
+# File names used for each format when writing into --output-dir
+DEFAULT_OUTPUT_FILES = {
+    'json': 'vpa-report.json',
+    'ndjson': 'vpa-report.ndjson',
+    'yaml': 'vpa-report.yaml',
+    'markdown': 'vpa-report.md',
+    'html': 'vpa-report.html',
+    'kubectl': 'apply-recommendations.sh'
+}
+
+# Kubernetes quantity suffixes: binary multipliers and decimal SI exponents
+BINARY_SUFFIXES = {'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30, 'Ti': 2 ** 40, 'Pi': 2 ** 50, 'Ei': 2 ** 60}
+DECIMAL_EXPONENTS = {'n': -9, 'u': -6, 'm': -3, '': 0, 'k': 3, 'M': 6, 'G': 9, 'T': 12, 'P': 15, 'E': 18}
+
+QUANTITY_SUFFIXES = {suffix: Decimal(multiplier) for suffix, multiplier in BINARY_SUFFIXES.items()}
+QUANTITY_SUFFIXES.update({suffix: Decimal(10) ** exponent for suffix, exponent in DECIMAL_EXPONENTS.items()})
+
+# An exponent needs digits after the "e", so "1E" is one exa while "1e3" is a thousand
+QUANTITY_PATTERN = re.compile(r'^([+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)(Ki|Mi|Gi|Ti|Pi|Ei|[numkMGTPE])?$')
+
+MIB = 1024 * 1024
+GIB = 1024 * MIB
+
+# Entries kept by the formatting memo caches; distinct values repeat heavily across containers
+FORMAT_CACHE_SIZE = 4096
+
+
+def parse_quantity(value: Any, resource_type: str) -> Optional[int]:
+    """Parse a Kubernetes quantity into millicores (CPU) or bytes (memory).
+
+    Values are rounded up like the API server does. Returns None for missing or invalid values.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value * 1000 if resource_type == 'cpu' else value
+
+    value = str(value).strip()
+    scale = 3 if resource_type == 'cpu' else 0
+
+    # Integer fast paths cover the forms VPA and most manifests use
+    if value.isdecimal():
+        return int(value) * 10 ** scale
+    if value[-2:] in BINARY_SUFFIXES and value[:-2].isdecimal():
+        return int(value[:-2]) * BINARY_SUFFIXES[value[-2:]] * 10 ** scale
+    if value[-1:] in DECIMAL_EXPONENTS and value[:-1].isdecimal():
+        number = int(value[:-1])
+        exponent = DECIMAL_EXPONENTS[value[-1]] + scale
+        return number * 10 ** exponent if exponent >= 0 else -(-number // 10 ** -exponent)
+
+    match = QUANTITY_PATTERN.match(value)
+    if not match:
+        return None
+
+    try:
+        quantity = Decimal(match.group(1)) * QUANTITY_SUFFIXES[match.group(2) or '']
+    except InvalidOperation:
+        return None
+
+    if resource_type == 'cpu':
+        quantity *= 1000
+    return int(quantity.to_integral_value(rounding=ROUND_CEILING))
+
+
+def format_cpu_millicores(millicores: int) -> str:
+    """Round millicores to a standard CPU request value."""
+    if millicores < 50:
+        return "25m"  # Minimum practical CPU
+    elif millicores < 100:
+        return "50m"
+    elif millicores < 250:
+        return "100m"
+    elif millicores < 500:
+        return "250m"
+    elif millicores < 1000:
+        return "500m"
+    else:
+        return f"{millicores // 1000}"  # Convert to full cores
+
+
+def format_memory_bytes(memory_bytes: int) -> str:
+    """Round bytes to a standard memory request value."""
+    return round_memory_mb(memory_bytes / MIB)
+
+
+def round_memory_mb(mem_mb: float) -> str:
+    """Round memory in MB to standard Kubernetes values."""
+    if mem_mb < 128:
+        return "128Mi"
+    elif mem_mb < 256:
+        return "256Mi"
+    elif mem_mb < 512:
+        return "512Mi"
+    elif mem_mb < 1024:
+        return f"{int((mem_mb + 127) // 128 * 128)}Mi"  # Round to nearest 128Mi
+    else:
+        # Convert to Gi for values >= 1GB
+        mem_gb = mem_mb / 1024
+        if mem_gb < 2:
+            return "1Gi"
+        elif mem_gb < 4:
+            return "2Gi"
+        elif mem_gb < 8:
+            return "4Gi"
+        elif mem_gb < 16:
+            return "8Gi"
+        else:
+            return f"{int((mem_gb + 1) // 2 * 2)}Gi"  # Round to nearest 2Gi
+
+
+def format_total(value: int, resource_type: str) -> str:
+    """Format an exact amount of millicores or bytes, such as a sum over containers, without rounding to request sizes."""
+    sign = '-' if value < 0 else ''
+    value = abs(value)
+    if resource_type == 'cpu':
+        return f"{sign}{value}m" if value < 1000 else f"{sign}{value / 1000:.2f}".rstrip('0').rstrip('.')
+    if value < GIB:
+        return f"{sign}{value / MIB:.0f}Mi"
+    return f"{sign}{value / GIB:.2f}Gi"
+
+
+@functools.lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_quantity(value: Optional[int], resource_type: str) -> str:
+    """Format a parsed quantity (millicores or bytes) as a rounded Kubernetes value."""
+    if value is None:
+        return 'N/A'
+    if resource_type == 'cpu':
+        return format_cpu_millicores(value)
+    return format_memory_bytes(value)
+
+
+@functools.lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_quantity_string(value: Any, resource_type: str) -> str:
+    """Format a raw quantity string as a rounded Kubernetes value, or return it unchanged if invalid."""
+    if value in ['N/A', '', None]:
+        return value
+
+    resource_type = resource_type.lower()
+    parsed = parse_quantity(value, resource_type)
+    if parsed is None or resource_type not in ('cpu', 'memory'):
+        return value
+
+    return format_quantity(parsed, resource_type)
+
+
+def to_plain(value: Any) -> Any:
+    """Convert kubernetes client models and other objects into plain dicts, lists and scalars.
+
+    The safe YAML dumpers only represent builtin types, so report entries are converted once
+    before dumping instead of relying on the Python object tags of the default dumper.
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {str(key): to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'to_dict'):
+        return to_plain(value.to_dict())
+    return str(value)
+
+
+# Recommendation bounds and current resource groups of a container, in report order
+RECOMMENDATION_BOUNDS = ('lowerBound', 'target', 'upperBound', 'uncappedTarget')
+RESOURCE_GROUPS = ('requests', 'limits')
+RESOURCE_TYPES = ('cpu', 'memory')
+
+# Position of every (group, resource type) value in a ContainerRow
+ROW_COLUMNS = tuple((group, resource_type)
+                    for group in RECOMMENDATION_BOUNDS + RESOURCE_GROUPS
+                    for resource_type in RESOURCE_TYPES)
+COLUMN_INDEX = {column: index for index, column in enumerate(ROW_COLUMNS)}
+
+
+def intern_value(value: Any) -> Any:
+    """Intern quantity and label strings so the many records repeating them share one copy."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@functools.lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def parse_quantity_cached(value: Any, resource_type: str) -> Optional[int]:
+    """parse_quantity for the few distinct quantity strings repeated across a report."""
+    return parse_quantity(value, resource_type)
+
+
+class ContainerRow(NamedTuple):
+    """One container of a processed VPA: its recommendation and current resources side by side.
+
+    quantities holds the quantity strings as reported by the cluster and values the parsed
+    CPU millicores or memory bytes, both in ROW_COLUMNS order with None where a value is not
+    set. Resources other than CPU and memory are rare and kept as-is in extra.
+    """
+
+    name: str
+    recommended: bool
+    current: bool
+    quantities: Tuple[Any, ...]
+    values: Tuple[Optional[int], ...]
+    extra: Optional[Dict[str, Dict]] = None
+
+    @classmethod
+    def build(cls, name: str, recommendation: Optional[Dict], current: Optional[Dict],
+              numeric: Optional[Dict] = None) -> 'ContainerRow':
+        """Build a row from a container recommendation and the container's requests and limits.
+
+        numeric may carry already parsed values, as found in JSON report snapshots.
+        """
+        sources = {}
+        if recommendation is not None:
+            sources.update((bound, recommendation.get(bound) or {}) for bound in RECOMMENDATION_BOUNDS)
+        if current is not None:
+            sources.update((group, current.get(group) or {}) for group in RESOURCE_GROUPS)
+
+        quantities = []
+        values = []
+        for group, resource_type in ROW_COLUMNS:
+            quantity = sources.get(group, {}).get(resource_type)
+            value = (numeric or {}).get(group, {}).get(resource_type)
+            if value is None and quantity is not None:
+                value = parse_quantity_cached(quantity, resource_type)
+            quantities.append(intern_value(quantity))
+            values.append(value)
+
+        extra = {}
+        for group, resources in sources.items():
+            others = {key: value for key, value in resources.items() if key not in RESOURCE_TYPES}
+            if others:
+                extra[group] = others
+
+        return cls(sys.intern(str(name)), recommendation is not None, current is not None,
+                   tuple(quantities), tuple(values), extra or None)
+
+    def value(self, group: str, resource_type: str) -> Optional[int]:
+        """Parsed CPU millicores or memory bytes of one bound or resource group."""
+        return self.values[COLUMN_INDEX[group, resource_type]]
+
+    def quantity(self, group: str, resource_type: str) -> Any:
+        """Quantity string of one bound or resource group, as reported by the cluster."""
+        return self.quantities[COLUMN_INDEX[group, resource_type]]
+
+    def resources(self, group: str) -> Dict:
+        """Resource list of one bound or resource group, shaped like the Kubernetes API's."""
+        resources = {}
+        for resource_type in RESOURCE_TYPES:
+            quantity = self.quantity(group, resource_type)
+            if quantity is not None:
+                resources[resource_type] = quantity
+        if self.extra and group in self.extra:
+            resources.update(self.extra[group])
+        return resources
+
+    def numeric(self, group: str) -> Dict[str, int]:
+        """Parsed CPU and memory values of one bound or resource group."""
+        numeric = {}
+        for resource_type in RESOURCE_TYPES:
+            value = self.value(group, resource_type)
+            if value is not None:
+                numeric[resource_type] = value
+        return numeric
+
+
+class VPARecord:
+    """A processed VPA: its identity, target workload and one ContainerRow per container.
+
+    Containers with a recommendation come first, in the VPA's order, followed by containers
+    of the target workload the VPA has no recommendation for. Strings repeated across many
+    records are interned. cluster is the kubeconfig context the VPA was read from in
+    multi-cluster reports and None otherwise. to_dict() renders the nested entry written to
+    JSON, YAML and NDJSON reports and from_dict() reads it back.
+    """
+
+    __slots__ = ('name', 'namespace', 'kind', 'workload', 'api_version', 'update_mode',
+                 'replicas', 'containers', 'last_updated', 'conditions', 'cluster')
+
+    def __init__(self, name: str, namespace: str, kind: Optional[str], workload: Optional[str],
+                 api_version: Optional[str], update_mode: str, replicas: Optional[int],
+                 containers: Tuple[ContainerRow, ...], last_updated: Any = None,
+                 conditions: Optional[List] = None, cluster: Optional[str] = None):
+        self.cluster = intern_value(cluster)
+        self.name = name
+        self.namespace = intern_value(namespace)
+        self.kind = intern_value(kind)
+        self.workload = workload
+        self.api_version = intern_value(api_version)
+        self.update_mode = intern_value(update_mode)
+        self.replicas = replicas
+        self.containers = containers
+        self.last_updated = last_updated
+        self.conditions = conditions or []
+
+    @classmethod
+    def from_containers(cls, recommendations: Dict[str, Dict], current_resources: Dict[str, Dict],
+                        numeric: Optional[Dict[str, Dict]] = None, **fields) -> 'VPARecord':
+        """Build a record from per-container recommendations and current resources.
+
+        numeric may map container names to their already parsed values, as written by to_dict().
+        """
+        numeric = numeric or {}
+        rows = []
+        for container_name, recommendation in recommendations.items():
+            rows.append(ContainerRow.build(container_name, recommendation, current_resources.get(container_name),
+                                           numeric.get(container_name)))
+        for container_name, current in current_resources.items():
+            if container_name not in recommendations:
+                rows.append(ContainerRow.build(container_name, None, current, numeric.get(container_name)))
+        return cls(containers=tuple(rows), **fields)
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> 'VPARecord':
+        """Read a report entry written by to_dict(), e.g. from a JSON or NDJSON report."""
+        target = entry.get('target') or {}
+        return cls.from_containers(
+            entry.get('recommendations') or {}, entry.get('currentResources') or {}, numeric=entry.get('numeric'),
+            name=entry.get('name'), namespace=entry.get('namespace'), kind=target.get('kind'),
+            workload=target.get('name'), api_version=target.get('apiVersion'),
+            update_mode=entry.get('updateMode', 'Off'), replicas=entry.get('replicas'),
+            last_updated=entry.get('lastUpdated'), conditions=entry.get('conditions'),
+            cluster=entry.get('cluster'))
+
+    @property
+    def recommended(self) -> List[ContainerRow]:
+        """Rows of the containers the VPA has a recommendation for."""
+        return [row for row in self.containers if row.recommended]
+
+    @property
+    def has_recommendations(self) -> bool:
+        return any(row.recommended for row in self.containers)
+
+    @property
+    def location(self) -> str:
+        """The namespace, prefixed with the cluster in multi-cluster reports."""
+        return f"{self.cluster}/{self.namespace}" if self.cluster else str(self.namespace)
+
+    def to_dict(self) -> Dict:
+        """Render the record as a report entry with nested recommendations and current resources.
+
+        The parsed values of each container's bounds and resource groups are kept apart under
+        numeric, so recommendations and currentResources hold nothing but quantities.
+        """
+        recommendations = {}
+        current_resources = {}
+        numeric = {}
+        for row in self.containers:
+            groups = []
+            if row.recommended:
+                recommendations[row.name] = {bound: row.resources(bound) for bound in RECOMMENDATION_BOUNDS}
+                groups.extend(RECOMMENDATION_BOUNDS)
+            if row.current:
+                current_resources[row.name] = {group: row.resources(group) for group in RESOURCE_GROUPS}
+                groups.extend(RESOURCE_GROUPS)
+            if groups:
+                numeric[row.name] = {group: row.numeric(group) for group in groups}
+
+        entry = {'cluster': self.cluster} if self.cluster else {}
+        entry.update({
+            'name': self.name,
+            'namespace': self.namespace,
+            'target': {
+                'kind': self.kind,
+                'name': self.workload,
+                'apiVersion': self.api_version
+            },
+            'updateMode': self.update_mode,
+            'replicas': self.replicas,
+            'recommendations': recommendations,
+            'currentResources': current_resources,
+            'numeric': numeric,
+            'lastUpdated': self.last_updated,
+            'conditions': self.conditions
+        })
+        return entry
+
+
+def requests_patch(kind: str, container_requests: Dict[str, Dict[str, str]]) -> Dict:
+    """Build a strategic merge patch setting container requests in a workload's pod template.
+
+    Containers are merged by name, so one patch resizes every listed container and leaves the
+    rest of the pod template, including limits, untouched.
+    """
+    template = {'template': {'spec': {'containers': [
+        {'name': name, 'resources': {'requests': requests}}
+        for name, requests in container_requests.items()
+    ]}}}
+    if kind == 'CronJob':
+        return {'spec': {'jobTemplate': {'spec': template}}}
+    return {'spec': template}
+
+
+def load_config(path: Path) -> Dict:
+    """Load the settings under the top-level config key of a vpa-reporter-config.yaml file."""
+    with Path(path).open() as f:
+        document = yaml.safe_load(f) or {}
+    return document.get('config') or {}
+
+
+class NamespaceFilter:
+    """Decides which namespaces a report covers.
+
+    Patterns are exact names, prefixes ending in '-' (such as 'openshift-'), shell globs such
+    as 'team-*', or regular expressions prefixed with 're:', searched anywhere in the name
+    unless anchored. A namespace is covered when it matches an include pattern (or there are
+    none), matches no exclude pattern and, with a label selector, carries matching labels.
+    """
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = (),
+                 label_selector: Optional[str] = None):
+        include = list(include)
+        exclude = list(exclude)
+        self.include = [self._compile(pattern) for pattern in include]
+        self.exclude = [self._compile(pattern) for pattern in exclude]
+        # Exact names can be excluded server side with field selectors
+        self.exact_excludes = sorted({pattern for pattern in exclude if self._is_exact(pattern)})
+        self.label_selector = label_selector or None
+        # Names of the namespaces matching label_selector, once resolved against the cluster
+        self.selected: Optional[Set[str]] = None
+        self._matches: Dict[str, bool] = {}
+
+    @staticmethod
+    def _is_exact(pattern: str) -> bool:
+        return not (pattern.startswith('re:') or pattern.endswith('-') or any(c in pattern for c in '*?['))
+
+    @classmethod
+    def _compile(cls, pattern: str) -> Callable[[str], bool]:
+        if pattern.startswith('re:'):
+            regex = re.compile(pattern[3:])
+            return lambda name: regex.search(name) is not None
+        if any(c in pattern for c in '*?['):
+            return lambda name: fnmatch.fnmatchcase(name, pattern)
+        if pattern.endswith('-'):
+            return lambda name: name.startswith(pattern)
+        return lambda name: name == pattern
+
+    def __bool__(self) -> bool:
+        return bool(self.include or self.exclude or self.label_selector)
+
+    def matches(self, namespace: str) -> bool:
+        """Return whether a namespace is covered by the report."""
+        if self.selected is not None and namespace not in self.selected:
+            return False
+
+        matched = self._matches.get(namespace)
+        if matched is None:
+            matched = (
+                (not self.include or any(match(namespace) for match in self.include))
+                and not any(match(namespace) for match in self.exclude)
+            )
+            self._matches[namespace] = matched
+        return matched
+
+    def field_selector(self) -> Optional[str]:
+        """Field selector excluding the exactly named namespaces, for cluster-wide list calls."""
+        if not self.exact_excludes:
+            return None
+        return ','.join(f"metadata.namespace!={namespace}" for namespace in self.exact_excludes)
+
+
+class Timings:
+    """Wall time per phase of a run and statistics of every Kubernetes API request.
+
+    Phases nest: time spent in an inner phase (a lazy workload read while processing a VPA)
+    is only counted there, so the phase times add up to the run time. Phases are timed on
+    the thread that created the instance; API requests are recorded from any thread.
+    """
+
+    # Upper bounds in seconds of the API latency histogram buckets
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+
+    # Prefixes and suffixes of client method names around the resource they act on
+    METHOD_AFFIXES = ('namespaced_', 'cluster_', '_for_all_namespaces')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.thread = threading.current_thread()
+        self.phases: Dict[str, float] = {}
+        # [phase, start, seconds spent in nested phases]
+        self._stack: List[List] = []
+        # (verb, resource) -> count, bytes, total and max seconds, histogram bucket counts
+        self.api: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Attribute the wall time of the block to a phase, minus nested phases."""
+        if threading.current_thread() is not self.thread:
+            yield
+            return
+
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - frame[2]
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def timed(self, iterator: Iterable, name: str) -> Iterator:
+        """Yield from iterator, attributing the time spent producing each item to a phase."""
+        iterator = iter(iterator)
+        while True:
+            with self.phase(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    @classmethod
+    def call_label(cls, api_func: Callable, args: Tuple, kwargs: Dict) -> Tuple[str, str]:
+        """Derive the verb and resource of a client call, e.g. ('list', 'deployment')."""
+        verb, _, resource = getattr(api_func, '__name__', 'call').partition('_')
+        if kwargs.get('watch'):
+            verb = 'watch'
+        if resource.endswith('custom_object'):
+            return verb, str(kwargs.get('plural') or (args[-1] if args else 'custom_object'))
+        for affix in cls.METHOD_AFFIXES:
+            resource = resource.replace(affix, '')
+        return verb, resource or 'unknown'
+
+    def record_call(self, label: Tuple[str, str], seconds: float, received: int = 0) -> None:
+        """Record one API request: its latency and the bytes of its response body."""
+        with self._lock:
+            stats = self.api.get(label)
+            if stats is None:
+                stats = self.api[label] = {'count': 0, 'bytes': 0, 'seconds': 0.0, 'max': 0.0,
+                                           'buckets': [0] * len(self.LATENCY_BUCKETS)}
+            stats['count'] += 1
+            stats['bytes'] += received
+            stats['seconds'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['buckets'][bisect.bisect_left(self.LATENCY_BUCKETS, seconds)] += 1
+
+    @staticmethod
+    def peak_rss() -> Optional[int]:
+        """Peak resident set size of the process in bytes, if the platform reports it."""
+        if getrusage is None:
+            return None
+        # Linux reports kilobytes, macOS bytes
+        maxrss = getrusage(RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
 
-        # Load Kubernetes configuration
+    @classmethod
+    def _bucket_label(cls, index: int) -> str:
+        bound = cls.LATENCY_BUCKETS[index]
+        if bound == float('inf'):
+            return f">{cls._seconds_label(cls.LATENCY_BUCKETS[index - 1])}"
+        return f"≤{cls._seconds_label(bound)}"
+
+    @staticmethod
+    def _seconds_label(seconds: float) -> str:
+        return f"{seconds * 1000:g}ms" if seconds < 1 else f"{seconds:g}s"
+
+    @staticmethod
+    def _format_bytes(count: int) -> str:
+        for unit in ('B', 'KiB', 'MiB'):
+            if count < 1024:
+                return f"{count:.0f}{unit}" if unit == 'B' else f"{count:.1f}{unit}"
+            count /= 1024
+        return f"{count:.2f}GiB"
+
+    def summary(self) -> Dict:
+        """All measurements as plain data, for the JSON timings file."""
+        total = time.perf_counter() - self.started
+        phases = dict(sorted(self.phases.items(), key=lambda item: -item[1]))
+        phases['other'] = max(0.0, total - sum(self.phases.values()))
+        return {
+            'totalSeconds': round(total, 6),
+            'phases': {name: round(seconds, 6) for name, seconds in phases.items()},
+            'apiCalls': [
+                {
+                    'verb': verb,
+                    'resource': resource,
+                    'count': stats['count'],
+                    'bytes': stats['bytes'],
+                    'totalSeconds': round(stats['seconds'], 6),
+                    'maxSeconds': round(stats['max'], 6),
+                    'histogram': [
+                        {'le': 'inf' if bound == float('inf') else bound, 'count': count}
+                        for bound, count in zip(self.LATENCY_BUCKETS, stats['buckets'])
+                    ]
+                }
+                for (verb, resource), stats in sorted(self.api.items())
+            ],
+            'peakRssBytes': self.peak_rss()
+        }
+
+    def write(self, path: str) -> None:
+        """Write the summary as JSON."""
+        with Path(path).open('w') as f:
+            json.dump(self.summary(), f, indent=2)
+            f.write('\n')
+
+    def print(self, console: Console) -> None:
+        """Print the phase and API request tables."""
+        summary = self.summary()
+        total = summary['totalSeconds']
+
+        phase_table = Table(title=f"Run Phases ({total:.3f}s)")
+        phase_table.add_column("Phase", style="cyan")
+        phase_table.add_column("Seconds", justify="right")
+        phase_table.add_column("Share", justify="right", style="green")
+        for name, seconds in summary['phases'].items():
+            phase_table.add_row(name, f"{seconds:.3f}", f"{seconds / total:.1%}" if total else "-")
+        console.print(phase_table)
+
+        if self.api:
+            api_table = Table(title="Kubernetes API Requests")
+            api_table.add_column("Verb", style="cyan")
+            api_table.add_column("Resource", style="cyan")
+            api_table.add_column("Calls", justify="right")
+            api_table.add_column("Received", justify="right")
+            api_table.add_column("Mean", justify="right")
+            api_table.add_column("Max", justify="right")
+            api_table.add_column("Latency Histogram")
+            for (verb, resource), stats in sorted(self.api.items()):
+                histogram = ' '.join(
+                    f"{self._bucket_label(index)}:{count}" for index, count in enumerate(stats['buckets']) if count
+                )
+                api_table.add_row(verb, resource, str(stats['count']), self._format_bytes(stats['bytes']),
+                                  f"{stats['seconds'] / stats['count'] * 1000:.1f}ms", f"{stats['max'] * 1000:.1f}ms",
+                                  histogram)
+            console.print(api_table)
+
+        peak_rss = summary['peakRssBytes']
+        if peak_rss is not None:
+            console.print(f"Peak RSS: {self._format_bytes(peak_rss)}")
+
+
+class SnapshotCache:
+    """On-disk cache of Kubernetes list snapshots, keyed by cluster and list scope.
+
+    Snapshots are stored as NDJSON: a header line with the resourceVersion, then one line per
+    item, so they can be written and read back one item at a time.
+    """
+
+    DEFAULT_TTL = 300
+    DEFAULT_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'vpa-reporter'
+
+    def __init__(self, cluster: str, ttl: int = DEFAULT_TTL, cache_dir: Path = DEFAULT_DIR):
+        # Snapshots from different clusters must never be mixed up
+        cluster_id = hashlib.sha256(cluster.encode()).hexdigest()[:16]
+        self.cache_dir = Path(cache_dir) / cluster_id
+        self.ttl = ttl
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.ndjson"
+
+    def load(self, key: str) -> Optional[Dict]:
+        """Return the header of the cached snapshot for key if it exists and is younger than the TTL."""
+        path = self._path(key)
+        try:
+            with path.open() as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - header.get('fetchedAt', 0) > self.ttl:
+            logger.debug(f"Cached snapshot {key} is older than {self.ttl}s, ignoring it")
+            return None
+
+        return header
+
+    def iter_items(self, key: str) -> Iterator:
+        """Yield the items of a cached snapshot one at a time."""
+        with self._path(key).open() as f:
+            f.readline()  # Header
+            for line in f:
+                yield json.loads(line)
+
+    def save(self, key: str, resource_version: str, items: Iterable) -> Iterator:
+        """Store a list snapshot together with the resourceVersion it was read at.
+
+        Items are passed through as they are written. The snapshot only replaces the previous
+        one once every item was consumed, so an interrupted listing never leaves a partial file.
+        """
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            f = tmp_path.open('w')
+        except OSError as e:
+            logger.warning(f"Could not write snapshot cache {path}: {e}")
+            yield from items
+            return
+
+        completed = False
         try:
-            if kubeconfig_path:
-                config.load_kube_config(config_file=kubeconfig_path)
+            f.write(json.dumps({'fetchedAt': time.time(), 'resourceVersion': resource_version}) + '\n')
+            for item in items:
+                f.write(json.dumps(item, default=str) + '\n')
+                yield item
+            completed = True
+        finally:
+            f.close()
+            if completed:
+                tmp_path.replace(path)
             else:
-                try:
-                    config.load_incluster_config()
-                except config.ConfigException:
-                    config.load_kube_config()
+                tmp_path.unlink(missing_ok=True)
 
-            # Configure SSL verification if needed
-            if insecure:
-                # Disable SSL verification for self-signed certificates
-                configuration = client.Configuration.get_default_copy()
-                configuration.verify_ssl = False
-                configuration.ssl_ca_cert = None
-                client.Configuration.set_default(configuration)
 
-            self.k8s_client = client.ApiClient()
-            self.custom_objects_api = client.CustomObjectsApi()
-            self.core_v1 = client.CoreV1Api()
-            self.apps_v1 = client.AppsV1Api()
+class HistoryStore:
+    """Append-only SQLite store of the recommendations seen on every run.
 
-            logger.info("Successfully connected to Kubernetes cluster")
-        except Exception as e:
-            logger.error(f"Failed to connect to Kubernetes: {e}")
-            raise
+    Each container of a VPA is one series; every run appends one sample per series. Trends
+    are computed with a single aggregate pass over a covering index per trended column, so a
+    year of nightly runs over thousands of containers is summarized without loading samples
+    into Python one row at a time.
+    """
+
+    # Sample columns and the (bound or resource group, resource) ContainerRow value they hold
+    COLUMNS = {
+        'cpu_lower': ('lowerBound', 'cpu'),
+        'cpu_target': ('target', 'cpu'),
+        'cpu_upper': ('upperBound', 'cpu'),
+        'memory_lower': ('lowerBound', 'memory'),
+        'memory_target': ('target', 'memory'),
+        'memory_upper': ('upperBound', 'memory'),
+        'cpu_request': ('requests', 'cpu'),
+        'memory_request': ('requests', 'memory')
+    }
+
+    # Columns summarized by trends, each with an index ordered by value within a series
+    TREND_COLUMNS = ('cpu_target', 'memory_target')
+
+    # Nearest-rank percentiles reported by trends
+    PERCENTILES = (50, 90, 95)
+
+    # Targets whose coefficient of variation and drift stay within this fraction count as stable
+    STABLE_VARIATION = 0.1
+
+    SCHEMA = f"""
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            recorded_at INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS series (
+            id INTEGER PRIMARY KEY,
+            namespace TEXT NOT NULL,
+            vpa TEXT NOT NULL,
+            container TEXT NOT NULL,
+            kind TEXT,
+            workload TEXT,
+            UNIQUE (namespace, vpa, container)
+        );
+        CREATE TABLE IF NOT EXISTS samples (
+            series_id INTEGER NOT NULL REFERENCES series (id),
+            run_id INTEGER NOT NULL REFERENCES runs (id),
+            recorded_at INTEGER NOT NULL,
+            {', '.join(f'{column} INTEGER' for column in COLUMNS)},
+            PRIMARY KEY (series_id, run_id)
+        ) WITHOUT ROWID;
+        {''.join(f'CREATE INDEX IF NOT EXISTS samples_{column} ON samples (series_id, {column}, recorded_at);'
+                 for column in TREND_COLUMNS)}
+    """
+
+    # Count, maximum, mean, variance, all values, first and last value of one column per series.
+    # group_concat does not guarantee any order, so the values are sorted before percentiles are
+    # picked by rank; scanning the (series, value) index usually hands them over sorted already,
+    # which makes that sort a linear pass.
+    TREND_QUERY = """
+        SELECT
+            stats.*,
+            (SELECT {column} FROM samples WHERE series_id = stats.series_id AND run_id = stats.first_run),
+            (SELECT {column} FROM samples WHERE series_id = stats.series_id AND run_id = stats.last_run)
+        FROM (
+            SELECT
+                series_id,
+                COUNT(*),
+                MAX({column}),
+                AVG({column}),
+                AVG({column} * {column}) - AVG({column}) * AVG({column}),
+                group_concat({column}),
+                MIN(run_id) AS first_run,
+                MAX(run_id) AS last_run
+            FROM samples INDEXED BY samples_{column}
+            WHERE recorded_at >= ? AND {column} IS NOT NULL
+            GROUP BY series_id
+        ) AS stats
+    """
+
+    DEFAULT_PATH = Path(os.environ.get('XDG_DATA_HOME', Path.home() / '.local' / 'share')) / 'vpa-reporter' / 'history.db'
+
+    def __init__(self, path: Path = DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def recording(self, vpas: Iterable[VPARecord], recorded_at: Optional[float] = None) -> Iterator[VPARecord]:
+        """Pass VPAs through, then append one sample per container in a single transaction.
+
+        Nothing is written if the iteration is interrupted, so a run is recorded completely or not at all.
+        """
+        rows = []
+        for vpa in vpas:
+            rows.extend(self._sample_rows(vpa))
+            yield vpa
+        self._record_rows(rows, recorded_at)
+
+    def _sample_rows(self, vpa: VPARecord) -> Iterator[Tuple]:
+        """Yield (series key, column values) for every container with recommendations."""
+        indexes = [COLUMN_INDEX[column] for column in self.COLUMNS.values()]
+        for row in vpa.recommended:
+            values = tuple(row.values[index] for index in indexes)
+            yield (vpa.namespace, vpa.name, row.name, vpa.kind, vpa.workload), values
+
+    def _record_rows(self, rows: List[Tuple], recorded_at: Optional[float] = None) -> int:
+        """Insert the samples of one run, returning its id."""
+        recorded_at = int(recorded_at if recorded_at is not None else time.time())
+
+        with self.connection:
+            run_id = self.connection.execute('INSERT INTO runs (recorded_at) VALUES (?)', (recorded_at,)).lastrowid
+            self.connection.executemany(
+                """INSERT INTO series (namespace, vpa, container, kind, workload) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (namespace, vpa, container) DO UPDATE SET kind = excluded.kind, workload = excluded.workload""",
+                [key for key, _ in rows]
+            )
+            series_ids = {
+                (namespace, vpa, container): series_id
+                for series_id, namespace, vpa, container in self.connection.execute(
+                    'SELECT id, namespace, vpa, container FROM series'
+                )
+            }
+            placeholders = ', '.join('?' * (3 + len(self.COLUMNS)))
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO samples (series_id, run_id, recorded_at, {', '.join(self.COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                [(series_ids[key[:3]], run_id, recorded_at) + values for key, values in rows]
+            )
+
+        logger.info(f"Recorded {len(rows)} container recommendations to {self.path}")
+        return run_id
+
+    def trends(self, window_days: float, namespace: Optional[str] = None) -> List[Dict]:
+        """Summarize the target recommendation of every container over the last window_days."""
+        since = int(time.time() - window_days * 86400)
+        series = {
+            series_id: {'namespace': ns, 'vpa': vpa, 'container': container, 'kind': kind, 'workload': workload}
+            for series_id, ns, vpa, container, kind, workload in self.connection.execute(
+                'SELECT id, namespace, vpa, container, kind, workload FROM series'
+            )
+            if not namespace or ns == namespace
+        }
+
+        trends = {}
+        for column in self.TREND_COLUMNS:
+            resource = column.split('_')[0]
+            query = self.TREND_QUERY.format(column=column)
+            for (series_id, samples, maximum, mean, variance, values, _, _,
+                 first, last) in self.connection.execute(query, (since,)):
+                if series_id not in series:
+                    continue
+                stddev = max(variance, 0.0) ** 0.5
+                values = sorted(map(int, values.split(',')))
+                entry = trends.setdefault(series_id, dict(series[series_id], samples=0))
+                entry['samples'] = max(entry['samples'], samples)
+                entry[resource] = {
+                    **{f"p{percentile}": values[(samples * percentile + 99) // 100 - 1]
+                       for percentile in self.PERCENTILES},
+                    'max': maximum,
+                    'mean': mean,
+                    'stddev': stddev,
+                    'variation': stddev / mean if mean else None,
+                    'first': first,
+                    'last': last,
+                    'drift': (last - first) / first if first else None
+                }
+
+        for entry in trends.values():
+            entry['stable'] = all(
+                stats['variation'] is not None and stats['variation'] <= self.STABLE_VARIATION
+                and stats['drift'] is not None and abs(stats['drift']) <= self.STABLE_VARIATION
+                for stats in (entry.get('cpu'), entry.get('memory')) if stats
+            )
+
+        return sorted(trends.values(), key=lambda entry: (entry['namespace'], entry['vpa'], entry['container']))
+
+    def generate_trend_report(self, trends: List[Dict], window_days: float, formats: List[str],
+                              output_paths: Dict[str, str]) -> None:
+        """Render trends as a console table or a JSON/YAML document."""
+        document = {
+            'trends': trends,
+            'metadata': {
+                'generatedAt': datetime.now().isoformat(),
+                'windowDays': window_days,
+                'totalContainers': len(trends),
+                'generator': 'vpa-goldilocks-reporter'
+            }
+        }
+        console = Console()
+
+        for report_format in formats:
+            if report_format == 'json':
+                with Path(output_paths['json']).open('w') as f:
+                    json.dump(document, f, indent=2)
+            elif report_format == 'yaml':
+                with Path(output_paths['yaml']).open('w') as f:
+                    yaml.dump(document, f, Dumper=YAMLDumper, indent=2, default_flow_style=False)
+            elif report_format == 'console':
+                self._print_trends(console, trends, window_days)
+                continue
+            else:
+                raise ValueError(f"Unsupported trend report format: {report_format}")
+            console.print(f"[green]Trend report generated: {output_paths[report_format]}[/green]")
 
     @staticmethod
-    def format_resource_value(value: str, resource_type: str) -> str:
-        """Format resource values to standard Kubernetes formats."""
-        if value in ['N/A', '', None]:
-            return value
+    def _print_trends(console: Console, trends: List[Dict], window_days: float) -> None:
+        if not trends:
+            console.print(f"[yellow]No recorded recommendations in the last {window_days:g} days.[/yellow]")
+            return
 
-        if resource_type.lower() == 'cpu':
-            # CPU formatting - convert to millicores if needed
-            if value.endswith('m'):
-                try:
-                    cpu_val = int(value[:-1])
-                    if cpu_val < 50:
-                        return "25m"  # Minimum practical CPU
-                    elif cpu_val < 100:
-                        return "50m"
-                    elif cpu_val < 250:
-                        return "100m"
-                    elif cpu_val < 500:
-                        return "250m"
-                    elif cpu_val < 1000:
-                        return "500m"
-                    else:
-                        return f"{cpu_val // 1000}"  # Convert to full cores
-                except ValueError:
-                    return value
-            elif '.' in value:
-                # Handle decimal cores (e.g., "0.1" -> "100m")
-                try:
-                    cpu_float = float(value)
-                    if cpu_float < 0.025:
-                        return "25m"
-                    elif cpu_float < 0.05:
-                        return "25m"
-                    elif cpu_float < 0.1:
-                        return "50m"
-                    elif cpu_float < 0.25:
-                        return "100m"
-                    elif cpu_float < 0.5:
-                        return "250m"
-                    elif cpu_float < 1:
-                        return "500m"
-                    else:
-                        return str(int(cpu_float))
-                except ValueError:
-                    return value
-            return value
+        def percent(value: Optional[float]) -> str:
+            return f"{value:+.1%}" if value is not None else "N/A"
 
-        elif resource_type.lower() == 'memory':
-            # Memory formatting - convert to standard units
-            try:
-                # Handle various memory formats
-                if value.endswith('k') or value.endswith('K'):
-                    # Convert from kilobytes
-                    mem_kb = int(value[:-1])
-                    if mem_kb < 512:  # Less than 512KB -> 256Mi
-                        return "256Mi"
-                    elif mem_kb < 1024:  # Less than 1MB -> 512Mi
-                        return "512Mi"
-                    else:
-                        # Convert KB to MB then round
-                        mem_mb = mem_kb / 1024
-                        return VPARecommendationReporter._round_memory_mb(mem_mb)
-
-                elif value.endswith('M') or value.endswith('Mi'):
-                    # Already in MB/MiB - just round
-                    mem_val = int(value.replace('Mi', '').replace('M', ''))
-                    return VPARecommendationReporter._round_memory_mb(mem_val)
-
-                elif value.endswith('G') or value.endswith('Gi'):
-                    # Convert from GB/GiB to MB then round
-                    mem_gb = float(value.replace('Gi', '').replace('G', ''))
-                    mem_mb = mem_gb * 1024
-                    return VPARecommendationReporter._round_memory_mb(mem_mb)
-
-                elif value.isdigit():
-                    # Raw bytes - convert to MB then round
-                    mem_bytes = int(value)
-                    mem_mb = mem_bytes / (1024 * 1024)
-                    return VPARecommendationReporter._round_memory_mb(mem_mb)
+        table = Table(title=f"VPA Target Trends (last {window_days:g} days)")
+        table.add_column("VPA", style="green")
+        table.add_column("Container", style="cyan")
+        table.add_column("Samples", justify="right")
+        for resource in ('CPU', 'Memory'):
+            table.add_column(f"{resource} p50 / p95", justify="right")
+            table.add_column(f"{resource} CV", justify="right")
+            table.add_column(f"{resource} Drift", justify="right")
+        table.add_column("Stable", justify="center")
 
+        for entry in trends:
+            row = [f"{entry['namespace']}/{entry['vpa']}", entry['container'], str(entry['samples'])]
+            for resource in ('cpu', 'memory'):
+                stats = entry.get(resource)
+                if stats:
+                    variation = f"{stats['variation']:.1%}" if stats['variation'] is not None else "N/A"
+                    percentiles = f"{format_quantity(stats['p50'], resource)} / {format_quantity(stats['p95'], resource)}"
+                    row += [percentiles, variation, percent(stats['drift'])]
                 else:
-                    return value
+                    row += ["N/A"] * 3
+            row.append("[green]yes[/green]" if entry['stable'] else "[red]no[/red]")
+            table.add_row(*row)
 
-            except (ValueError, TypeError):
-                return value
+        console.print(table)
 
-        return value
+
+class SavingsAnalysis:
+    """Replica-weighted comparison of container requests with VPA targets.
+
+    Containers are appended to columnar arrays as VPAs stream past; deltas, totals and
+    rankings are computed over whole columns once every VPA has been seen. A positive delta
+    is over-provisioned capacity that can be reclaimed, a negative one capacity the workload
+    is short of. CPU is in millicores and memory in bytes throughout.
+    """
+
+    DEFAULT_TOP = 10
+
+    # Resource -> key of its figures in the summary, named after the unit
+    RESOURCES = {'cpu': 'cpuMillicores', 'memory': 'memoryBytes'}
+
+    def __init__(self, top_n: int = DEFAULT_TOP):
+        self.top_n = top_n
+        # (cluster, namespace, vpa, kind/workload, container) of every row
+        self.labels: List[Tuple[Optional[str], str, str, str, str]] = []
+        self.replicas = array('q')
+        self.requests = {resource: array('q') for resource in self.RESOURCES}
+        self.targets = {resource: array('q') for resource in self.RESOURCES}
+        self.without_requests = 0
+        self._summary: Optional[Dict] = None
+
+    def add(self, vpa: VPARecord) -> None:
+        """Append a row for every container of a VPA with a target and a current request."""
+        replicas = vpa.replicas
+        if replicas is None:
+            # Reports written before replicas were recorded
+            replicas = 1
+        workload = f"{vpa.kind}/{vpa.workload}"
+
+        for container in vpa.recommended:
+            # A resource without a request or target contributes no delta
+            row = {}
+            for resource in self.RESOURCES:
+                request = container.value('requests', resource)
+                target_value = container.value('target', resource)
+                if request is not None and target_value is not None:
+                    row[resource] = (request, target_value)
+            if len(row) < len(self.RESOURCES):
+                self.without_requests += 1
+                if not row:
+                    continue
+
+            self.labels.append((vpa.cluster, vpa.namespace, vpa.name, workload, container.name))
+            self.replicas.append(replicas)
+            for resource in self.RESOURCES:
+                request, target_value = row.get(resource, (0, 0))
+                self.requests[resource].append(request)
+                self.targets[resource].append(target_value)
 
     @staticmethod
-    def _round_memory_mb(mem_mb: float) -> str:
-        """Round memory in MB to standard Kubernetes values."""
-        if mem_mb < 128:
-            return "128Mi"
-        elif mem_mb < 256:
-            return "256Mi"
-        elif mem_mb < 512:
-            return "512Mi"
-        elif mem_mb < 1024:
-            return f"{int((mem_mb + 127) // 128 * 128)}Mi"  # Round to nearest 128Mi
-        else:
-            # Convert to Gi for values >= 1GB
-            mem_gb = mem_mb / 1024
-            if mem_gb < 2:
-                return "1Gi"
-            elif mem_gb < 4:
-                return "2Gi"
-            elif mem_gb < 8:
-                return "4Gi"
-            elif mem_gb < 16:
-                return "8Gi"
-            else:
-                return f"{int((mem_gb + 1) // 2 * 2)}Gi"  # Round to nearest 2Gi
+    def _totals(requested: int, recommended: int, deltas: Iterable[int]) -> Dict:
+        deltas = list(deltas)
+        over = sum(filter((0).__lt__, deltas))
+        under = -sum(filter((0).__gt__, deltas))
+        return {
+            'requested': requested,
+            'recommended': recommended,
+            'overProvisioned': over,
+            'underProvisioned': under,
+            'net': over - under
+        }
 
-    def get_vpa_recommendations(self, namespace: Optional[str] = None) -> List[Dict]:
-        """Fetch VPA recommendations from the cluster."""
-        vpas = []
+    def _grouped(self, fields: Tuple[str, ...], deltas: Dict[str, array]) -> List[Dict]:
+        """Totals of the rows grouped by label fields, most reclaimable first.
 
-        try:
-            if namespace:
-                namespaces = [namespace]
-            else:
-                # Get all namespaces
-                ns_response = self.core_v1.list_namespace()
-                namespaces = [ns.metadata.name for ns in ns_response.items]
+        fields name label columns (cluster, namespace); a cluster of None is left out of
+        the entries, as in single-cluster reports.
+        """
+        columns = [('cluster', 'namespace').index(field) for field in fields]
+        groups: Dict[Tuple, List[int]] = {}
+        for index, label in enumerate(self.labels):
+            groups.setdefault(tuple(label[column] for column in columns), []).append(index)
 
-            for ns in track(namespaces, description="Fetching VPA recommendations..."):
-                try:
-                    vpa_response = self.custom_objects_api.list_namespaced_custom_object(
-                        group="autoscaling.k8s.io",
-                        version="v1",
-                        namespace=ns,
-                        plural="verticalpodautoscalers"
-                    )
+        entries = []
+        for key, indices in groups.items():
+            entry = {field: value for field, value in zip(fields, key) if value is not None}
+            entry['containers'] = len(indices)
+            for resource, resource_key in self.RESOURCES.items():
+                requests, targets = self.requests[resource], self.targets[resource]
+                entry[resource_key] = self._totals(
+                    sum(requests[i] * self.replicas[i] for i in indices),
+                    sum(targets[i] * self.replicas[i] for i in indices),
+                    (deltas[resource][i] for i in indices)
+                )
+            entries.append(entry)
+        entries.sort(key=lambda entry: tuple(-entry[key]['net'] for key in self.RESOURCES.values()))
+        return entries
 
-                    for vpa in vpa_response.get('items', []):
-                        vpas.append(self._process_vpa(vpa, ns))
+    def summary(self) -> Dict:
+        """Compute cluster and namespace totals and the top opportunities, once."""
+        if self._summary is not None:
+            return self._summary
 
-                except ApiException as e:
-                    if e.status != 404:  # Ignore namespaces without VPAs
-                        logger.warning(f"Could not fetch VPAs from namespace {ns}: {e}")
+        summary = {'containers': len(self.labels), 'containersWithoutRequests': self.without_requests}
+        deltas = {}
+        for resource, key in self.RESOURCES.items():
+            requests, targets = self.requests[resource], self.targets[resource]
+            deltas[resource] = array('q', map(mul, map(sub, requests, targets), self.replicas))
+            summary[key] = self._totals(
+                sum(map(mul, requests, self.replicas)),
+                sum(map(mul, targets, self.replicas)),
+                deltas[resource]
+            )
 
-        except Exception as e:
-            logger.error(f"Error fetching VPA recommendations: {e}")
-            raise
+        # Multi-cluster reports total every cluster as well, and namespaces per cluster
+        if any(label[0] is not None for label in self.labels):
+            summary['clusters'] = self._grouped(('cluster',), deltas)
+        summary['namespaces'] = self._grouped(('cluster', 'namespace'), deltas)
 
-        return vpas
+        summary['top'] = {}
+        for resource, key in self.RESOURCES.items():
+            column = deltas[resource]
+            top = heapq.nlargest(self.top_n, (i for i in range(len(column)) if column[i] > 0),
+                                 key=column.__getitem__)
+            summary['top'][key] = [
+                {
+                    **({'cluster': self.labels[i][0]} if self.labels[i][0] is not None else {}),
+                    'namespace': self.labels[i][1],
+                    'vpa': self.labels[i][2],
+                    'workload': self.labels[i][3],
+                    'container': self.labels[i][4],
+                    'replicas': self.replicas[i],
+                    'request': self.requests[resource][i],
+                    'target': self.targets[resource][i],
+                    'reclaimable': column[i]
+                }
+                for i in top
+            ]
 
-    def _process_vpa(self, vpa: Dict, namespace: str) -> Dict:
-        """Process a single VPA object and extract relevant information."""
-        metadata = vpa.get('metadata', {})
-        spec = vpa.get('spec', {})
-        status = vpa.get('status', {})
+        self._summary = summary
+        return summary
+
+    def total_rows(self) -> List[Tuple[str, ...]]:
+        """Cluster totals per resource as display strings."""
+        summary = self.summary()
+        rows = []
+        for resource, key in self.RESOURCES.items():
+            totals = summary[key]
+            rows.append((
+                'CPU' if resource == 'cpu' else 'Memory',
+                *(format_total(totals[field], resource)
+                  for field in ('requested', 'recommended', 'overProvisioned', 'underProvisioned', 'net'))
+            ))
+        return rows
+
+    @staticmethod
+    def _location(entry: Dict) -> str:
+        return f"{entry['cluster']}/{entry['namespace']}" if 'cluster' in entry else entry['namespace']
+
+    def top_rows(self, resource: str) -> List[Tuple[str, ...]]:
+        """The most over-provisioned containers for a resource as display strings.
+
+        Requests and targets are rounded like in the other tables, the reclaimable amount is exact.
+        """
+        return [
+            (f"{self._location(entry)}/{entry['workload']}", entry['container'], str(entry['replicas']),
+             format_quantity(entry['request'], resource), format_quantity(entry['target'], resource),
+             format_total(entry['reclaimable'], resource))
+            for entry in self.summary()['top'][self.RESOURCES[resource]]
+        ]
+
+    def namespace_rows(self) -> List[Tuple[str, ...]]:
+        """Net reclaimable capacity of the top namespaces as display strings."""
+        return [
+            (self._location(entry), str(entry['containers']),
+             *(format_total(entry[key]['net'], resource) for resource, key in self.RESOURCES.items()))
+            for entry in self.summary()['namespaces'][:self.top_n]
+        ]
+
+    def cluster_rows(self) -> List[Tuple[str, ...]]:
+        """Net reclaimable capacity of every cluster as display strings, empty for a single cluster."""
+        return [
+            (entry['cluster'], str(entry['containers']),
+             *(format_total(entry[key]['net'], resource) for resource, key in self.RESOURCES.items()))
+            for entry in self.summary().get('clusters', [])
+        ]
+
+
+class RecommendationDiff:
+    """Recommendations that changed between two runs.
+
+    Containers are identified by cluster, namespace, target workload and container name.
+    The rounded targets of the old run are indexed in a dict and the new run streams past
+    it, so every container costs one lookup and only the old targets are held in memory. A
+    container changed when the rounded target of a resource moved by more than threshold
+    percent of its old value; containers found in only one run were added or removed.
+    """
+
+    DEFAULT_THRESHOLD = 10.0
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        # (cluster, namespace, kind/workload, container) -> rounded (cpu, memory) targets of the old run
+        self.old: Dict[Tuple, Tuple[Optional[str], ...]] = {}
+        self.changes: List[Dict] = []
+        self.compared = 0
+
+    @staticmethod
+    def _targets(vpa: VPARecord) -> Iterator[Tuple[Tuple, Tuple[Optional[str], ...]]]:
+        """Key and rounded targets of every recommended container of a VPA."""
+        workload = f"{vpa.kind}/{vpa.workload}"
+        for row in vpa.recommended:
+            targets = []
+            for resource_type in RESOURCE_TYPES:
+                value = row.value('target', resource_type)
+                targets.append(format_quantity(value, resource_type) if value is not None else None)
+            yield (vpa.cluster, vpa.namespace, workload, row.name), tuple(targets)
+
+    def index(self, vpas: Iterable[VPARecord]) -> None:
+        """Index the targets of the old run."""
+        for vpa in vpas:
+            self.old.update(self._targets(vpa))
+
+    def _moved(self, resource_type: str, before: Optional[str], after: Optional[str]) -> bool:
+        if before is None or after is None:
+            return before != after
+        before_value = parse_quantity_cached(before, resource_type)
+        after_value = parse_quantity_cached(after, resource_type)
+        return abs(after_value - before_value) > before_value * self.threshold / 100
+
+    def compare(self, vpas: Iterable[VPARecord]) -> List[Dict]:
+        """Compare the new run with the indexed old one and return the changes, sorted by container."""
+        old = self.old
+        self.compared = len(old)
+        for vpa in vpas:
+            for key, after in self._targets(vpa):
+                before = old.pop(key, None)
+                if before is None:
+                    self.compared += 1
+                    self._change('added', key, (None,) * len(after), after)
+                elif any(map(self._moved, RESOURCE_TYPES, before, after)):
+                    self._change('changed', key, before, after)
+        for key, before in old.items():
+            self._change('removed', key, before, (None,) * len(before))
+        old.clear()
+
+        self.changes.sort(key=lambda change: (change.get('cluster') or '', str(change['namespace']),
+                                              change['workload'], change['container']))
+        return self.changes
+
+    def _change(self, change: str, key: Tuple, before: Tuple, after: Tuple) -> None:
+        cluster, namespace, workload, container = key
+        entry = {'cluster': cluster} if cluster else {}
+        entry.update({'namespace': namespace, 'workload': workload, 'container': container, 'change': change})
+        for resource_type, old_target, new_target in zip(RESOURCE_TYPES, before, after):
+            percent = None
+            if old_target is not None and new_target is not None:
+                old_value = parse_quantity_cached(old_target, resource_type)
+                new_value = parse_quantity_cached(new_target, resource_type)
+                percent = round((new_value - old_value) * 100 / old_value, 1) if old_value else None
+            entry[resource_type] = {'old': old_target, 'new': new_target, 'changePercent': percent}
+        self.changes.append(entry)
+
+    def rows(self) -> List[Tuple[str, ...]]:
+        """Table rows of the changes, as shown by the console and Markdown reports."""
+        rows = []
+        for entry in self.changes:
+            location = f"{entry['cluster']}/{entry['namespace']}" if entry.get('cluster') else str(entry['namespace'])
+            row = [location, entry['workload'], entry['container'], entry['change']]
+            for resource_type in RESOURCE_TYPES:
+                values = entry[resource_type]
+                if values['old'] == values['new']:
+                    row.append(values['old'] or '-')
+                    continue
+                moved = f"{values['old'] or '-'} → {values['new'] or '-'}"
+                if values['changePercent'] is not None:
+                    moved += f" ({values['changePercent']:+g}%)"
+                row.append(moved)
+            rows.append(tuple(row))
+        return rows
+
+    def generate_report(self, formats: List[str], output_paths: Dict[str, str]) -> None:
+        """Render the changes as a console table, a Markdown table or a JSON/YAML document."""
+        document = {
+            'changes': self.changes,
+            'metadata': {
+                'generatedAt': datetime.now().isoformat(),
+                'thresholdPercent': self.threshold,
+                'comparedContainers': self.compared,
+                'changedContainers': len(self.changes),
+                'generator': 'vpa-goldilocks-reporter'
+            }
+        }
+        header = ('Namespace', 'Workload', 'Container', 'Change', 'CPU Target', 'Memory Target')
+        summary = (f"{len(self.changes)} of {self.compared} containers changed by more than "
+                   f"{self.threshold:g}% since the previous report")
+        console = Console()
+
+        for report_format in formats:
+            if report_format == 'json':
+                with Path(output_paths['json']).open('w') as f:
+                    json.dump(document, f, indent=2)
+            elif report_format == 'yaml':
+                with Path(output_paths['yaml']).open('w') as f:
+                    yaml.dump(document, f, Dumper=YAMLDumper, indent=2, default_flow_style=False)
+            elif report_format == 'markdown':
+                with Path(output_paths['markdown']).open('w') as f:
+                    f.write(f"# VPA Recommendation Changes\n\n{summary}.\n")
+                    if self.changes:
+                        f.write(f"\n| {' | '.join(header)} |\n|{'|'.join('---' for _ in header)}|\n")
+                        for row in self.rows():
+                            f.write(f"| {' | '.join(row)} |\n")
+            elif report_format == 'console':
+                if self.changes:
+                    table = Table(title="VPA Recommendation Changes")
+                    for column in header:
+                        table.add_column(column, justify="right" if column.endswith('Target') else "left")
+                    for row in self.rows():
+                        table.add_row(*row)
+                    console.print(table)
+                console.print(f"[yellow]{summary}.[/yellow]")
+                continue
+            else:
+                raise ValueError(f"Unsupported diff report format: {report_format}")
+            console.print(f"[green]Diff report generated: {output_paths[report_format]}[/green]")
+
+
+class VPARecommendationReporter:
+    """Main class for generating VPA resource recommendation reports."""
+
+    VPA_GROUP = "autoscaling.k8s.io"
+    VPA_VERSION = "v1"
+    VPA_PLURAL = "verticalpodautoscalers"
+
+    # Number of objects requested per page from list endpoints
+    LIST_PAGE_SIZE = 500
+
+    # Seconds the watch validating a cached snapshot waits for changes
+    SNAPSHOT_CHECK_TIMEOUT = 1
+
+    # Workload kinds whose current resources are resolved from the prefetched index
+    WORKLOAD_KINDS = ('Deployment', 'StatefulSet', 'DaemonSet')
+
+    def __init__(self, kubeconfig_path: Optional[str] = None, insecure: bool = False, concurrency: int = 1,
+                 cache_ttl: Optional[int] = SnapshotCache.DEFAULT_TTL, snapshot_path: Optional[str] = None,
+                 profile: bool = False, namespace_filter: Optional[NamespaceFilter] = None,
+                 top_n: int = SavingsAnalysis.DEFAULT_TOP, context: Optional[str] = None,
+                 timings: Optional[Timings] = None, html_report: Optional[Dict] = None,
+                 resolve_pods: bool = False):
+        """Initialize the reporter with Kubernetes configuration.
+
+        Pass cache_ttl=None to disable the on-disk snapshot cache. When snapshot_path is given
+        the reporter works offline from saved dumps and never connects to a cluster.
+        namespace_filter limits cluster-wide reports to the namespaces it matches. top_n is the
+        number of opportunities ranked by the savings analysis. context selects a kubeconfig
+        context instead of the current one and is recorded as the cluster of every VPA; the
+        reporter has its own API client, so reporters for several contexts can run at once
+        and share one timings instance. html_report holds the html_report settings of the
+        configuration file, such as custom_css. resolve_pods resolves the current resources of
+        VPA targets from their pods, see PodResolver.
+        """
+        self.console = Console()
+        self.cluster = context
+        self.concurrency = max(1, concurrency)
+        self.namespace_filter = namespace_filter or NamespaceFilter()
+        self.top_n = top_n
+        self.html_report = html_report or {}
+        self.cache: Optional[SnapshotCache] = None
+        self.k8s_client = None
+        self.custom_objects_api = None
+
+        # (namespace, kind, name) -> replicas and container resources, filled by _prefetch_workloads
+        self.workload_index: Dict[Tuple[str, str, str], Dict] = {}
+        # Kinds only listable per namespace, and the (kind, namespace) pairs listed so far
+        self.namespace_scoped_kinds: Set[str] = set()
+        self.loaded_namespaces: Set[Tuple[str, str]] = set()
+        # Number of Kubernetes API requests issued by this reporter
+        self.api_calls = 0
+        self._api_calls_lock = threading.Lock()
+
+        # Time spent formatting values for display, only measured when profiling
+        self.profile = profile
+        self.format_seconds = 0.0
+        # Phase wall times and API request statistics, always recorded
+        self.timings = timings or Timings()
+
+        # Raw VPAs and already processed report entries loaded in offline mode
+        self.offline = snapshot_path is not None
+        self.snapshot_vpa_items: List[Dict] = []
+        self.snapshot_pod_metrics: List[Dict] = []
+        # Reduced pods, their intermediate owners and LimitRanges loaded in offline mode, for PodResolver
+        self.snapshot_pod_items: Dict[str, List[Dict]] = {kind: [] for kind in PodResolver.KINDS}
+        # Computes recommendations from usage samples instead of VPA status when set
+        self.usage: Optional[UsageRecommender] = None
+        self.snapshot_report_vpas: List[VPARecord] = []
+        # Resolves current resources from the pods of each target when set
+        self.pod_resolver: Optional[PodResolver] = PodResolver(self) if resolve_pods else None
+
+        if self.offline:
+            with self.timings.phase('snapshot loading'):
+                self._load_snapshot(Path(snapshot_path))
+            return
+
+        # Load Kubernetes configuration into a configuration of this reporter's own, never the
+        # client's global default, so reporters for different contexts do not interfere
+        try:
+            configuration = client.Configuration()
+            if kubeconfig_path or context:
+                config.load_kube_config(config_file=kubeconfig_path, context=context,
+                                        client_configuration=configuration)
+            else:
+                try:
+                    config.load_incluster_config(client_configuration=configuration)
+                except config.ConfigException:
+                    config.load_kube_config(client_configuration=configuration)
+
+            # Configure SSL verification if needed
+            if insecure:
+                # Disable SSL verification for self-signed certificates
+                configuration.verify_ssl = False
+                configuration.ssl_ca_cert = None
+
+            # Keep one pooled connection per worker so concurrent requests are not serialized
+            configuration.connection_pool_maxsize = max(configuration.connection_pool_maxsize, self.concurrency)
+
+            if cache_ttl is not None:
+                self.cache = SnapshotCache(configuration.host, cache_ttl)
+
+            self.k8s_client = client.ApiClient(configuration)
+            self.custom_objects_api = client.CustomObjectsApi(self.k8s_client)
+            self.core_v1 = client.CoreV1Api(self.k8s_client)
+            self.apps_v1 = client.AppsV1Api(self.k8s_client)
+            self.batch_v1 = client.BatchV1Api(self.k8s_client)
+
+            logger.info(f"Successfully connected to Kubernetes cluster{f' {context}' if context else ''}")
+        except Exception as e:
+            logger.error(f"Failed to connect to Kubernetes{f' cluster {context}' if context else ''}: {e}")
+            raise
+
+    def _load_snapshot(self, snapshot_path: Path) -> None:
+        """Load VPAs and workloads from saved JSON dumps instead of a live cluster.
+
+        snapshot_path is a directory of *.json and *.ndjson files or a single file. Each JSON
+        file is either the output of `kubectl get vpa,deploy,sts,ds -A -o json` (a List, or a
+        single object), a JSON report previously written by this script or, for usage based
+        recommendations, a PodMetricsList from `kubectl get --raw /apis/metrics.k8s.io/v1beta1/pods`.
+        With pod resolution the dumps may also hold pods,rs,jobs,rc,limits.
+        NDJSON files are reports written by this script with the ndjson format.
+        """
+        if snapshot_path.is_dir():
+            paths = sorted([*snapshot_path.glob('*.json'), *snapshot_path.glob('*.ndjson')])
+        else:
+            paths = [snapshot_path]
+
+        if not paths:
+            raise FileNotFoundError(f"No *.json or *.ndjson snapshot files found in {snapshot_path}")
+
+        for path in paths:
+            if path.suffix == '.ndjson':
+                with path.open() as f:
+                    entries = (json.loads(line) for line in f if line.strip())
+                    # The final savings line is derived from the VPAs and rebuilt when rendering
+                    self.snapshot_report_vpas.extend(VPARecord.from_dict(entry) for entry in entries if 'savings' not in entry)
+                continue
+
+            with path.open() as f:
+                document = json.load(f)
+
+            if document.get('metadata', {}).get('generator') == 'vpa-goldilocks-reporter':
+                self.snapshot_report_vpas.extend(VPARecord.from_dict(entry) for entry in document.get('vpas', []))
+                continue
+
+            # The items of a raw metrics API list carry no kind of their own
+            item_kind = 'PodMetrics' if document.get('kind') == 'PodMetricsList' else None
+            for item in document.get('items', [document]):
+                kind = item.get('kind', item_kind)
+                if kind == 'PodMetrics':
+                    self.snapshot_pod_metrics.append(item)
+                elif kind == 'VerticalPodAutoscaler':
+                    self.snapshot_vpa_items.append(item)
+                elif kind in self.WORKLOAD_KINDS:
+                    workload = self._extract_workload(item)
+                    self.workload_index[(workload['namespace'], kind, workload['name'])] = self._index_entry(workload)
+                elif kind in PodResolver.EXTRACTORS:
+                    self.snapshot_pod_items[kind].append(getattr(PodResolver, PodResolver.EXTRACTORS[kind])(item))
+
+        logger.info(
+            f"Loaded snapshot from {snapshot_path}: {len(self.snapshot_vpa_items)} VPAs, "
+            f"{len(self.workload_index)} workloads, {len(self.snapshot_report_vpas)} reported VPAs"
+            + (f", {len(self.snapshot_pod_metrics)} pod metrics" if self.snapshot_pod_metrics else '')
+            + (f", {len(self.snapshot_pod_items['Pod'])} pods" if self.snapshot_pod_items['Pod'] else '')
+        )
+
+    @staticmethod
+    def format_resource_value(value: Any, resource_type: str) -> str:
+        """Format resource values to standard Kubernetes formats."""
+        return format_quantity_string(value, resource_type)
+
+    @staticmethod
+    def _round_memory_mb(mem_mb: float) -> str:
+        """Round memory in MB to standard Kubernetes values."""
+        return round_memory_mb(mem_mb)
+
+    def _display_value(self, row: ContainerRow, group: str, resource_type: str) -> str:
+        """Format one value of a container recommendation or current resources for display.
+
+        Uses the numeric value parsed during processing, falling back to the raw quantity for
+        quantities that could not be parsed.
+        """
+        if self.profile:
+            started = time.perf_counter()
+
+        value = row.value(group, resource_type)
+        if value is not None:
+            formatted = format_quantity(value, resource_type)
+        else:
+            quantity = row.quantity(group, resource_type)
+            formatted = format_quantity_string(quantity if quantity is not None else 'N/A', resource_type)
+
+        if self.profile:
+            self.format_seconds += time.perf_counter() - started
+        return formatted
+
+    def recommended_requests(self, vpa: VPARecord) -> Dict[str, Dict[str, str]]:
+        """Return the rounded target requests of every container, keyed by container name.
+
+        Once the target workload is known, containers it does not run are left out: patching
+        them would add a container to the pod template instead of resizing one.
+        """
+        workload_known = any(row.current for row in vpa.containers)
+        requests = {}
+        for row in vpa.recommended:
+            if workload_known and not row.current:
+                continue
+            container_requests = {
+                resource_type: self._display_value(row, 'target', resource_type)
+                for resource_type in RESOURCE_TYPES
+                if row.quantity('target', resource_type) is not None
+            }
+            if container_requests:
+                requests[row.name] = container_requests
+        return requests
+
+    def print_profile(self, render_seconds: float) -> None:
+        """Print phase timings, API request statistics, cache statistics and time spent formatting."""
+        self.timings.print(self.console)
+
+        table = Table(title="Formatting Profile")
+        table.add_column("Cache", style="cyan")
+        table.add_column("Hits", justify="right")
+        table.add_column("Misses", justify="right")
+        table.add_column("Hit Rate", justify="right", style="green")
+        table.add_column("Size", justify="right")
+
+        for name, cached_func in (('parse_quantity', parse_quantity_cached),
+                                  ('format_quantity', format_quantity),
+                                  ('format_quantity_string', format_quantity_string)):
+            info = cached_func.cache_info()
+            lookups = info.hits + info.misses
+            hit_rate = f"{info.hits / lookups:.1%}" if lookups else "-"
+            table.add_row(name, str(info.hits), str(info.misses), hit_rate, f"{info.currsize}/{info.maxsize}")
+
+        self.console.print(table)
+        share = f" ({self.format_seconds / render_seconds:.1%})" if render_seconds else ""
+        self.console.print(
+            f"Formatting: {self.format_seconds:.4f}s of {render_seconds:.4f}s fetching and rendering{share}"
+        )
+
+    def get_vpa_recommendations(self, namespace: Optional[str] = None) -> List[VPARecord]:
+        """Fetch VPA recommendations from the cluster."""
+        try:
+            return list(track(self.iter_vpa_recommendations(namespace),
+                              description="Processing VPA recommendations..."))
+        except Exception as e:
+            logger.error(f"Error fetching VPA recommendations: {e}")
+            raise
+
+    def iter_vpa_recommendations(self, namespace: Optional[str] = None) -> Iterator[VPARecord]:
+        """Yield processed VPA recommendations as they are fetched, one list page at a time."""
+        if self.offline:
+            if self.namespace_filter.label_selector:
+                logger.warning("Namespace label selectors need a live cluster, ignoring it for snapshots")
+            vpa_items = iter(self.snapshot_vpa_items)
+        else:
+            if not namespace:
+                with self.timings.phase('namespace listing'):
+                    self._resolve_namespace_selector()
+
+            # Workloads are indexed first so every VPA can be processed as soon as it arrives
+            with self.timings.phase('workload reads'):
+                self._prefetch_workloads(namespace)
+
+            if self.usage:
+                vpa_items = iter(())
+            elif namespace:
+                vpa_items = self._list_namespaced_vpas(namespace)
+            else:
+                try:
+                    vpa_items = self._list_cluster_vpas()
+                except ApiException as e:
+                    if e.status not in (401, 403):
+                        raise
+                    # RBAC does not allow cluster-wide reads, fall back to one call per namespace
+                    logger.info("Cluster-wide VPA listing forbidden, falling back to per-namespace listing")
+                    vpa_items = self._list_vpas_per_namespace()
+
+        if self.pod_resolver:
+            with self.timings.phase('pod reads'):
+                self.pod_resolver.index(namespace)
+
+        if self.usage:
+            with self.timings.phase('usage sampling'):
+                vpa_items = self.usage.collect(namespace)
+
+        count = 0
+        for vpa in self.timings.timed(vpa_items, 'vpa listing'):
+            vpa_namespace = vpa.get('metadata', {}).get('namespace')
+            if self._covers_namespace(vpa_namespace, namespace):
+                count += 1
+                with self.timings.phase('processing'):
+                    record = self._process_vpa(vpa, vpa_namespace)
+                yield record
+
+        # Entries from a previous report are already processed, and hold VPA recommendations
+        for vpa in [] if self.usage else self.snapshot_report_vpas:
+            if self._covers_namespace(vpa.namespace, namespace):
+                count += 1
+                yield vpa
+
+        logger.info(f"Fetched {count} VPAs{f' from {self.cluster}' if self.cluster else ''} "
+                    f"using {self.api_calls} Kubernetes API calls")
+
+    def _covers_namespace(self, vpa_namespace: str, namespace: Optional[str] = None) -> bool:
+        """Return whether objects in vpa_namespace belong in a report for namespace (None for all).
+
+        An explicitly requested namespace is always reported; the namespace filter only
+        narrows cluster-wide reports.
+        """
+        if namespace:
+            return vpa_namespace == namespace
+        return self.namespace_filter.matches(vpa_namespace)
+
+    def _resolve_namespace_selector(self) -> None:
+        """List the namespaces matching the filter's label selector, once."""
+        namespace_filter = self.namespace_filter
+        if not namespace_filter.label_selector or namespace_filter.selected is not None:
+            return
+
+        namespace_filter.selected = {
+            ns['metadata']['name']
+            for ns_items, _ in self._iter_pages(self.core_v1.list_namespace,
+                                                label_selector=namespace_filter.label_selector)
+            for ns in ns_items
+        }
+        logger.info(
+            f"{len(namespace_filter.selected)} namespaces match label selector {namespace_filter.label_selector}"
+        )
+
+    def _cluster_list_kwargs(self) -> Dict:
+        """Extra arguments for cluster-wide list and watch calls, excluding filtered namespaces server side."""
+        field_selector = self.namespace_filter.field_selector()
+        return {'field_selector': field_selector} if field_selector else {}
+
+    def _call_api(self, api_func, *args, **kwargs) -> Any:
+        """Issue a single Kubernetes API request, keeping count of requests made and their latency."""
+        self._count_api_call()
+        started = time.perf_counter()
+        try:
+            return api_func(*args, **kwargs)
+        finally:
+            self.timings.record_call(Timings.call_label(api_func, args, kwargs), time.perf_counter() - started)
+
+    def _count_api_call(self) -> None:
+        """Record one Kubernetes API request."""
+        with self._api_calls_lock:
+            self.api_calls += 1
+
+    def _map_concurrent(self, func: Callable, items: Iterable, description: Optional[str] = None) -> List:
+        """Apply func to every item over the bounded worker pool, returning results in input order."""
+        items = list(items)
+
+        if self.concurrency == 1 or len(items) <= 1:
+            iterator = map(func, items)
+            if description:
+                iterator = track(iterator, total=len(items), description=description)
+            return list(iterator)
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(items))) as executor:
+            iterator = executor.map(func, items)
+            if description:
+                iterator = track(iterator, total=len(items), description=description)
+            return list(iterator)
+
+    def _call_api_raw(self, api_func, *args, **kwargs) -> Dict:
+        """Issue a Kubernetes API request and parse the JSON response body directly.
+
+        Skips the client's deserialization into typed models, which costs far more CPU and
+        memory than the few fields the reporter reads from each object.
+        """
+        self._count_api_call()
+        started = time.perf_counter()
+        received = 0
+        try:
+            # The latency includes reading the body, which is most of the time for large lists
+            data = api_func(*args, _preload_content=False, **kwargs).data
+            received = len(data)
+        finally:
+            self.timings.record_call(Timings.call_label(api_func, args, kwargs),
+                                     time.perf_counter() - started, received)
+        return json_loads(data)
+
+    def _iter_pages(self, list_func, *args, **kwargs) -> Iterator[Tuple[List, Optional[str]]]:
+        """Call a Kubernetes list endpoint page by page, following continue tokens.
+
+        Yields the raw JSON items of each page and the resourceVersion of the list.
+        """
+        continue_token = None
+        resource_version = None
+
+        while True:
+            if continue_token:
+                kwargs['_continue'] = continue_token
+            response = self._call_api_raw(list_func, *args, limit=self.LIST_PAGE_SIZE, **kwargs)
+
+            list_metadata = response.get('metadata') or {}
+            continue_token = list_metadata.get('continue')
+            resource_version = resource_version or list_metadata.get('resourceVersion')
+
+            yield response.get('items') or [], resource_version
+
+            if not continue_token:
+                return
+
+    def _list_paginated(self, list_func, *args, **kwargs) -> Tuple[List, Optional[str]]:
+        """List every page of a Kubernetes list endpoint, returning the items and the list resourceVersion."""
+        items = []
+        resource_version = None
+        for page_items, resource_version in self._iter_pages(list_func, *args, **kwargs):
+            items.extend(page_items)
+        return items, resource_version
+
+    def _list_cached(self, cache_key: str, list_func, *args, extract: Optional[Callable] = None,
+                     **kwargs) -> Iterator:
+        """Stream listed objects, reusing the on-disk snapshot when nothing changed since it was taken.
+
+        extract, if given, converts each listed object to the form stored in the cache. The first
+        page is requested right away so API errors surface at call time; later pages are fetched
+        while the returned iterator is consumed.
+        """
+        if kwargs.get('field_selector'):
+            # Differently filtered lists of the same scope are cached separately
+            cache_key += '-' + hashlib.sha256(kwargs['field_selector'].encode()).hexdigest()[:12]
+
+        if self.cache:
+            snapshot = self.cache.load(cache_key)
+            if snapshot and self._list_is_unchanged(list_func, snapshot['resourceVersion'], *args, **kwargs):
+                logger.debug(f"Reusing cached {cache_key} snapshot")
+                return self.cache.iter_items(cache_key)
+
+        pages = self._iter_pages(list_func, *args, **kwargs)
+        first_items, resource_version = next(pages)
+
+        def items() -> Iterator:
+            for page_items, _ in itertools.chain([(first_items, resource_version)], pages):
+                for item in page_items:
+                    yield extract(item) if extract else item
+
+        if self.cache and resource_version:
+            return self.cache.save(cache_key, resource_version, items())
+        return items()
+
+    def _list_is_unchanged(self, list_func, resource_version: str, *args, **kwargs) -> bool:
+        """Check with a short watch from resource_version whether anything in the list changed.
+
+        The server replays every change to the listed objects made after resource_version, so
+        any event other than a bookmark means the snapshot is stale. Changes to other resources
+        do not show up in the watch. A 410 Gone, because the version is older than the server's
+        watch cache, or any other error also means the snapshot is refetched.
+        """
+        try:
+            for event in self._iter_watch_events(
+                list_func, *args,
+                resource_version=resource_version,
+                allow_watch_bookmarks=True,
+                timeout_seconds=self.SNAPSHOT_CHECK_TIMEOUT,
+                **kwargs
+            ):
+                if event.get('type') != 'BOOKMARK':
+                    return False
+        except ApiException as e:
+            logger.debug(f"Could not validate cached snapshot: {e}")
+            return False
+        return True
+
+    def _iter_watch_events(self, list_func, *args, **kwargs) -> Iterator[Dict]:
+        """Issue a watch request and yield its events as plain dicts until the server ends it.
+
+        An ERROR event is raised as an ApiException carrying its status, e.g. 410 Gone. The
+        request is recorded once the stream ends, with its whole duration and the bytes received.
+        """
+        self._count_api_call()
+        started = time.perf_counter()
+        received = 0
+        response = None
+        try:
+            response = list_func(*args, watch=True, _preload_content=False, **kwargs)
+            for line in response:
+                received += len(line)
+                if not line.strip():
+                    continue
+                event = json_loads(line)
+                if event.get('type') == 'ERROR':
+                    status = event.get('object') or {}
+                    raise ApiException(status=status.get('code'),
+                                       reason=f"{status.get('reason')}: {status.get('message')}")
+                yield event
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+            self.timings.record_call(Timings.call_label(list_func, args, {**kwargs, 'watch': True}),
+                                     time.perf_counter() - started, received)
+
+    def _list_cluster_vpas(self) -> Iterator[Dict]:
+        """List VPAs across all namespaces with a single paginated cluster-scoped call."""
+        return self._list_cached(
+            f"{self.VPA_PLURAL}-all",
+            self.custom_objects_api.list_cluster_custom_object,
+            group=self.VPA_GROUP,
+            version=self.VPA_VERSION,
+            plural=self.VPA_PLURAL,
+            extract=self._extract_vpa,
+            **self._cluster_list_kwargs()
+        )
+
+    def _list_namespaced_vpas(self, namespace: str) -> Iterator[Dict]:
+        """List VPAs in a single namespace."""
+        try:
+            return self._list_cached(
+                f"{self.VPA_PLURAL}-{namespace}",
+                self.custom_objects_api.list_namespaced_custom_object,
+                group=self.VPA_GROUP,
+                version=self.VPA_VERSION,
+                namespace=namespace,
+                plural=self.VPA_PLURAL,
+                extract=self._extract_vpa
+            )
+        except ApiException as e:
+            if e.status != 404:  # Ignore namespaces without VPAs
+                logger.warning(f"Could not fetch VPAs from namespace {namespace}: {e}")
+            return iter(())
+
+    def _list_vpas_per_namespace(self) -> Iterator[Dict]:
+        """List VPAs one namespace at a time, for users without cluster-wide read access.
+
+        Namespaces are filtered before any VPA is requested, so excluded namespaces cost no calls.
+        """
+        selector_kwargs = {}
+        if self.namespace_filter.label_selector:
+            selector_kwargs['label_selector'] = self.namespace_filter.label_selector
+        with self.timings.phase('namespace listing'):
+            namespaces = [
+                ns['metadata']['name']
+                for ns_items, _ in self._iter_pages(self.core_v1.list_namespace, **selector_kwargs)
+                for ns in ns_items
+                if self.namespace_filter.matches(ns['metadata']['name'])
+            ]
+
+        def list_in_namespace(ns: str) -> List[Dict]:
+            return list(self._list_namespaced_vpas(ns))
+
+        for ns_items in self._map_concurrent(list_in_namespace, namespaces,
+                                             description="Fetching VPA recommendations..."):
+            yield from ns_items
+
+    @staticmethod
+    def _extract_vpa(vpa: Dict) -> Dict:
+        """Reduce a raw VPA object to the fields _process_vpa reads."""
+        metadata = vpa.get('metadata', {})
+        spec = vpa.get('spec', {})
+        status = vpa.get('status', {})
+
+        slim_status = {
+            key: status[key]
+            for key in ('recommendation', 'conditions', 'lastRecommendation')
+            if key in status
+        }
+        return {
+            'kind': vpa.get('kind', 'VerticalPodAutoscaler'),
+            'metadata': {
+                'name': metadata.get('name'),
+                'namespace': metadata.get('namespace'),
+                'resourceVersion': metadata.get('resourceVersion')
+            },
+            'spec': {
+                'targetRef': spec.get('targetRef', {}),
+                'updatePolicy': spec.get('updatePolicy', {})
+            },
+            'status': slim_status
+        }
+
+    def _process_vpa(self, vpa: Dict, namespace: str) -> VPARecord:
+        """Process a single VPA object into a record of its recommendations and current resources."""
+        metadata = vpa.get('metadata', {})
+        spec = vpa.get('spec', {})
+        status = vpa.get('status', {})
+
+        # Get target reference information
+        target_ref = spec.get('targetRef', {})
+
+        # Extract recommendations
+        recommendations = {}
+        for container_rec in (status.get('recommendation') or {}).get('containerRecommendations', []):
+            recommendations[container_rec.get('containerName')] = container_rec
+
+        # Get current resource configuration if available
+        workload = self._get_target_workload(namespace, target_ref.get('kind'), target_ref.get('name'))
+
+        # Quantities are parsed once here (CPU in millicores, memory in bytes); renderers only format
+        return VPARecord.from_containers(
+            recommendations,
+            workload['containers'] if workload else {},
+            name=metadata.get('name'),
+            namespace=namespace,
+            kind=target_ref.get('kind'),
+            workload=target_ref.get('name'),
+            api_version=target_ref.get('apiVersion'),
+            update_mode=spec.get('updatePolicy', {}).get('updateMode', 'Off'),
+            replicas=workload.get('replicas') if workload else None,
+            last_updated=status.get('lastRecommendation'),
+            conditions=status.get('conditions', []),
+            cluster=self.cluster
+        )
+
+    def _prefetch_workloads(self, namespace: Optional[str] = None) -> None:
+        """List every workload kind once and index their container resources.
+
+        Kinds that cannot be listed cluster-wide are listed per namespace instead, lazily, the
+        first time a VPA in that namespace targets them.
+        """
+        namespace_scoped_kinds = set()
+
+        def fetch_kind(kind: str) -> List:
+            cluster_list_func, namespaced_list_func = self._workload_list_functions(kind)
+
+            if namespace:
+                return list(self._list_namespaced_workloads(namespaced_list_func, kind, namespace))
+
+            try:
+                return list(self._list_cached(f"{kind.lower()}-all", cluster_list_func,
+                                              extract=self._extract_workload, **self._cluster_list_kwargs()))
+            except ApiException as e:
+                if e.status not in (401, 403):
+                    raise
+                # Only namespaces that actually contain VPAs need to be listed
+                logger.info(f"Cluster-wide {kind} listing forbidden, listing it per namespace containing VPAs")
+                namespace_scoped_kinds.add(kind)
+                return []
+
+        # Build a fresh index so workloads deleted since a previous run do not linger
+        workload_index = {}
+        kinds = list(self.WORKLOAD_KINDS)
+        for kind, workloads in zip(kinds, self._map_concurrent(fetch_kind, kinds)):
+            for workload in workloads:
+                if not self._covers_namespace(workload['namespace'], namespace):
+                    continue
+                key = (workload['namespace'], kind, workload['name'])
+                workload_index[key] = self._index_entry(workload)
+
+        self.workload_index = workload_index
+        self.namespace_scoped_kinds = namespace_scoped_kinds
+        self.loaded_namespaces = set()
+
+    def _load_namespaced_workloads(self, kind: str, namespace: str) -> None:
+        """Index the workloads of one kind in one namespace, unless that was done already."""
+        if (kind, namespace) in self.loaded_namespaces:
+            return
+        self.loaded_namespaces.add((kind, namespace))
+
+        _, namespaced_list_func = self._workload_list_functions(kind)
+        with self.timings.phase('workload reads'):
+            for workload in self._list_namespaced_workloads(namespaced_list_func, kind, namespace):
+                self.workload_index[(namespace, kind, workload['name'])] = self._index_entry(workload)
+
+    def _workload_list_functions(self, kind: str) -> Tuple[Any, Any]:
+        """Return the (all namespaces, namespaced) list functions for a workload kind."""
+        return {
+            'Deployment': (self.apps_v1.list_deployment_for_all_namespaces,
+                           self.apps_v1.list_namespaced_deployment),
+            'StatefulSet': (self.apps_v1.list_stateful_set_for_all_namespaces,
+                            self.apps_v1.list_namespaced_stateful_set),
+            'DaemonSet': (self.apps_v1.list_daemon_set_for_all_namespaces,
+                          self.apps_v1.list_namespaced_daemon_set),
+        }[kind]
+
+    def _list_namespaced_workloads(self, list_func, kind: str, namespace: str) -> Iterator[Dict]:
+        """List workloads of one kind in a single namespace."""
+        try:
+            return self._list_cached(f"{kind.lower()}-{namespace}", list_func, namespace,
+                                     extract=self._extract_workload)
+        except ApiException as e:
+            logger.warning(f"Could not list {kind} resources in namespace {namespace}: {e}")
+            return iter(())
+
+    @staticmethod
+    def _extract_workload(workload: Dict) -> Dict:
+        """Reduce a raw JSON workload to its identity, replicas and per-container requests and limits."""
+        metadata = workload.get('metadata', {})
+        spec = workload.get('spec', {})
+        pod_spec = spec.get('template', {}).get('spec', {})
+
+        # DaemonSets have no replica count, they run one pod per scheduled node
+        if 'replicas' in spec:
+            replicas = spec['replicas']
+        else:
+            replicas = workload.get('status', {}).get('desiredNumberScheduled')
+
+        extracted = {
+            'namespace': metadata.get('namespace'),
+            'name': metadata.get('name'),
+            'replicas': replicas,
+            'containers': VPARecommendationReporter._container_resources(pod_spec.get('containers'))
+        }
+        if pod_spec.get('initContainers'):
+            extracted['initContainers'] = VPARecommendationReporter._container_resources(pod_spec['initContainers'])
+        return extracted
+
+    @staticmethod
+    def _container_resources(containers: Optional[List[Dict]]) -> Dict[str, Dict]:
+        """Map container names of a pod spec to their requests and limits."""
+        current_resources = {}
+        for container in containers or []:
+            resources = container.get('resources') or {}
+            current_resources[container.get('name')] = {
+                'requests': resources.get('requests') or {},
+                'limits': resources.get('limits') or {}
+            }
+        return current_resources
+
+    @staticmethod
+    def _index_entry(workload: Dict) -> Dict:
+        """The part of an extracted workload kept in the workload index."""
+        entry = {'replicas': workload.get('replicas'), 'containers': workload['containers']}
+        if workload.get('initContainers'):
+            entry['initContainers'] = workload['initContainers']
+        return entry
+
+    def _get_target_workload(self, namespace: str, kind: str, name: str) -> Optional[Dict]:
+        """Get the replicas and current container resources of the target workload.
+
+        With pod resolution targets of any kind are resolved from their pods, otherwise only
+        the indexed workload kinds are known.
+        """
+        if self.pod_resolver:
+            workload = self.pod_resolver.resolve(namespace, kind, name)
+        elif kind not in self.WORKLOAD_KINDS:
+            return None
+        else:
+            if kind in self.namespace_scoped_kinds:
+                self._load_namespaced_workloads(kind, namespace)
+            workload = self.workload_index.get((namespace, kind, name))
+
+        if workload is None:
+            logger.warning(f"Could not fetch current resources for {kind}/{name} in {namespace}: not found")
+
+        return workload
+
+    def generate_report(self, vpas: Iterable[VPARecord], report_format: str, output_path: Optional[str] = None) -> None:
+        """Render VPAs in the given format."""
+        self.generate_reports(vpas, [report_format], {report_format: output_path})
+
+    def generate_reports(self, vpas: Iterable[VPARecord], formats: List[str], output_paths: Dict[str, str]) -> None:
+        """Render VPAs in several formats in a single pass.
+
+        File formats are written incrementally as VPAs arrive, so vpas may be a generator and
+        the report is never held in memory as a whole. Only the console report collects entries.
+        Every format ends with the savings analysis of all VPAs.
+        """
+        savings = SavingsAnalysis(self.top_n)
+        writers = [self._report_writer(report_format, output_paths[report_format], savings)
+                   for report_format in formats if report_format != 'console']
+        console_vpas = [] if 'console' in formats else None
+        phase = self.timings.phase
+
+        for writer in writers:
+            writer.open()
+        try:
+            for vpa in vpas:
+                with phase('savings'):
+                    savings.add(vpa)
+                with phase('rendering'):
+                    for writer in writers:
+                        writer.write(vpa)
+                if console_vpas is not None:
+                    console_vpas.append(vpa)
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+
+        with phase('rendering'):
+            for writer in writers:
+                writer.close()
+
+            if console_vpas is not None:
+                self.generate_console_report(console_vpas)
+                if console_vpas:
+                    self.print_savings(savings)
+
+    def _report_writer(self, report_format: str, output_path: str, savings: SavingsAnalysis) -> 'ReportWriter':
+        """Create the incremental writer for a file format."""
+        writer_classes = {
+            'json': JSONReportWriter,
+            'ndjson': NDJSONReportWriter,
+            'yaml': YAMLReportWriter,
+            'markdown': MarkdownReportWriter,
+            'html': HTMLReportWriter,
+            'kubectl': KubectlPatchWriter
+        }
+        if report_format not in writer_classes:
+            raise ValueError(f"Unsupported report format: {report_format}")
+        return writer_classes[report_format](self, output_path, savings)
+
+    def generate_console_report(self, vpas: Iterable[VPARecord]) -> None:
+        """Generate a console report using Rich tables."""
+        vpas = list(vpas)
+        if not vpas:
+            self.console.print("[yellow]No VPA recommendations found.[/yellow]")
+            return
+
+        # Summary table, with a cluster column in multi-cluster reports
+        clusters = any(vpa.cluster for vpa in vpas)
+        summary_table = Table(title="VPA Recommendations Summary")
+        if clusters:
+            summary_table.add_column("Cluster", style="cyan")
+        summary_table.add_column("Namespace", style="cyan")
+        summary_table.add_column("VPA Name", style="green")
+        summary_table.add_column("Target", style="blue")
+        summary_table.add_column("Update Mode", style="magenta")
+        summary_table.add_column("Containers", justify="center")
+
+        for vpa in vpas:
+            summary_table.add_row(
+                *((vpa.cluster or '',) if clusters else ()),
+                vpa.namespace,
+                vpa.name,
+                f"{vpa.kind}/{vpa.workload}",
+                vpa.update_mode,
+                str(len(vpa.recommended))
+            )
+
+        self.console.print(summary_table)
+
+        # Detailed recommendations for each VPA
+        for vpa in vpas:
+            if not vpa.has_recommendations:
+                continue
+
+            self.console.print(f"\n[bold blue]VPA: {vpa.location}/{vpa.name}[/bold blue]")
+            self.console.print(f"Target: {vpa.kind}/{vpa.workload}")
+
+            for row in vpa.recommended:
+                detail_table = Table(title=f"Container: {row.name}")
+                detail_table.add_column("Resource Type")
+                detail_table.add_column("Current", style="yellow")
+                detail_table.add_column("Lower Bound", style="red")
+                detail_table.add_column("Target", style="green")
+                detail_table.add_column("Upper Bound", style="blue")
+
+                # CPU recommendations
+                detail_table.add_row(
+                    "CPU",
+                    self._display_value(row, 'requests', 'cpu'),
+                    self._display_value(row, 'lowerBound', 'cpu'),
+                    self._display_value(row, 'target', 'cpu'),
+                    self._display_value(row, 'upperBound', 'cpu')
+                )
+
+                # Memory recommendations
+                detail_table.add_row(
+                    "Memory",
+                    self._display_value(row, 'requests', 'memory'),
+                    self._display_value(row, 'lowerBound', 'memory'),
+                    self._display_value(row, 'target', 'memory'),
+                    self._display_value(row, 'upperBound', 'memory')
+                )
+
+                self.console.print(detail_table)
+
+    def print_savings(self, savings: SavingsAnalysis) -> None:
+        """Print cluster totals, the top over-provisioned containers and namespaces."""
+        summary = savings.summary()
+
+        totals_table = Table(title="Savings Analysis (replica-weighted requests vs. VPA targets)")
+        totals_table.add_column("Resource", style="cyan")
+        totals_table.add_column("Requested", justify="right", style="yellow")
+        totals_table.add_column("Recommended", justify="right", style="green")
+        totals_table.add_column("Over-provisioned", justify="right", style="red")
+        totals_table.add_column("Under-provisioned", justify="right", style="blue")
+        totals_table.add_column("Net Reclaimable", justify="right", style="bold")
+        for row in savings.total_rows():
+            totals_table.add_row(*row)
+        self.console.print(totals_table)
+
+        if summary['containersWithoutRequests']:
+            self.console.print(
+                f"[yellow]{summary['containersWithoutRequests']} containers lack a request or target "
+                f"for CPU or memory and are left out of that resource[/yellow]"
+            )
+
+        for resource, label in (('cpu', 'CPU'), ('memory', 'Memory')):
+            rows = savings.top_rows(resource)
+            if not rows:
+                continue
+            top_table = Table(title=f"Top {len(rows)} Over-provisioned Containers by {label}")
+            top_table.add_column("Workload", style="cyan")
+            top_table.add_column("Container", style="green")
+            top_table.add_column("Replicas", justify="right")
+            top_table.add_column("Request", justify="right", style="yellow")
+            top_table.add_column("Target", justify="right", style="green")
+            top_table.add_column("Reclaimable", justify="right", style="bold")
+            for row in rows:
+                top_table.add_row(*row)
+            self.console.print(top_table)
+
+        groups = [("Namespace", savings.namespace_rows())]
+        if summary.get('clusters'):
+            groups.insert(0, ("Cluster", savings.cluster_rows()))
+        for column, rows in groups:
+            group_table = Table(title=f"Net Reclaimable by {column}")
+            group_table.add_column(column, style="cyan")
+            group_table.add_column("Containers", justify="right")
+            group_table.add_column("CPU", justify="right")
+            group_table.add_column("Memory", justify="right")
+            for row in rows:
+                group_table.add_row(*row)
+            self.console.print(group_table)
+
+    def generate_json_report(self, vpas: Iterable[VPARecord], output_path: str) -> None:
+        """Generate a JSON report."""
+        self.generate_report(vpas, 'json', output_path)
+
+    def generate_ndjson_report(self, vpas: Iterable[VPARecord], output_path: str) -> None:
+        """Generate a newline delimited JSON report, one VPA per line."""
+        self.generate_report(vpas, 'ndjson', output_path)
+
+    def generate_yaml_report(self, vpas: Iterable[VPARecord], output_path: str) -> None:
+        """Generate a YAML report."""
+        self.generate_report(vpas, 'yaml', output_path)
+
+    def generate_markdown_report(self, vpas: Iterable[VPARecord], output_path: str) -> None:
+        """Generate a Markdown report."""
+        self.generate_report(vpas, 'markdown', output_path)
+
+    def generate_html_report(self, vpas: Iterable[VPARecord], output_path: str) -> None:
+        """Generate a self-contained HTML report."""
+        self.generate_report(vpas, 'html', output_path)
+
+    def generate_kubectl_patches(self, vpas: Iterable[VPARecord], output_path: str) -> None:
+        """Generate kubectl patch commands for applying VPA recommendations."""
+        self.generate_report(vpas, 'kubectl', output_path)
+
+
+class ClusterFanOut:
+    """Fetches VPA recommendations from several kubeconfig contexts at once into one stream.
+
+    Every context has its own reporter and API client, listed on a thread of its own, so a
+    run takes about as long as the slowest cluster. Records are tagged with their cluster and
+    yielded in context order. A cluster that fails is logged and left out of the report;
+    failed names those clusters afterwards.
+    """
+
+    def __init__(self, reporters: Dict[str, VPARecommendationReporter], failed: Optional[List[str]] = None):
+        self.reporters = reporters
+        self.failed: List[str] = list(failed or [])
+
+    @classmethod
+    def connect(cls, contexts: List[str], factory: Callable[[str], VPARecommendationReporter]) -> 'ClusterFanOut':
+        """Build the reporter of every context with factory, leaving out contexts that cannot be loaded.
+
+        A broken kubeconfig entry or an unreachable cluster only fails its own context; at least
+        one context has to connect.
+        """
+        reporters = {}
+        failed = []
+        for context in contexts:
+            try:
+                reporters[context] = factory(context)
+            except Exception as e:
+                # The reporter already logged why it could not connect
+                logger.debug(f"Leaving out cluster {context}: {e}")
+                failed.append(context)
+
+        if not reporters:
+            raise RuntimeError(f"Could not connect to any of the clusters {', '.join(contexts)}")
+        return cls(reporters, failed)
+
+    @staticmethod
+    def contexts(kubeconfig_path: Optional[str] = None) -> List[str]:
+        """Names of every context in a kubeconfig file."""
+        contexts, _ = config.list_kube_config_contexts(config_file=kubeconfig_path)
+        return [context['name'] for context in contexts]
+
+    def _fetch(self, cluster: str, namespace: Optional[str], records: queue.Queue) -> None:
+        """Put every record of one cluster on its queue, then None as end marker."""
+        try:
+            for vpa in self.reporters[cluster].iter_vpa_recommendations(namespace):
+                records.put(vpa)
+        except Exception as e:
+            logger.error(f"Failed to fetch VPA recommendations from cluster {cluster}: {e}")
+            self.failed.append(cluster)
+        finally:
+            records.put(None)
+
+    def iter_vpa_recommendations(self, namespace: Optional[str] = None) -> Iterator[VPARecord]:
+        """Yield processed VPA recommendations of every cluster, one cluster after another in context order.
+
+        All clusters are fetched at once; the records of a cluster are buffered until those of
+        the clusters before it were yielded, so reports, diffs and history do not depend on which
+        cluster answers first.
+        """
+        queues: Dict[str, queue.Queue] = {}
+        for cluster in self.reporters:
+            queues[cluster] = queue.Queue()
+            threading.Thread(
+                target=self._fetch,
+                args=(cluster, namespace, queues[cluster]),
+                name=f"fetch-{cluster}",
+                daemon=True
+            ).start()
+
+        for cluster in self.reporters:
+            records = queues[cluster]
+            for record in iter(records.get, None):
+                yield record
+
+
+class ReportWriter:
+    """Writes a report file incrementally, one VPA at a time."""
+
+    description = "Report"
+
+    def __init__(self, reporter: VPARecommendationReporter, output_path: str, savings: SavingsAnalysis):
+        self.reporter = reporter
+        self.output_path = output_path
+        # Fed by generate_reports, complete by the time end() runs
+        self.savings = savings
+        self.file = None
+        self.generated_at = datetime.now()
+        self.total = 0
+        self.with_recommendations = 0
+
+    def open(self) -> None:
+        self.file = Path(self.output_path).open('w')
+        self.begin()
+
+    def write(self, vpa: VPARecord) -> None:
+        self.total += 1
+        if vpa.has_recommendations:
+            self.with_recommendations += 1
+        self.write_vpa(vpa)
+
+    def close(self) -> None:
+        self.end()
+        self.file.close()
+        self.reporter.console.print(f"[green]{self.description} generated: {self.output_path}[/green]")
+
+    def abort(self) -> None:
+        """Close and remove a partially written report."""
+        if self.file:
+            self.file.close()
+            Path(self.output_path).unlink(missing_ok=True)
+
+    def metadata(self) -> Dict:
+        return {
+            'generatedAt': self.generated_at.isoformat(),
+            'totalVPAs': self.total,
+            'generator': 'vpa-goldilocks-reporter'
+        }
+
+    def begin(self) -> None:
+        """Write whatever precedes the first VPA."""
+
+    def write_vpa(self, vpa: VPARecord) -> None:
+        raise NotImplementedError
+
+    def end(self) -> None:
+        """Write whatever follows the last VPA."""
+
+
+class JSONReportWriter(ReportWriter):
+    """Streams a JSON report; metadata follows the VPA array since the totals are only known at the end."""
+
+    description = "JSON report"
+
+    def begin(self) -> None:
+        self.file.write('{\n  "vpas": [')
+
+    def write_vpa(self, vpa: VPARecord) -> None:
+        separator = ',\n' if self.total > 1 else '\n'
+        self.file.write(separator + textwrap.indent(json.dumps(vpa.to_dict(), indent=2, default=str), '    '))
+
+    def end(self) -> None:
+        savings = textwrap.indent(json.dumps(self.savings.summary(), indent=2), '  ').lstrip()
+        metadata = textwrap.indent(json.dumps(self.metadata(), indent=2), '  ').lstrip()
+        if self.total:
+            self.file.write('\n  ')
+        self.file.write(f'],\n  "savings": {savings},\n  "metadata": {metadata}\n}}\n')
+
+
+class NDJSONReportWriter(ReportWriter):
+    """Writes one JSON document per VPA and line, for downstream tooling."""
+
+    description = "NDJSON report"
+
+    def write_vpa(self, vpa: VPARecord) -> None:
+        self.file.write(json.dumps(vpa.to_dict(), default=str) + '\n')
+
+    def end(self) -> None:
+        # The last line is the only one that is not a VPA
+        self.file.write(json.dumps({'savings': self.savings.summary()}) + '\n')
+
+
+class YAMLReportWriter(ReportWriter):
+    """Streams a YAML report, dumping each VPA as one item of the vpas sequence."""
+
+    description = "YAML report"
+
+    def write_vpa(self, vpa: VPARecord) -> None:
+        if self.total == 1:
+            self.file.write('vpas:\n')
+        yaml.dump([to_plain(vpa.to_dict())], self.file, Dumper=YAMLDumper, indent=2, default_flow_style=False)
+
+    def end(self) -> None:
+        if not self.total:
+            self.file.write('vpas: []\n')
+        yaml.dump({'savings': self.savings.summary()}, self.file, Dumper=YAMLDumper, indent=2,
+                  default_flow_style=False, sort_keys=False)
+        yaml.dump({'metadata': self.metadata()}, self.file, Dumper=YAMLDumper, indent=2, default_flow_style=False)
+
+
+class MarkdownReportWriter(ReportWriter):
+    """Writes a Markdown report.
+
+    The summary at the top needs totals, so VPA sections are spooled to a temporary file and
+    copied behind the summary at the end.
+    """
+
+    description = "Markdown report"
+
+    def begin(self) -> None:
+        self.body = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def abort(self) -> None:
+        if self.file:
+            self.body.close()
+        super().abort()
+
+    def write_vpa(self, vpa: VPARecord) -> None:
+        vpa_name = f"{vpa.location if vpa.namespace else 'unknown'}/{vpa.name or 'unknown'}"
+        target_name = f"{vpa.kind or 'unknown'}/{vpa.workload or 'unknown'}"
+        update_mode = str(vpa.update_mode or 'Off')
+        display_value = self.reporter._display_value
+
+        self.body.write(f"""## 🔧 VPA: {vpa_name}
+
+- **Target:** {target_name}
+- **Update Mode:** {update_mode}
+
+""")
+
+        if not vpa.has_recommendations:
+            self.body.write("*No recommendations available*\n\n")
+            return
+
+        # Add container recommendations
+        for row in vpa.recommended:
+            self.body.write(f"""### 📦 Container: {row.name}
+
+| Resource | Current Request | Lower Bound | Target | Upper Bound |
+|----------|----------------|-------------|---------|-------------|
+""")
+
+            # CPU row
+            current_cpu = display_value(row, 'requests', 'cpu')
+            lower_cpu = display_value(row, 'lowerBound', 'cpu')
+            target_cpu = display_value(row, 'target', 'cpu')
+            upper_cpu = display_value(row, 'upperBound', 'cpu')
+
+            self.body.write(f"| **CPU** | {current_cpu} | {lower_cpu} | **{target_cpu}** | {upper_cpu} |\n")
+
+            # Memory row
+            current_memory = display_value(row, 'requests', 'memory')
+            lower_memory = display_value(row, 'lowerBound', 'memory')
+            target_memory = display_value(row, 'target', 'memory')
+            upper_memory = display_value(row, 'upperBound', 'memory')
+
+            self.body.write(f"| **Memory** | {current_memory} | {lower_memory} | **{target_memory}** | {upper_memory} |\n\n")
+
+    def end(self) -> None:
+        timestamp = self.generated_at.strftime('%Y-%m-%d %H:%M:%S')
+
+        self.file.write(f"""# 🎯 VPA Goldilocks Resource Recommendations Report
+
+## 📊 Summary
+
+- **Generated:** {timestamp}
+- **Total VPAs:** {self.total}
+- **VPAs with Recommendations:** {self.with_recommendations}
+
+""")
+
+        if not self.total:
+            self.file.write("---\n\nNo VPA recommendations found.\n")
+            self.body.close()
+            return
+
+        self._write_savings()
+        self.file.write("---\n\n")
+
+        self.body.seek(0)
+        shutil.copyfileobj(self.body, self.file)
+        self.body.close()
+
+        self.file.write("""---
+
+*Generated by vpa-goldilocks-reporter*
+""")
+
+    def _write_table(self, header: Tuple[str, ...], rows: List[Tuple[str, ...]]) -> None:
+        self.file.write(f"| {' | '.join(header)} |\n")
+        self.file.write(f"|{'|'.join('---' for _ in header)}|\n")
+        for row in rows:
+            self.file.write(f"| {' | '.join(row)} |\n")
+        self.file.write("\n")
+
+    def _write_savings(self) -> None:
+        summary = self.savings.summary()
+
+        self.file.write("## 💰 Savings Analysis\n\nReplica-weighted requests compared with VPA targets.\n\n")
+        self._write_table(
+            ('Resource', 'Requested', 'Recommended', 'Over-provisioned', 'Under-provisioned', 'Net Reclaimable'),
+            [(f"**{row[0]}**", *row[1:]) for row in self.savings.total_rows()]
+        )
+        if summary['containersWithoutRequests']:
+            self.file.write(
+                f"*{summary['containersWithoutRequests']} containers lack a request or target for CPU or "
+                f"memory and are left out of that resource.*\n\n"
+            )
+
+        for resource, label in (('cpu', 'CPU'), ('memory', 'Memory')):
+            rows = self.savings.top_rows(resource)
+            if rows:
+                self.file.write(f"### Top {len(rows)} Over-provisioned Containers by {label}\n\n")
+                self._write_table(('Workload', 'Container', 'Replicas', 'Request', 'Target', 'Reclaimable'), rows)
+
+        cluster_rows = self.savings.cluster_rows()
+        if cluster_rows:
+            self.file.write("### Net Reclaimable by Cluster\n\n")
+            self._write_table(('Cluster', 'Containers', 'CPU', 'Memory'), cluster_rows)
+
+        self.file.write("### Net Reclaimable by Namespace\n\n")
+        self._write_table(('Namespace', 'Containers', 'CPU', 'Memory'), self.savings.namespace_rows())
+
+
+class PodResolver:
+    """Current resources of VPA targets resolved from their pods.
+
+    Pods, the ReplicaSets, Jobs and ReplicationControllers between pods and their top-level
+    controllers, and LimitRanges are each listed once. The controller ownerReferences of
+    every pod are followed up to the object that owns nothing else, such as a Deployment,
+    CronJob, Argo Rollout or OpenShift DeploymentConfig, and every step is memoized, so
+    resolving all pods stays linear in their number. A target's resources are those of its
+    newest running pod, init containers included, as admitted by the API server with the
+    LimitRange defaults of its namespace. Targets without pods fall back to their indexed
+    template, with the same defaults applied. When any of these kinds cannot be listed
+    cluster-wide, all of them are listed per namespace the first time it is resolved.
+    """
+
+    # Intermediate owners are indexed before pods, so every pod's owner chain is complete
+    KINDS = ('LimitRange', 'ReplicaSet', 'Job', 'ReplicationController', 'Pod')
+
+    EXTRACTORS = {
+        'LimitRange': '_extract_limit_range',
+        'ReplicaSet': '_extract_owned',
+        'Job': '_extract_owned',
+        'ReplicationController': '_extract_owned',
+        'Pod': '_extract_pod'
+    }
+
+    ACTIVE_PHASES = ('Pending', 'Running')
+
+    def __init__(self, reporter: 'VPARecommendationReporter'):
+        self.reporter = reporter
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget everything indexed, so a new index does not keep deleted pods."""
+        # (namespace, kind, name) -> controller reference of an intermediate owner
+        self.owners: Dict[Tuple[str, str, str], Dict] = {}
+        # (namespace, kind, name) -> its top-level (kind, name), filled while walking pods
+        self.roots: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
+        # (namespace, pod) -> top-level (kind, name) of the pod, None for bare pods
+        self.pod_owners: Dict[Tuple[str, str], Optional[Tuple[str, str]]] = {}
+        # (namespace, kind, name) of a top-level owner -> active pod count and newest pod's resources
+        self.targets: Dict[Tuple[str, str, str], Dict] = {}
+        # namespace -> container requests and limits defaulted by its LimitRanges
+        self.defaults: Dict[str, Dict[str, Dict]] = {}
+        # kind -> apiVersion, as last seen in an ownerReference
+        self.api_versions: Dict[str, str] = {kind: 'apps/v1' for kind in self.reporter.WORKLOAD_KINDS}
+        self.namespace_scoped = False
+        self.loaded_namespaces: Set[str] = set()
+
+    @staticmethod
+    def _controller(metadata: Dict) -> Optional[Dict]:
+        """The ownerReference of an object's managing controller, reduced to kind, name and apiVersion."""
+        for reference in metadata.get('ownerReferences') or []:
+            if reference.get('controller'):
+                return {key: reference.get(key) for key in ('apiVersion', 'kind', 'name')}
+        return None
+
+    @staticmethod
+    def _extract_owned(item: Dict) -> Dict:
+        """Reduce a ReplicaSet, Job or ReplicationController to its identity and controller."""
+        metadata = item.get('metadata', {})
+        return {
+            'namespace': metadata.get('namespace'),
+            'name': metadata.get('name'),
+            'owner': PodResolver._controller(metadata)
+        }
+
+    @staticmethod
+    def _extract_pod(pod: Dict) -> Dict:
+        """Reduce a pod to its identity, controller, phase and container resources."""
+        metadata = pod.get('metadata', {})
+        spec = pod.get('spec', {})
+        return {
+            'namespace': metadata.get('namespace'),
+            'name': metadata.get('name'),
+            'owner': PodResolver._controller(metadata),
+            'created': metadata.get('creationTimestamp') or '',
+            'active': pod.get('status', {}).get('phase') in PodResolver.ACTIVE_PHASES,
+            'containers': VPARecommendationReporter._container_resources(spec.get('containers')),
+            'initContainers': VPARecommendationReporter._container_resources(spec.get('initContainers'))
+        }
+
+    @staticmethod
+    def _extract_limit_range(limit_range: Dict) -> Dict:
+        """Reduce a LimitRange to the container defaults it sets."""
+        metadata = limit_range.get('metadata', {})
+        limits = [
+            {'requests': limit.get('defaultRequest') or {}, 'limits': limit.get('default') or {}}
+            for limit in (limit_range.get('spec') or {}).get('limits') or []
+            if limit.get('type') == 'Container'
+        ]
+        return {'namespace': metadata.get('namespace'), 'name': metadata.get('name'), 'limits': limits}
+
+    def _list_functions(self, kind: str) -> Tuple[Any, Any]:
+        """Return the (all namespaces, namespaced) list functions for one of the resolved kinds."""
+        reporter = self.reporter
+        return {
+            'LimitRange': (reporter.core_v1.list_limit_range_for_all_namespaces,
+                           reporter.core_v1.list_namespaced_limit_range),
+            'ReplicaSet': (reporter.apps_v1.list_replica_set_for_all_namespaces,
+                           reporter.apps_v1.list_namespaced_replica_set),
+            'Job': (reporter.batch_v1.list_job_for_all_namespaces,
+                    reporter.batch_v1.list_namespaced_job),
+            'ReplicationController': (reporter.core_v1.list_replication_controller_for_all_namespaces,
+                                      reporter.core_v1.list_namespaced_replication_controller),
+            'Pod': (reporter.core_v1.list_pod_for_all_namespaces,
+                    reporter.core_v1.list_namespaced_pod),
+        }[kind]
+
+    def _list_namespaced(self, kind: str, namespace: str) -> List[Dict]:
+        """List the objects of one kind in a single namespace."""
+        _, namespaced_list_func = self._list_functions(kind)
+        extract = getattr(self, self.EXTRACTORS[kind])
+        try:
+            return list(self.reporter._list_cached(f"{kind.lower()}-{namespace}", namespaced_list_func,
+                                                   namespace, extract=extract))
+        except ApiException as e:
+            logger.warning(f"Could not list {kind} resources in namespace {namespace}: {e}")
+            return []
+
+    def _list_cluster(self, kind: str) -> Optional[List[Dict]]:
+        """List the objects of one kind in all namespaces, None when that is forbidden."""
+        cluster_list_func, _ = self._list_functions(kind)
+        reporter = self.reporter
+        try:
+            return list(reporter._list_cached(f"{kind.lower()}-all", cluster_list_func,
+                                              extract=getattr(self, self.EXTRACTORS[kind]),
+                                              **reporter._cluster_list_kwargs()))
+        except ApiException as e:
+            if e.status not in (401, 403):
+                raise
+            logger.info(f"Cluster-wide {kind} listing forbidden, resolving pods per namespace")
+            return None
+
+    def index(self, namespace: Optional[str] = None) -> None:
+        """List pods and their owners once and resolve every pod to its top-level owner."""
+        self._reset()
+        reporter = self.reporter
+
+        if reporter.offline:
+            objects = [reporter.snapshot_pod_items[kind] for kind in self.KINDS]
+        elif namespace:
+            objects = reporter._map_concurrent(lambda kind: self._list_namespaced(kind, namespace), self.KINDS)
+        else:
+            objects = reporter._map_concurrent(self._list_cluster, self.KINDS)
+            if any(items is None for items in objects):
+                # Owner chains may cross kinds, so either all kinds are listed per namespace or none
+                self.namespace_scoped = True
+                return
+
+        for kind, items in zip(self.KINDS, objects):
+            self._add(kind, (item for item in items if reporter._covers_namespace(item['namespace'], namespace)))
+        logger.info(f"Resolved {len(self.pod_owners)} pods to {len(self.targets)} workloads")
+
+    def _load_namespace(self, namespace: str) -> None:
+        """Index the pods of one namespace when cluster-wide listing is forbidden, unless done already."""
+        if not self.namespace_scoped or namespace in self.loaded_namespaces:
+            return
+        self.loaded_namespaces.add(namespace)
+
+        with self.reporter.timings.phase('pod reads'):
+            objects = self.reporter._map_concurrent(lambda kind: self._list_namespaced(kind, namespace), self.KINDS)
+            for kind, items in zip(self.KINDS, objects):
+                self._add(kind, items)
+
+    def _add(self, kind: str, items: Iterable[Dict]) -> None:
+        """Index listed objects of one kind."""
+        for item in items:
+            namespace = item['namespace']
+            if kind == 'LimitRange':
+                defaults = self.defaults.setdefault(namespace, {'requests': {}, 'limits': {}})
+                for limit in item['limits']:
+                    for group in RESOURCE_GROUPS:
+                        for resource_type, quantity in limit[group].items():
+                            # The first LimitRange setting a default wins, as on admission
+                            defaults[group].setdefault(resource_type, quantity)
+            elif kind == 'Pod':
+                self._add_pod(item)
+            elif item['owner']:
+                self.owners[(namespace, kind, item['name'])] = item['owner']
+
+    def _root(self, namespace: str, kind: str, name: str) -> Tuple[str, str]:
+        """Follow controller references from an object to the top-level owner, memoized per object."""
+        key = (namespace, kind, name)
+        root = self.roots.get(key)
+        if root is None:
+            owner = self.owners.get(key)
+            if owner is None:
+                root = (kind, name)
+            else:
+                self.api_versions[owner['kind']] = owner['apiVersion']
+                root = self._root(namespace, owner['kind'], owner['name'])
+            self.roots[key] = root
+        return root
+
+    def _add_pod(self, pod: Dict) -> None:
+        """Count a pod for its top-level owner, whose resources come from its newest active pod."""
+        namespace = pod['namespace']
+        owner = pod['owner']
+        root = None
+        if owner:
+            self.api_versions[owner['kind']] = owner['apiVersion']
+            root = self._root(namespace, owner['kind'], owner['name'])
+        self.pod_owners[(namespace, pod['name'])] = root
+        if root is None:
+            return
+
+        target = self.targets.setdefault((namespace, *root), {'replicas': 0})
+        target['replicas'] += pod['active']
+        # Active pods rank above finished ones, newer above older
+        rank = (pod['active'], pod['created'])
+        if 'containers' not in target or rank > target['rank']:
+            target['rank'] = rank
+            target['containers'] = pod['containers']
+            target['initContainers'] = pod['initContainers']
+
+    def _with_defaults(self, namespace: str, resources: Dict) -> Dict:
+        """Apply the defaulting of the API server and the namespace's LimitRanges to template resources."""
+        requests = dict(resources.get('requests') or {})
+        limits = dict(resources.get('limits') or {})
+        # A request left unset defaults to the container's limit, then to the LimitRange's
+        for resource_type, quantity in limits.items():
+            requests.setdefault(resource_type, quantity)
+        defaults = self.defaults.get(namespace)
+        if defaults:
+            for resource_type, quantity in defaults['requests'].items():
+                requests.setdefault(resource_type, quantity)
+            for resource_type, quantity in defaults['limits'].items():
+                limits.setdefault(resource_type, quantity)
+        return {'requests': requests, 'limits': limits}
+
+    def pod_owner(self, namespace: str, pod: str) -> Optional[Tuple[str, str]]:
+        """The top-level (kind, name) owning a pod, None for bare or unknown pods."""
+        self._load_namespace(namespace)
+        return self.pod_owners.get((namespace, pod))
+
+    def resolve(self, namespace: str, kind: str, name: str) -> Optional[Dict]:
+        """Replicas and effective container resources of a target, None if it has neither pods nor template."""
+        self._load_namespace(namespace)
+        reporter = self.reporter
+
+        template = None
+        if kind in reporter.WORKLOAD_KINDS:
+            if kind in reporter.namespace_scoped_kinds:
+                reporter._load_namespaced_workloads(kind, namespace)
+            template = reporter.workload_index.get((namespace, kind, name))
+
+        pods = self.targets.get((namespace, kind, name))
+        if pods:
+            # Templates know the desired replicas, pod counts only those running right now
+            replicas = pods['replicas'] if template is None or template['replicas'] is None else template['replicas']
+            return {'replicas': replicas, 'containers': {**pods['containers'], **pods['initContainers']}}
+        if template:
+            containers = {**template['containers'], **template.get('initContainers', {})}
+            return {
+                'replicas': template['replicas'],
+                'containers': {container: self._with_defaults(namespace, resources)
+                               for container, resources in containers.items()}
+            }
+        return None
+
+
+class UsageRing:
+    """Integer usage samples of one container and resource, keeping the most recent capacity.
+
+    Samples are appended to a compact array until it is full, then overwrite the oldest.
+    """
+
+    __slots__ = ('samples', 'capacity', 'position')
+
+    def __init__(self, capacity: int):
+        self.samples = array('q')
+        self.capacity = capacity
+        self.position = 0
+
+    def add(self, value: int) -> None:
+        if len(self.samples) < self.capacity:
+            self.samples.append(value)
+            return
+        self.samples[self.position] = value
+        self.position = (self.position + 1) % self.capacity
+
+    def percentiles(self, percentiles: Iterable[float]) -> List[int]:
+        """Nearest-rank percentiles, all read from one sort of the samples."""
+        ordered = sorted(self.samples)
+        count = len(ordered)
+        return [ordered[max(0, math.ceil(percentile / 100 * count) - 1)] for percentile in percentiles]
+
+
+class UsageRecommender:
+    """Recommendations computed from sampled container usage instead of VPA status.
+
+    Usage comes from metrics.k8s.io PodMetrics, sampled from the cluster or loaded from
+    snapshot dumps, or from a Prometheus text dump of the cAdvisor metrics
+    container_cpu_usage_seconds_total and container_memory_working_set_bytes. Pods are
+    resolved to their top-level owners by their controller ownerReferences, and matched to
+    the workloads in the reporter's index, or to any top-level owner when the reporter
+    resolves pods. The samples of all pods of a workload go into one ring buffer per
+    container and resource. Every workload with samples becomes a VPA-shaped object that
+    the reporter processes like a real VPA.
+    """
+
+    DEFAULT_WINDOW = 1440
+    # metrics-server scrapes every 15 seconds, so the default sampling takes 45 seconds
+    DEFAULT_SAMPLES = 4
+    DEFAULT_INTERVAL = 15
+
+    # Usage percentile of each recommendation bound; memory is sized for its peaks
+    PERCENTILES = {
+        'cpu': {'lowerBound': 50, 'target': 90, 'upperBound': 95},
+        'memory': {'lowerBound': 50, 'target': 95, 'upperBound': 99}
+    }
+
+    # Added on top of every percentile, the VPA recommender's default safety margin
+    MARGIN = 0.15
+
+    # The VPA recommender's default pod minimums, shared by the containers of a pod
+    POD_MINIMUMS = {'cpu': 25, 'memory': 250 * MIB}
+
+    METRICS_GROUP = 'metrics.k8s.io'
+    METRICS_VERSION = 'v1beta1'
+
+    PROMETHEUS_CPU = 'container_cpu_usage_seconds_total'
+    PROMETHEUS_MEMORY = 'container_memory_working_set_bytes'
+    PROMETHEUS_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*"((?:[^"\\]|\\.)*)"')
+
+    # Name suffixes controllers give their pods: the pod template hash of a ReplicaSet, the
+    # random suffix of a generated name, which avoid vowels and look-alike digits, and ordinals
+    POD_TEMPLATE_HASH = re.compile(r'^[bcdfghjklmnpqrstvwxz2456789]{6,10}$')
+    GENERATED_SUFFIX = re.compile(r'^[bcdfghjklmnpqrstvwxz2456789]{5}$')
+    ORDINAL = re.compile(r'^\d+$')
+    POD_NAME_SUFFIXES = (
+        ('Deployment', (POD_TEMPLATE_HASH, GENERATED_SUFFIX)),
+        ('StatefulSet', (ORDINAL,)),
+        ('DaemonSet', (GENERATED_SUFFIX,))
+    )
+
+    def __init__(self, reporter: 'VPARecommendationReporter', window: int = DEFAULT_WINDOW,
+                 samples: int = DEFAULT_SAMPLES, interval: float = DEFAULT_INTERVAL,
+                 dump_path: Optional[str] = None):
+        self.reporter = reporter
+        self.window = window
+        self.samples = samples
+        self.interval = interval
+        self.dump_path = dump_path
+        # Pods are resolved through ownerReferences, by the reporter's own resolver if it has one
+        self.pod_resolver = reporter.pod_resolver or PodResolver(reporter)
+        # (namespace, kind, workload) -> container -> resource -> usage ring
+        self.usage: Dict[Tuple[str, str, str], Dict[str, Dict[str, UsageRing]]] = {}
+        # (namespace, pod) -> its (kind, workload), or None for pods of no indexed workload
+        self.owners: Dict[Tuple[str, str], Optional[Tuple[str, str]]] = {}
+        # (namespace, pod) -> timestamp of the last PodMetrics sample taken from it
+        self.sampled_at: Dict[Tuple[str, str], Any] = {}
+
+    def _indexed(self, namespace: str, kind: str, name: str) -> bool:
+        """Return whether a workload is in the reporter's index."""
+        if kind not in self.reporter.WORKLOAD_KINDS:
+            return False
+        if kind in self.reporter.namespace_scoped_kinds:
+            self.reporter._load_namespaced_workloads(kind, namespace)
+        return (namespace, kind, name) in self.reporter.workload_index
+
+    def _owner(self, namespace: str, pod: str) -> Optional[Tuple[str, str]]:
+        """Match a pod to its workload by the controller ownerReferences of the pod and its owners.
+
+        Pods that no longer exist, such as those of an older Prometheus dump, are matched by
+        the names controllers give them, if exactly one indexed workload fits.
+        """
+        key = (namespace, pod)
+        if key not in self.owners:
+            owner = self.pod_resolver.pod_owner(namespace, pod)
+            if key not in self.pod_resolver.pod_owners:
+                owner = self._owner_by_name(namespace, pod)
+            elif owner and not self.reporter.pod_resolver and not self._indexed(namespace, *owner):
+                # Only indexed workloads have current resources unless the reporter resolves pods
+                owner = None
+            self.owners[key] = owner
+        return self.owners[key]
+
+    def _owner_by_name(self, namespace: str, pod: str) -> Optional[Tuple[str, str]]:
+        """Match a pod no longer listed to the only indexed workload its name fits, if any."""
+        parts = pod.split('-')
+        candidates = []
+        # <deployment>-<pod template hash>-<suffix>, <statefulset>-<ordinal>, <daemonset>-<suffix>
+        for kind, patterns in self.POD_NAME_SUFFIXES:
+            suffixes = parts[-len(patterns):]
+            if len(parts) <= len(patterns) or not all(map(re.Pattern.match, patterns, suffixes)):
+                continue
+            name = '-'.join(parts[:-len(patterns)])
+            if self._indexed(namespace, kind, name):
+                candidates.append((kind, name))
+        if len(candidates) > 1:
+            logger.debug(f"Pod {namespace}/{pod} fits several workloads by name, leaving it out: {candidates}")
+        return candidates[0] if len(candidates) == 1 else None
+
+    def _ring(self, namespace: str, pod: str, container: str, resource_type: str) -> Optional[UsageRing]:
+        """The usage ring of a pod's container, None for pods of no indexed workload."""
+        owner = self._owner(namespace, pod)
+        if owner is None:
+            return None
+        containers = self.usage.setdefault((namespace, *owner), {})
+        rings = containers.get(container)
+        if rings is None:
+            rings = containers[container] = {resource: UsageRing(self.window) for resource in RESOURCE_TYPES}
+        return rings[resource_type]
+
+    def add(self, namespace: str, pod: str, container: str, resource_type: str, value: int) -> None:
+        """Record one usage sample of a pod's container."""
+        ring = self._ring(namespace, pod, container, resource_type)
+        if ring is not None:
+            ring.add(value)
+
+    def add_pod_metrics(self, pod_metrics: Dict) -> None:
+        """Record the container usage of one PodMetrics object, unless already sampled."""
+        metadata = pod_metrics.get('metadata', {})
+        key = (metadata.get('namespace'), metadata.get('name'))
+        timestamp = pod_metrics.get('timestamp')
+        # The metrics server serves the same sample until its next scrape
+        if timestamp is not None and self.sampled_at.get(key) == timestamp:
+            return
+        self.sampled_at[key] = timestamp
+
+        for container in pod_metrics.get('containers') or []:
+            for resource_type in RESOURCE_TYPES:
+                value = parse_quantity((container.get('usage') or {}).get(resource_type), resource_type)
+                if value is not None:
+                    self.add(*key, container.get('name'), resource_type, value)
+
+    def sample_metrics_api(self, namespace: Optional[str] = None) -> None:
+        """Take the configured number of PodMetrics samples from the cluster's metrics API."""
+        reporter = self.reporter
+        if namespace:
+            list_args = (reporter.custom_objects_api.list_namespaced_custom_object,
+                         self.METRICS_GROUP, self.METRICS_VERSION, namespace, 'pods')
+        else:
+            list_args = (reporter.custom_objects_api.list_cluster_custom_object,
+                         self.METRICS_GROUP, self.METRICS_VERSION, 'pods')
+
+        duration = (self.samples - 1) * self.interval
+        description = f"Sampling usage for {duration:g}s..." if duration else "Sampling usage..."
+        for sample in track(range(self.samples), description=description):
+            if sample:
+                time.sleep(self.interval)
+            for items, _ in reporter._iter_pages(*list_args):
+                for pod_metrics in items:
+                    if reporter._covers_namespace(pod_metrics.get('metadata', {}).get('namespace'), namespace):
+                        self.add_pod_metrics(pod_metrics)
+            logger.info(f"Took usage sample {sample + 1} of {self.samples} from the metrics API")
+
+    def _series(self, name: Optional[str], label_text: Optional[str], namespace: Optional[str]) -> Optional[List]:
+        """What the samples of one Prometheus series feed: [resource, ring], plus sample arrays for CPU.
+
+        None for series of other metrics, pod-level cgroups and pods of no reported workload.
+        """
+        labels = dict(self.PROMETHEUS_LABEL.findall(label_text or ''))
+        name = name or labels.get('__name__')
+        resource_type = {self.PROMETHEUS_CPU: 'cpu', self.PROMETHEUS_MEMORY: 'memory'}.get(name)
+        container, pod = labels.get('container'), labels.get('pod')
+        # Pod-level cgroups carry no container or the pause container
+        if not resource_type or not container or container == 'POD' or not pod:
+            return None
+        if not self.reporter._covers_namespace(labels.get('namespace'), namespace):
+            return None
+        ring = self._ring(labels.get('namespace'), pod, container, resource_type)
+        if ring is None:
+            return None
+        # CPU counters become rates once all their (timestamp in ms, seconds used) samples are read
+        return [resource_type, ring, array('q'), array('d')] if resource_type == 'cpu' else [resource_type, ring]
+
+    def load_prometheus_dump(self, path: Path, namespace: Optional[str] = None) -> None:
+        """Read usage from a Prometheus text dump, such as `promtool tsdb dump` output.
+
+        CPU usage is the rate between consecutive samples of each counter series, so those
+        need timestamps; memory working set samples are taken as they are. Labels are only
+        parsed once per series, every further sample is a lookup by its label text.
+        """
+        series_by_labels: Dict[Tuple[Optional[str], Optional[str]], Optional[List]] = {}
+        skipped = 0
+
+        with path.open() as f:
+            for line in f:
+                if line.startswith('#') or line.isspace():
+                    continue
+                # name{labels} value [timestamp], where the name may be a __name__ label instead
+                if '{' in line:
+                    name, _, rest = line.partition('{')
+                    label_text, _, rest = rest.rpartition('}')
+                    fields = [name.strip() or None, *rest.split()]
+                else:
+                    label_text = None
+                    fields = line.split()
+                if len(fields) not in (2, 3):
+                    skipped += 1
+                    continue
+                name, value, timestamp = fields if len(fields) == 3 else (*fields, None)
+                key = (name, label_text)
+                if key not in series_by_labels:
+                    series_by_labels[key] = self._series(name, label_text, namespace)
+                series = series_by_labels[key]
+                if series is None:
+                    continue
+
+                try:
+                    number = float(value)
+                except ValueError:
+                    skipped += 1
+                    continue
+                if math.isnan(number):
+                    continue
+
+                if series[0] == 'memory':
+                    series[1].add(int(number))
+                elif timestamp is not None and timestamp.lstrip('-').isdigit():
+                    series[2].append(int(timestamp))
+                    series[3].append(number)
+                else:
+                    skipped += 1
+
+        for series in series_by_labels.values():
+            if series is None or series[0] != 'cpu':
+                continue
+            _, ring, timestamps, used = series
+            points = zip(timestamps, used)
+            if any(map(gt, timestamps, timestamps[1:])):
+                points = sorted(points)
+            points = list(points)
+            for (start, used_before), (end, used_after) in zip(points, points[1:]):
+                # A decreasing counter was reset by a container restart
+                if end > start and used_after >= used_before:
+                    ring.add(round((used_after - used_before) * 1000 / ((end - start) / 1000)))
+
+        if skipped:
+            logger.warning(f"Skipped {skipped} unreadable or untimestamped lines of {path}")
+
+    def _pod_containers(self, namespace: str, kind: str, name: str, sampled: int) -> int:
+        """Number of containers in a workload's pods, from its template or resolved pod.
+
+        Init containers do not count, as for the VPA recommender. Unknown workloads, and pods
+        with more sampled containers than their spec lists, count the sampled containers.
+        """
+        workload = self.reporter.workload_index.get((namespace, kind, name))
+        if workload is None:
+            workload = self.pod_resolver.targets.get((namespace, kind, name))
+        return max(len(workload.get('containers') or {}) if workload else 0, sampled)
+
+    def recommendation(self, containers: Dict[str, Dict[str, UsageRing]], pod_containers: int) -> List[Dict]:
+        """Container recommendations of one workload, shaped like a VPA's containerRecommendations.
+
+        The pod minimums are split across all pod_containers of the pod, sampled or not.
+        """
+        recommendations = []
+        for container, rings in containers.items():
+            entry = {'containerName': container}
+            for resource_type, ring in rings.items():
+                if not ring.samples:
+                    continue
+                bounds = self.PERCENTILES[resource_type]
+                minimum = self.POD_MINIMUMS[resource_type] / pod_containers
+                for bound, value in zip(bounds, ring.percentiles(bounds.values())):
+                    value = math.ceil(max(value * (1 + self.MARGIN), minimum))
+                    entry.setdefault(bound, {})[resource_type] = f"{value}m" if resource_type == 'cpu' else str(value)
+            if 'target' in entry:
+                entry['uncappedTarget'] = dict(entry['target'])
+                recommendations.append(entry)
+        return recommendations
+
+    def vpa_items(self) -> Iterator[Dict]:
+        """One VPA-shaped object per workload with usage samples, recommending its percentiles."""
+        resolver = self.reporter.pod_resolver
+        for (namespace, kind, name), containers in self.usage.items():
+            recommendations = self.recommendation(
+                containers, self._pod_containers(namespace, kind, name, len(containers)))
+            samples = {resource: sum(len(rings[resource].samples) for rings in containers.values())
+                       for resource in RESOURCE_TYPES}
+            yield {
+                'metadata': {'name': f"{name}-usage", 'namespace': namespace},
+                'spec': {
+                    'targetRef': {'apiVersion': resolver.api_versions.get(kind) if resolver else 'apps/v1',
+                                  'kind': kind, 'name': name},
+                    'updatePolicy': {'updateMode': 'Off'}
+                },
+                'status': {
+                    'recommendation': {'containerRecommendations': recommendations},
+                    'conditions': [{
+                        'type': 'RecommendationProvided',
+                        'status': 'True' if recommendations else 'False',
+                        'reason': 'UsagePercentiles',
+                        'message': f"Usage percentiles of {samples['cpu']} CPU and {samples['memory']} memory samples"
+                    }]
+                }
+            }
+
+    def collect(self, namespace: Optional[str] = None) -> Iterator[Dict]:
+        """Gather usage from the configured source, then return the VPA-shaped recommendations."""
+        reporter = self.reporter
+        if self.pod_resolver is not reporter.pod_resolver:
+            with reporter.timings.phase('pod reads'):
+                self.pod_resolver.index(namespace)
+        if self.dump_path:
+            self.load_prometheus_dump(Path(self.dump_path), namespace)
+        if reporter.offline:
+            for pod_metrics in reporter.snapshot_pod_metrics:
+                if reporter._covers_namespace(pod_metrics.get('metadata', {}).get('namespace'), namespace):
+                    self.add_pod_metrics(pod_metrics)
+        elif not self.dump_path:
+            self.sample_metrics_api(namespace)
+
+        unmatched = sum(owner is None for owner in self.owners.values())
+        if unmatched:
+            logger.info(f"{unmatched} pods with usage samples belong to no indexed workload and are left out")
+        return self.vpa_items()
+
+
+# Page of the html format. Container rows are embedded as JSON and sorted, filtered and paged
+# by the script at the bottom, so only one page of rows is ever in the DOM.
+HTML_REPORT_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>VPA Goldilocks Resource Recommendations</title>
+<style>
+body { font-family: system-ui, -apple-system, "Segoe UI", sans-serif; margin: 2rem; color: #212529; }
+h1 { font-size: 1.6rem; }
+h2 { font-size: 1.3rem; margin-top: 2rem; }
+.cards { display: flex; flex-wrap: wrap; gap: 1rem; }
+.card { border: 1px solid #dee2e6; border-radius: 6px; padding: .75rem 1rem; min-width: 10rem; }
+.card .value { font-size: 1.4rem; font-weight: 600; }
+table { border-collapse: collapse; margin: .5rem 0 1.5rem; font-size: .9rem; }
+th, td { border-bottom: 1px solid #dee2e6; padding: .3rem .6rem; text-align: left; white-space: nowrap; }
+th { background: #f8f9fa; }
+.number { text-align: right; }
+.target { font-weight: 600; }
+.controls { display: flex; flex-wrap: wrap; gap: .75rem; align-items: center; }
+.controls input[type=search] { min-width: 24rem; padding: .3rem; }
+#containers th { cursor: pointer; user-select: none; position: sticky; top: 0; }
+#containers th[aria-sort=ascending]::after { content: " \\25b2"; }
+#containers th[aria-sort=descending]::after { content: " \\25bc"; }
+.highlight-over-request { background-color: #fff3cd; }
+.highlight-under-request { background-color: #d1ecf1; }
+{{ custom_css|safe }}
+</style>
+</head>
+<body>
+{% macro table(header, rows, text_columns=1) %}
+<table>
+<thead><tr>{% for label in header %}<th{% if loop.index > text_columns %} class="number"{% endif %}>{{ label }}</th>{% endfor %}</tr></thead>
+<tbody>
+{% for row in rows %}
+<tr>{% for cell in row %}<td{% if loop.index > text_columns %} class="number"{% endif %}>{{ cell }}</td>{% endfor %}</tr>
+{% endfor %}
+</tbody>
+</table>
+{% endmacro %}
+<h1>VPA Goldilocks Resource Recommendations</h1>
+<p>Generated {{ generated_at }} by vpa-goldilocks-reporter</p>
+<div class="cards">
+<div class="card"><div>Total VPAs</div><div class="value">{{ total }}</div></div>
+<div class="card"><div>VPAs with Recommendations</div><div class="value">{{ with_recommendations }}</div></div>
+<div class="card"><div>Containers</div><div class="value">{{ containers }}</div></div>
+</div>
+{% if total %}
+<h2>Savings Analysis</h2>
+<p>Replica-weighted requests compared with VPA targets.</p>
+{{ table(('Resource', 'Requested', 'Recommended', 'Over-provisioned', 'Under-provisioned', 'Net Reclaimable'), total_rows) }}
+{% if without_requests %}
+<p><em>{{ without_requests }} containers lack a request or target for CPU or memory and are left out of that resource.</em></p>
+{% endif %}
+{% for label, rows in top_rows if rows %}
+<h3>Top {{ rows|length }} Over-provisioned Containers by {{ label }}</h3>
+{{ table(('Workload', 'Container', 'Replicas', 'Request', 'Target', 'Reclaimable'), rows, 2) }}
+{% endfor %}
+{% if cluster_rows %}
+<h3>Net Reclaimable by Cluster</h3>
+{{ table(('Cluster', 'Containers', 'CPU', 'Memory'), cluster_rows) }}
+{% endif %}
+<h3>Net Reclaimable by Namespace</h3>
+{{ table(('Namespace', 'Containers', 'CPU', 'Memory'), namespace_rows) }}
+<h2>Containers</h2>
+<p>Current requests above the upper bound are highlighted as <span class="highlight-over-request">over-requested</span>,
+below the lower bound as <span class="highlight-under-request">under-requested</span>. Click a column to sort.</p>
+<div class="controls">
+<input id="filter" type="search" placeholder="Filter by cluster, namespace, VPA, workload or container">
+<select id="provisioning">
+<option value="">All containers</option>
+<option value="over">Over-requested</option>
+<option value="under">Under-requested</option>
+</select>
+<label>Rows per page <select id="page-size"><option>50</option><option selected>100</option><option>500</option><option>1000</option></select></label>
+<button id="previous" type="button">Previous</button>
+<span id="page"></span>
+<button id="next" type="button">Next</button>
+</div>
+<table id="containers">
+<thead><tr>{% for column in columns %}<th data-column="{{ loop.index0 }}"{% if column.numeric %} class="number"{% endif %}>{{ column.label }}</th>{% endfor %}</tr></thead>
+<tbody></tbody>
+</table>
+<script id="columns" type="application/json">{{ columns_json|safe }}</script>
+<script id="rows" type="application/json">[{% for chunk in rows %}{{ chunk|safe }}{% endfor %}]</script>
+<script>
+(function () {
+  "use strict";
+  const columns = JSON.parse(document.getElementById("columns").textContent);
+  const rows = JSON.parse(document.getElementById("rows").textContent);
+  const body = document.querySelector("#containers tbody");
+  const headers = document.querySelectorAll("#containers th");
+  const filter = document.getElementById("filter");
+  const provisioning = document.getElementById("provisioning");
+  const pageSize = document.getElementById("page-size");
+  const pageLabel = document.getElementById("page");
+  const previous = document.getElementById("previous");
+  const next = document.getElementById("next");
+  // Offsets of the [current request, lower bound, target, upper bound] cells of each resource
+  const resources = {{ resource_offsets|safe }};
+  const escapes = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"};
+
+  const text = (cell) => Array.isArray(cell) ? cell[0] : (cell === null ? "" : String(cell));
+  const value = (cell) => Array.isArray(cell) ? cell[1] : cell;
+  const escape = (string) => string.replace(/[&<>"]/g, (character) => escapes[character]);
+
+  // Highlight class of every request cell, and searchable text of every row, computed once
+  const highlights = rows.map((row) => {
+    const classes = {};
+    for (const offset of resources) {
+      const request = value(row[offset]);
+      if (request === null) continue;
+      if (value(row[offset + 3]) !== null && request > value(row[offset + 3])) classes[offset] = "over";
+      else if (value(row[offset + 1]) !== null && request < value(row[offset + 1])) classes[offset] = "under";
+    }
+    return classes;
+  });
+  const haystacks = rows.map((row) => row.slice(0, {{ search_columns }}).map(text).join(" ").toLowerCase());
+
+  let view = [];
+  let sortColumn = null;
+  let descending = false;
+  let page = 0;
+
+  function refresh() {
+    const needle = filter.value.trim().toLowerCase();
+    const wanted = provisioning.value;
+    view = [];
+    for (let index = 0; index < rows.length; index++) {
+      if (needle && !haystacks[index].includes(needle)) continue;
+      if (wanted && !Object.values(highlights[index]).includes(wanted)) continue;
+      view.push(index);
+    }
+    if (sortColumn !== null) {
+      const position = columns[sortColumn].index;
+      const direction = descending ? -1 : 1;
+      view.sort((a, b) => {
+        const left = value(rows[a][position]);
+        const right = value(rows[b][position]);
+        // Missing values sort last in either direction
+        if (left === null || right === null) return (left === null) - (right === null);
+        return (left < right ? -1 : left > right ? 1 : 0) * direction;
+      });
+    }
+    page = 0;
+    render();
+  }
+
+  function render() {
+    const size = Number(pageSize.value);
+    const pages = Math.max(1, Math.ceil(view.length / size));
+    page = Math.min(page, pages - 1);
+    const html = [];
+    for (const index of view.slice(page * size, (page + 1) * size)) {
+      const row = rows[index];
+      html.push("<tr>");
+      for (const column of columns) {
+        const classes = [];
+        if (column.numeric) classes.push("number");
+        if (column.target) classes.push("target");
+        if (highlights[index][column.index]) classes.push("highlight-" + highlights[index][column.index] + "-request");
+        html.push('<td class="' + classes.join(" ") + '">' + escape(text(row[column.index])) + "</td>");
+      }
+      html.push("</tr>");
+    }
+    body.innerHTML = html.join("");
+    pageLabel.textContent = "Page " + (page + 1) + " of " + pages + " (" + view.length + " of " + rows.length + " containers)";
+    previous.disabled = page === 0;
+    next.disabled = page >= pages - 1;
+  }
+
+  headers.forEach((header) => header.addEventListener("click", () => {
+    const column = Number(header.dataset.column);
+    descending = sortColumn === column ? !descending : columns[column].numeric;
+    sortColumn = column;
+    headers.forEach((other) => other.removeAttribute("aria-sort"));
+    header.setAttribute("aria-sort", descending ? "descending" : "ascending");
+    refresh();
+  }));
+  filter.addEventListener("input", refresh);
+  provisioning.addEventListener("change", refresh);
+  pageSize.addEventListener("change", render);
+  previous.addEventListener("click", () => { page--; render(); });
+  next.addEventListener("click", () => { page++; render(); });
+  refresh();
+})();
+</script>
+{% else %}
+<p>No VPA recommendations found.</p>
+{% endif %}
+</body>
+</html>
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def html_report_template() -> 'jinja2.Template':
+    """Compile the HTML report template, once per process."""
+    environment = jinja2.Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+    return environment.from_string(HTML_REPORT_TEMPLATE)
+
+
+class HTMLReportWriter(ReportWriter):
+    """Writes a self-contained HTML report from a precompiled Jinja2 template.
+
+    Like the Markdown report the summary comes first, so container rows are spooled as JSON
+    lines to a temporary file while VPAs stream past. The template is then rendered straight
+    into the report file, pulling the spooled rows in as it reaches them.
+    """
+
+    description = "HTML report"
+
+    # Container table columns: label, position in a spooled row and whether the values are numeric
+    COLUMNS = (
+        ('Cluster', 0, False), ('Namespace', 1, False), ('VPA', 2, False), ('Workload', 3, False),
+        ('Container', 4, False), ('Update Mode', 5, False), ('Replicas', 6, True),
+        ('CPU Request', 7, True), ('CPU Lower', 8, True), ('CPU Target', 9, True), ('CPU Upper', 10, True),
+        ('Memory Request', 11, True), ('Memory Lower', 12, True), ('Memory Target', 13, True),
+        ('Memory Upper', 14, True)
+    )
+
+    # Values of each resource in a spooled row, following the text columns
+    QUANTITY_GROUPS = ('requests', 'lowerBound', 'target', 'upperBound')
+
+    def begin(self) -> None:
+        if jinja2 is None:
+            raise RuntimeError("The html format needs Jinja2: pip install jinja2")
+        self.rows = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self.containers = 0
+        self.clusters = False
+
+    def abort(self) -> None:
+        if self.file:
+            self.rows.close()
+        super().abort()
+
+    @staticmethod
+    def _script_json(value: Any) -> str:
+        """JSON that cannot end the <script> element it is embedded in."""
+        return json.dumps(value, separators=(',', ':')).replace('<', '\\u003c').replace('>', '\\u003e')
+
+    def write_vpa(self, vpa: VPARecord) -> None:
+        display_value = self.reporter._display_value
+        self.clusters = self.clusters or bool(vpa.cluster)
+        workload = f"{vpa.kind or 'unknown'}/{vpa.workload or 'unknown'}"
+
+        for row in vpa.recommended:
+            cells = [vpa.cluster or '', vpa.namespace, vpa.name, workload, row.name, vpa.update_mode, vpa.replicas]
+            for resource_type in RESOURCE_TYPES:
+                for group in self.QUANTITY_GROUPS:
+                    cells.append([display_value(row, group, resource_type), row.value(group, resource_type)])
+            self.rows.write(self._script_json(cells) + '\n')
+            self.containers += 1
+
+    def _spooled_rows(self) -> Iterator[str]:
+        """The spooled rows, comma separated."""
+        self.rows.seek(0)
+        for index, line in enumerate(self.rows):
+            yield line.rstrip('\n') if index == 0 else ',' + line.rstrip('\n')
+
+    def end(self) -> None:
+        columns = [
+            {'label': label, 'index': index, 'numeric': numeric, 'target': label.endswith('Target')}
+            for label, index, numeric in self.COLUMNS
+            if index or self.clusters
+        ]
+        first_quantity = len(self.COLUMNS) - len(RESOURCE_TYPES) * len(self.QUANTITY_GROUPS)
+        resource_offsets = [first_quantity + i * len(self.QUANTITY_GROUPS) for i in range(len(RESOURCE_TYPES))]
+        summary = self.savings.summary()
+
+        stream = html_report_template().generate(
+            generated_at=self.generated_at.strftime('%Y-%m-%d %H:%M:%S'),
+            total=self.total,
+            with_recommendations=self.with_recommendations,
+            containers=self.containers,
+            custom_css=self.reporter.html_report.get('custom_css') or '',
+            total_rows=self.savings.total_rows(),
+            without_requests=summary['containersWithoutRequests'],
+            top_rows=[(label, self.savings.top_rows(resource)) for resource, label in (('cpu', 'CPU'), ('memory', 'Memory'))],
+            cluster_rows=self.savings.cluster_rows(),
+            namespace_rows=self.savings.namespace_rows(),
+            columns=columns,
+            columns_json=self._script_json(columns),
+            resource_offsets=json.dumps(resource_offsets),
+            search_columns=first_quantity - 1,
+            rows=self._spooled_rows()
+        )
+        self.file.writelines(stream)
+        self.rows.close()
+
+
+class KubectlPatchWriter(ReportWriter):
+    """Writes one kubectl patch command per workload applying the target recommendations."""
+
+    description = "Kubectl patch commands"
+
+    def begin(self) -> None:
+        self.commands = 0
+
+    def write_vpa(self, vpa: VPARecord) -> None:
+        container_requests = self.reporter.recommended_requests(vpa)
+        if not container_requests:
+            return
+
+        patch = json.dumps(requests_patch(vpa.kind, container_requests), separators=(',', ':'))
+        # Commands of multi-cluster reports select the context the VPA was read from
+        context = f" --context {shlex.quote(vpa.cluster)}" if vpa.cluster else ''
+        kubectl_cmd = f"""# Apply VPA recommendations for {vpa.location}/{vpa.workload} containers {', '.join(container_requests)}
+kubectl{context} patch {vpa.kind.lower()} {vpa.workload} -n {vpa.namespace} --type=strategic -p='{patch}'
+"""
+        # Commands are separated by a blank line
+        self.file.write(('\n' if self.commands else '') + kubectl_cmd)
+        self.commands += 1
+
+    def end(self) -> None:
+        if not self.savings.labels:
+            return
+
+        # Summarize what applying every command reclaims, as comments
+        lines = ["", "# Savings analysis (replica-weighted requests vs. VPA targets)"]
+        for resource, requested, recommended, over, under, net in self.savings.total_rows():
+            lines.append(f"#   {resource}: requested {requested}, recommended {recommended}, "
+                         f"over-provisioned {over}, under-provisioned {under}, net reclaimable {net}")
+        self.file.write('\n'.join(lines) + '\n')
+
+
+class RecommendationApplier:
+    """Patches target recommendations into workloads through the Kubernetes API.
+
+    Each workload gets a single strategic merge patch setting the requests of all its
+    recommended containers. Patches are sent over the reporter's bounded worker pool, so
+    hundreds of workloads are updated in seconds rather than one kubectl process each.
+    """
+
+    FIELD_MANAGER = 'vpa-goldilocks-reporter'
+
+    # Update modes in which the VPA updater leaves pod requests to the workload spec
+    APPLICABLE_UPDATE_MODES = ('Off', 'Initial')
+
+    # AppsV1Api patch method of each supported workload kind
+    PATCH_METHODS = {
+        'Deployment': 'patch_namespaced_deployment',
+        'StatefulSet': 'patch_namespaced_stateful_set',
+        'DaemonSet': 'patch_namespaced_daemon_set'
+    }
+
+    # Result of a workload patch, in the order results are listed
+    RESULTS = ('failed', 'patched', 'dry-run', 'unchanged', 'skipped')
+
+    def __init__(self, reporter: VPARecommendationReporter, dry_run: bool = False):
+        self.reporter = reporter
+        self.dry_run = dry_run
+        # (namespace, kind, name) -> container requests to set, merged across VPAs
+        self.patches: Dict[Tuple[str, str, str], Dict[str, Dict[str, str]]] = {}
+        self.results: List[Dict] = []
+
+    def collecting(self, vpas: Iterable[VPARecord]) -> Iterator[VPARecord]:
+        """Pass VPAs through while collecting the patch of each target workload."""
+        for vpa in vpas:
+            self.add(vpa)
+            yield vpa
+
+    def add(self, vpa: VPARecord) -> None:
+        """Plan the patch for the workload a VPA targets, or record why it is skipped."""
+        key = (vpa.namespace, vpa.kind, vpa.workload)
+        container_requests = self.reporter.recommended_requests(vpa)
+        if not container_requests:
+            return
+
+        if vpa.update_mode not in self.APPLICABLE_UPDATE_MODES:
+            self._result(key, container_requests, 'skipped', f"VPA {vpa.name} manages requests (updateMode {vpa.update_mode})")
+        elif vpa.kind not in self.PATCH_METHODS:
+            self._result(key, container_requests, 'skipped', f"{vpa.kind} is not supported")
+        elif key not in self.reporter.workload_index:
+            self._result(key, container_requests, 'skipped', "target workload not found")
+        elif self._is_unchanged(vpa, container_requests):
+            self._result(key, container_requests, 'unchanged', "requests already match the targets")
+        else:
+            self.patches.setdefault(key, {}).update(container_requests)
+
+    @staticmethod
+    def _is_unchanged(vpa: VPARecord, container_requests: Dict[str, Dict[str, str]]) -> bool:
+        """Return whether every container already requests exactly its rounded target."""
+        rows = {row.name: row for row in vpa.containers}
+        return all(
+            parse_quantity_cached(quantity, resource_type) == rows[name].value('requests', resource_type)
+            for name, requests in container_requests.items()
+            for resource_type, quantity in requests.items()
+        )
+
+    def _result(self, key: Tuple[str, str, str], container_requests: Dict, result: str, message: str = '') -> Dict:
+        namespace, kind, name = key
+        entry = {
+            'namespace': namespace,
+            'kind': kind,
+            'name': name,
+            'containers': container_requests,
+            'result': result,
+            'message': message
+        }
+        self.results.append(entry)
+        return entry
+
+    def _patch(self, item: Tuple[Tuple[str, str, str], Dict[str, Dict[str, str]]]) -> Dict:
+        """Send the patch of one workload and return its result."""
+        key, container_requests = item
+        namespace, kind, name = key
+        patch_func = getattr(self.reporter.apps_v1, self.PATCH_METHODS[kind])
+        options = {'field_manager': self.FIELD_MANAGER}
+        if self.dry_run:
+            options['dry_run'] = 'All'
+
+        try:
+            # The patched object is not needed: its response is discarded undeserialized and the
+            # connection handed back to the pool, which would otherwise run dry over many workloads
+            response = self.reporter._call_api(patch_func, name, namespace, requests_patch(kind, container_requests),
+                                               _preload_content=False, **options)
+            response.drain_conn()
+            response.release_conn()
+        except ApiException as e:
+            return self._result(key, container_requests, 'failed', self._error_message(e))
+        except Exception as e:
+            return self._result(key, container_requests, 'failed', str(e))
+        return self._result(key, container_requests, 'dry-run' if self.dry_run else 'patched')
+
+    @staticmethod
+    def _error_message(error: ApiException) -> str:
+        """Extract the reason the API server gives for rejecting a patch."""
+        try:
+            return json_loads(error.body).get('message') or str(error.reason)
+        except (TypeError, ValueError, AttributeError):
+            return f"{error.status} {error.reason}"
+
+    def apply(self) -> List[Dict]:
+        """Send every planned patch and return the results of all workloads."""
+        self.reporter._map_concurrent(self._patch, list(self.patches.items()),
+                                      description="Applying recommendations...")
+        order = {result: index for index, result in enumerate(self.RESULTS)}
+        self.results.sort(key=lambda entry: (order[entry['result']], entry['namespace'], entry['kind'], entry['name']))
+        return self.results
+
+    def print_results(self) -> None:
+        """Print one row per workload and a count of each result."""
+        console = self.reporter.console
+        if not self.results:
+            console.print("[yellow]No recommendations to apply.[/yellow]")
+            return
+
+        styles = {'failed': 'red', 'patched': 'green', 'dry-run': 'cyan', 'unchanged': 'dim', 'skipped': 'yellow'}
+        title = "Applied Recommendations (server dry run)" if self.dry_run else "Applied Recommendations"
+        table = Table(title=title)
+        table.add_column("Workload", style="cyan")
+        table.add_column("Containers")
+        table.add_column("Result")
+        table.add_column("Details")
+
+        for entry in self.results:
+            containers = ', '.join(
+                f"{name} ({', '.join(f'{resource}={value}' for resource, value in requests.items())})"
+                for name, requests in entry['containers'].items()
+            )
+            style = styles[entry['result']]
+            table.add_row(f"{entry['namespace']}/{entry['kind']}/{entry['name']}", containers,
+                          f"[{style}]{entry['result']}[/{style}]", entry['message'])
+
+        console.print(table)
+        counts = {result: 0 for result in self.RESULTS}
+        for entry in self.results:
+            counts[entry['result']] += 1
+        console.print(', '.join(f"{count} {result}" for result, count in counts.items() if count))
+
+    @property
+    def failed(self) -> bool:
+        return any(entry['result'] == 'failed' for entry in self.results)
+
+
+class ValuesFile:
+    """Edits scalar values of a Helm values.yaml in place, line by line.
+
+    Only the lines of changed values are rewritten and missing mappings are inserted with the
+    indentation of their siblings, or the file's own indentation step for a mapping without
+    children, so comments, quoting and key order survive untouched, which a load and dump round
+    trip would not preserve. Flow mappings of plain scalars, such as `requests: {cpu: 100m}`,
+    are expanded to block mappings before children are set.
+    """
+
+    KEY_PATTERN = r'^(?P<indent> *)(?P<key>{key}):(?P<rest>.*)$'
+
+    # A scalar value, its quotes and an optional trailing comment
+    SCALAR_PATTERN = re.compile(r'^(?P<space>\s*)(?P<quote>["\']?)(?P<value>[^"\'#\s]*)(?P=quote)(?P<comment>\s*(#.*)?)$')
+
+    # A flow mapping without nested collections, and one `key: scalar` item of it
+    FLOW_MAPPING_PATTERN = re.compile(r'^\{(?P<items>[^{}\[\]]*)\}\s*(?P<comment>#.*)?$')
+    FLOW_ITEM_PATTERN = re.compile(r'^\s*(?P<key>[\w.\-/]+)\s*:\s+(?P<value>"[^"]*"|\'[^\']*\'|[^"\'\s]+)\s*$')
+
+    # Plain scalars YAML reads as null
+    NULL_VALUES = ('', '~', 'null', 'Null', 'NULL')
+
+    # Indentation step of files whose mappings never nest
+    DEFAULT_INDENT = 2
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.original = path.read_text()
+        self.lines = self.original.splitlines(keepends=True)
+        self.indent_step = self._detect_indent_step()
+
+    def _detect_indent_step(self) -> int:
+        """The most common indentation of a nested mapping's first child relative to its key."""
+        steps: Dict[int, int] = {}
+        parent = None
+        for line in self.lines:
+            if not self._is_content(line):
+                continue
+            indent = self._indent(line)
+            if parent is not None and indent > parent:
+                steps[indent - parent] = steps.get(indent - parent, 0) + 1
+            # Only a key without a value on its line opens a nested block
+            key_line = re.match(r'^ *[^\s#:][^:]*:\s*(#.*)?$', line.rstrip('\n'))
+            parent = indent if key_line and not line.lstrip().startswith('- ') else None
+        return max(steps, key=lambda step: (steps[step], -step)) if steps else self.DEFAULT_INDENT
+
+    @staticmethod
+    def _is_content(line: str) -> bool:
+        stripped = line.strip()
+        return bool(stripped) and not stripped.startswith('#')
+
+    @staticmethod
+    def _indent(line: str) -> int:
+        return len(line) - len(line.lstrip(' '))
+
+    def _block_end(self, index: int, indent: int) -> int:
+        """Index after the last content line of the mapping whose key is at index (-1 for the document)."""
+        end = index + 1
+        for position in range(index + 1, len(self.lines)):
+            line = self.lines[position]
+            if not self._is_content(line):
+                continue
+            if self._indent(line) <= indent:
+                break
+            end = position + 1
+        return end if index >= 0 else len(self.lines)
+
+    def _child_indent(self, index: int, indent: int) -> int:
+        """Indentation of the children of the mapping at index, or one indentation step more than its key."""
+        for position in range(index + 1, self._block_end(index, indent)):
+            if self._is_content(self.lines[position]):
+                return self._indent(self.lines[position])
+        return indent + self.indent_step if index >= 0 else 0
+
+    def _find(self, index: int, indent: int, key: str) -> Optional[Tuple[int, int]]:
+        """Return the line and indentation of key among the children of the mapping at index."""
+        child_indent = self._child_indent(index, indent)
+        pattern = re.compile(self.KEY_PATTERN.format(key=re.escape(key)))
+        for position in range(index + 1, self._block_end(index, indent)):
+            match = pattern.match(self.lines[position].rstrip('\n'))
+            if match and len(match.group('indent')) == child_indent:
+                return position, child_indent
+        return None
+
+    def _ensure(self, index: int, indent: int, key: str) -> Tuple[int, int]:
+        """Return the mapping key among the children of the mapping at index, appending it if missing."""
+        found = self._find(index, indent, key)
+        if found:
+            position, child_indent = found
+            rest = self.lines[position].rstrip('\n').split(':', 1)[1].strip()
+            if rest in self.NULL_VALUES[1:]:
+                # A null mapping such as `requests: ~` is set up to hold children
+                self.lines[position] = f"{' ' * child_indent}{key}:\n"
+            elif rest.startswith('{'):
+                self._expand_flow_mapping(position, child_indent, key, rest)
+            elif rest and not rest.startswith('#'):
+                raise ValueError(f"{key} is not a mapping in {self.path}")
+            return found
+
+        child_indent = self._child_indent(index, indent)
+        position = self._block_end(index, indent)
+        if position and not self.lines[position - 1].endswith('\n'):
+            self.lines[position - 1] += '\n'
+        self.lines.insert(position, f"{' ' * child_indent}{key}:\n")
+        return position, child_indent
+
+    def _expand_flow_mapping(self, position: int, indent: int, key: str, rest: str) -> None:
+        """Rewrite a flow mapping of plain scalars, such as `resources: {}`, as a block mapping."""
+        match = self.FLOW_MAPPING_PATTERN.match(rest)
+        items = [item for item in match.group('items').split(',') if item.strip()] if match else None
+        children = [self.FLOW_ITEM_PATTERN.match(item) for item in items or []]
+        if items is None or not all(children):
+            raise ValueError(f"{key} is a flow mapping that cannot be expanded in {self.path}: {rest}")
+
+        comment = f"  {match.group('comment')}" if match.group('comment') else ''
+        child_prefix = ' ' * (indent + self.indent_step)
+        self.lines[position:position + 1] = [f"{' ' * indent}{key}:{comment}\n"] + [
+            f"{child_prefix}{child.group('key')}: {child.group('value')}\n" for child in children
+        ]
+
+    def _locate(self, path: Tuple[str, ...]) -> Optional[Tuple[int, int]]:
+        """Return the line and indentation of a key path, or None if any key is missing."""
+        found = (-1, -1)
+        for key in path:
+            found = self._find(*found, key)
+            if not found:
+                return None
+        return found
+
+    def has(self, path: Tuple[str, ...]) -> bool:
+        return self._locate(path) is not None
+
+    def get(self, path: Tuple[str, ...]) -> Optional[str]:
+        """Return the scalar at a key path, or None if it is not set."""
+        found = self._locate(path)
+        if not found:
+            return None
+        match = self.SCALAR_PATTERN.match(self.lines[found[0]].rstrip('\n').split(':', 1)[1])
+        if not match or (not match.group('quote') and match.group('value') in self.NULL_VALUES):
+            return None
+        return match.group('value') or None
+
+    def set(self, path: Tuple[str, ...], value: str) -> None:
+        """Set the scalar at a key path, keeping its quoting and comment, creating missing mappings."""
+        index, indent = -1, -1
+        for key in path[:-1]:
+            index, indent = self._ensure(index, indent, key)
+
+        found = self._find(index, indent, path[-1])
+        if found is None:
+            position, child_indent = self._ensure(index, indent, path[-1])
+            self.lines[position] = f'{" " * child_indent}{path[-1]}: "{value}"\n'
+            return
+
+        position, child_indent = found
+        key_part, value_part = self.lines[position].rstrip('\n').split(':', 1)
+        match = self.SCALAR_PATTERN.match(value_part)
+        if not match:
+            raise ValueError(f"{'.'.join(path)} is not a scalar in {self.path}")
+        # Values that were unset or null are quoted like newly inserted ones
+        quote = match.group('quote') or ('"' if match.group('value') in self.NULL_VALUES else '')
+        self.lines[position] = f"{key_part}: {quote}{value}{quote}{match.group('comment')}\n"
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.lines)
+
+    def diff(self, name: str) -> List[str]:
+        """Unified diff of the edits, with git-style a/ and b/ file names."""
+        return list(difflib.unified_diff(self.original.splitlines(keepends=True), self.lines,
+                                         fromfile=f"a/{name}", tofile=f"b/{name}"))
+
+    def save(self) -> None:
+        self.path.write_text(self.text)
+
+
+class ValuesRewriter:
+    """Writes target recommendations into the values.yaml of the Helm chart deploying each workload.
+
+    The charts are indexed once: every Deployment, StatefulSet and DaemonSet template is mapped
+    to the values file and `pods.<key>` entry it reads its image and resources from. Workloads
+    are deployed as release `<chart>` into namespace `<chart>` by the cluster app-of-apps, so a
+    VPA target resolves to its chart by namespace and the workload name the template renders.
+    """
+
+    WORKLOAD_KINDS = ('Deployment', 'StatefulSet', 'DaemonSet')
+    RELEASE_NAME_PATTERN = re.compile(r'\{\{-?\s*\.Release\.Name\s*-?\}\}')
+    POD_KEY_PATTERN = re.compile(r'\.Values\.pods\.(\w+)\.')
+    RESOURCES_PATTERN = re.compile(r'\.Values\.pods\.(\w+)\.resources\b')
+
+    # Result of a workload rewrite, in the order results are listed
+    RESULTS = ('updated', 'unchanged', 'skipped')
+
+    def __init__(self, reporter: VPARecommendationReporter, charts_dir: Path = DEFAULT_CHARTS_DIR,
+                 dry_run: bool = False):
+        self.reporter = reporter
+        self.charts_dir = Path(charts_dir)
+        self.dry_run = dry_run
+        # (namespace, kind, name) -> values file, pod keys referenced and pod keys with templated resources
+        self.index: Dict[Tuple[str, str, str], Dict] = {}
+        self.requests: Dict[Tuple[str, str, str], Dict[str, Dict[str, str]]] = {}
+        self.results: List[Dict] = []
+        self.diffs: List[str] = []
+        self._index_charts()
+
+    def _index_charts(self) -> None:
+        for chart_file in sorted(self.charts_dir.glob('*/*/Chart.yaml')):
+            chart_dir = chart_file.parent
+            values_path = chart_dir / 'values.yaml'
+            if not values_path.exists():
+                continue
+            release = chart_dir.name
+            for template in sorted((chart_dir / 'templates').glob('*.yaml')):
+                for document in re.split(r'^---\s*$', template.read_text(), flags=re.MULTILINE):
+                    workload = self._template_workload(document, release)
+                    if workload:
+                        self.index[workload] = {
+                            'values': values_path,
+                            'keys': list(dict.fromkeys(self.POD_KEY_PATTERN.findall(document))),
+                            'templated': set(self.RESOURCES_PATTERN.findall(document))
+                        }
+        logger.info(f"Indexed {len(self.index)} workloads in {self.charts_dir}")
+
+    def _template_workload(self, document: str, release: str) -> Optional[Tuple[str, str, str]]:
+        """Return the namespace, kind and rendered name of a workload template, if it is one."""
+        kind = re.search(r'^kind:\s*(\w+)\s*$', document, re.MULTILINE)
+        if not kind or kind.group(1) not in self.WORKLOAD_KINDS:
+            return None
+
+        metadata = {}
+        block = re.search(r'^metadata:[ \t]*(?:#.*)?\n(?P<children>(?:(?:[ \t]+.*|[ \t]*)(?:\n|$))*)', document, re.MULTILINE)
+        children = block.group('children') if block else ''
+        # The fields are direct children, at the indentation of the first line of the block
+        child_indent = re.match(r'^(?:[ \t]*(?:#.*)?\n)*(?P<indent>[ \t]*)', children).group('indent')
+        for field in ('name', 'namespace'):
+            match = re.search(rf'^{child_indent}{field}:\s*(.+?)\s*$', children, re.MULTILINE) if child_indent else None
+            if match:
+                metadata[field] = self.RELEASE_NAME_PATTERN.sub(release, match.group(1)).strip('"\'')
+        name = metadata.get('name')
+        namespace = metadata.get('namespace', release)
+        if not name or '{{' in name or '{{' in namespace:
+            return None
+        return namespace, kind.group(1), name
+
+    def collecting(self, vpas: Iterable[VPARecord]) -> Iterator[VPARecord]:
+        """Pass VPAs through while collecting the rounded targets of every workload."""
+        for vpa in vpas:
+            container_requests = self.reporter.recommended_requests(vpa)
+            if container_requests:
+                self.requests.setdefault((vpa.namespace, vpa.kind, vpa.workload), {}).update(container_requests)
+            yield vpa
+
+    @staticmethod
+    def _pod_key(container_name: str, chart_workload: Dict) -> Optional[str]:
+        """The pods.<key> entry of a container: the key named after it, or the template's only key."""
+        keys = chart_workload['keys']
+        if container_name in keys:
+            return container_name
+        return keys[0] if len(keys) == 1 else None
+
+    def _result(self, key: Tuple[str, str, str], values: Optional[Path], containers: Dict,
+                result: str, message: str = '') -> None:
+        namespace, kind, name = key
+        self.results.append({
+            'namespace': namespace,
+            'kind': kind,
+            'name': name,
+            'values': str(values.relative_to(self.charts_dir.parent)) if values else '',
+            'containers': containers,
+            'result': result,
+            'message': message
+        })
+
+    def rewrite(self) -> List[Dict]:
+        """Update every values file once with all its workloads' requests and collect the diffs."""
+        files: Dict[Path, ValuesFile] = {}
+
+        for key, container_requests in sorted(self.requests.items()):
+            chart_workload = self.index.get(key)
+            if chart_workload is None:
+                self._result(key, None, container_requests, 'skipped', "no chart deploys this workload")
+                continue
+
+            values_path = chart_workload['values']
+            if values_path not in files:
+                files[values_path] = ValuesFile(values_path)
+            values_file = files[values_path]
+            changed = False
+            problems = []
+            for container_name, requests in container_requests.items():
+                pod_key = self._pod_key(container_name, chart_workload)
+                if pod_key is None:
+                    problems.append(f"no pods entry for container {container_name}")
+                    continue
+                if pod_key not in chart_workload['templated']:
+                    problems.append(f"template does not read pods.{pod_key}.resources")
+                    continue
+                if not values_file.has(('pods', pod_key)):
+                    problems.append(f"values have no pods.{pod_key}")
+                    continue
+                for resource_type, quantity in requests.items():
+                    path = ('pods', pod_key, 'resources', 'requests', resource_type)
+                    current = values_file.get(path)
+                    # Equal quantities written differently (1000m and 1) are left alone
+                    if current and parse_quantity_cached(current, resource_type) == parse_quantity_cached(quantity, resource_type):
+                        continue
+                    try:
+                        values_file.set(path, quantity)
+                    except ValueError as e:
+                        problems.append(str(e))
+                        continue
+                    changed = True
+
+            if changed:
+                self._result(key, values_path, container_requests, 'updated', '; '.join(problems))
+            elif problems:
+                self._result(key, values_path, container_requests, 'skipped', '; '.join(problems))
+            else:
+                self._result(key, values_path, container_requests, 'unchanged', "values already match the targets")
+
+        for values_path, values_file in sorted(files.items()):
+            if values_file.text == values_file.original:
+                continue
+            self.diffs.extend(values_file.diff(str(values_path.relative_to(self.charts_dir.parent))))
+            if not self.dry_run:
+                values_file.save()
+
+        order = {result: index for index, result in enumerate(self.RESULTS)}
+        self.results.sort(key=lambda entry: (order[entry['result']], entry['namespace'], entry['kind'], entry['name']))
+        return self.results
+
+    def print_results(self) -> None:
+        """Print the unified diff of all values files and one row per workload."""
+        console = self.reporter.console
+        if self.diffs:
+            console.print(''.join(self.diffs), markup=False, highlight=False, end='')
+
+        if not self.results:
+            console.print("[yellow]No recommendations to write.[/yellow]")
+            return
+
+        styles = {'updated': 'green', 'unchanged': 'dim', 'skipped': 'yellow'}
+        title = "Chart Values (dry run, nothing written)" if self.dry_run else "Chart Values"
+        table = Table(title=title)
+        table.add_column("Workload", style="cyan")
+        table.add_column("Values File")
+        table.add_column("Result")
+        table.add_column("Details")
+        for entry in self.results:
+            style = styles[entry['result']]
+            table.add_row(f"{entry['namespace']}/{entry['kind']}/{entry['name']}", entry['values'],
+                          f"[{style}]{entry['result']}[/{style}]", entry['message'])
+        console.print(table)
+
+        counts = {result: 0 for result in self.RESULTS}
+        for entry in self.results:
+            counts[entry['result']] += 1
+        files = len({entry['values'] for entry in self.results if entry['result'] == 'updated'})
+        console.print(', '.join(f"{count} {result}" for result, count in counts.items() if count)
+                      + f" across {len(self.index)} indexed workloads; "
+                      + f"{files} values files {'to change' if self.dry_run else 'changed'}")
+
+
+class VPAWatcher:
+    """Informer-style cache of VPAs and their target workloads, kept current from watch events.
+
+    Everything is listed once, then watch events update the in-memory state. Only VPAs whose
+    recommendation, target or target workload spec changed are processed again.
+    """
+
+    # Seconds before the server ends a watch request; the watch is then resumed from the last event
+    WATCH_TIMEOUT = 300
+
+    # Seconds to wait before restarting a watch that failed for reasons other than 410 Gone
+    RETRY_DELAY = 5
+
+    def __init__(self, reporter: VPARecommendationReporter, namespace: Optional[str] = None):
+        self.reporter = reporter
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+
+        # (namespace, name) -> raw VPA object and its processed report entry
+        self.vpa_items: Dict[Tuple[str, str], Dict] = {}
+        self.processed: Dict[Tuple[str, str], VPARecord] = {}
+        # (namespace, kind, name) of a target workload -> VPAs pointing at it
+        self.vpas_by_target: Dict[Tuple[str, str, str], Set[Tuple[str, str]]] = {}
+        # VPAs to process again, and VPAs removed since the last refresh
+        self.dirty: Set[Tuple[str, str]] = set()
+        self.deleted: Set[Tuple[str, str]] = set()
+
+    def _sources(self) -> Dict[str, Tuple[Callable, Tuple]]:
+        """Return the list function and its positional arguments for every watched resource."""
+        reporter = self.reporter
+        if self.namespace:
+            sources = {
+                'VerticalPodAutoscaler': (reporter.custom_objects_api.list_namespaced_custom_object,
+                                          (reporter.VPA_GROUP, reporter.VPA_VERSION, self.namespace,
+                                           reporter.VPA_PLURAL))
+            }
+        else:
+            sources = {
+                'VerticalPodAutoscaler': (reporter.custom_objects_api.list_cluster_custom_object,
+                                          (reporter.VPA_GROUP, reporter.VPA_VERSION, reporter.VPA_PLURAL))
+            }
+
+        # Every workload kind is watched since new VPAs may target any of them
+        for kind in reporter.WORKLOAD_KINDS:
+            cluster_list_func, namespaced_list_func = reporter._workload_list_functions(kind)
+            if self.namespace:
+                sources[kind] = (namespaced_list_func, (self.namespace,))
+            else:
+                sources[kind] = (cluster_list_func, ())
+
+        return sources
+
+    def _list_kwargs(self) -> Dict:
+        """Extra arguments for the list and watch calls of every source."""
+        return {} if self.namespace else self.reporter._cluster_list_kwargs()
+
+    def _covers(self, item: Dict) -> bool:
+        """Return whether a listed or watched object lies in a reported namespace."""
+        return self.reporter._covers_namespace(item.get('metadata', {}).get('namespace'), self.namespace)
 
-        # Get target reference information
-        target_ref = spec.get('targetRef', {})
+    def start(self) -> None:
+        """List every watched resource once and start one watch thread per resource."""
+        if not self.namespace:
+            self.reporter._resolve_namespace_selector()
 
-        # Extract recommendations
-        recommendations = {}
-        if 'recommendation' in status:
-            recommendation = status['recommendation']
-            container_recommendations = recommendation.get('containerRecommendations', [])
-
-            for container_rec in container_recommendations:
-                container_name = container_rec.get('containerName')
-
-                recommendations[container_name] = {
-                    'lowerBound': container_rec.get('lowerBound', {}),
-                    'target': container_rec.get('target', {}),
-                    'upperBound': container_rec.get('upperBound', {}),
-                    'uncappedTarget': container_rec.get('uncappedTarget', {})
-                }
+        for resource, (list_func, args) in self._sources().items():
+            resource_version = self._relist(resource, list_func, args)
+            thread = threading.Thread(
+                target=self._watch,
+                args=(resource, list_func, args, resource_version),
+                name=f"watch-{resource}",
+                daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
 
-        # Get current resource configuration if available
-        current_resources = self._get_current_resources(
-            namespace,
-            target_ref.get('kind'),
-            target_ref.get('name')
-        )
+    def stop(self) -> None:
+        """Ask the watch threads to stop."""
+        self.stop_event.set()
 
-        return {
-            'name': metadata.get('name'),
-            'namespace': namespace,
-            'target': {
-                'kind': target_ref.get('kind'),
-                'name': target_ref.get('name'),
-                'apiVersion': target_ref.get('apiVersion')
-            },
-            'updateMode': spec.get('updatePolicy', {}).get('updateMode', 'Off'),
-            'recommendations': recommendations,
-            'currentResources': current_resources,
-            'lastUpdated': status.get('lastRecommendation'),
-            'conditions': status.get('conditions', [])
-        }
+    def _relist(self, resource: str, list_func: Callable, args: Tuple) -> Optional[str]:
+        """List a resource from scratch, replacing what is known about it, and return its resourceVersion."""
+        items, resource_version = self.reporter._list_paginated(list_func, *args, **self._list_kwargs())
+        items = [item for item in items if self._covers(item)]
 
-    def _get_current_resources(self, namespace: str, kind: str, name: str) -> Dict:
-        """Get current resource configuration for the target workload."""
-        try:
-            if kind == 'Deployment':
-                deployment = self.apps_v1.read_namespaced_deployment(name, namespace)
-                containers = deployment.spec.template.spec.containers
-            elif kind == 'StatefulSet':
-                statefulset = self.apps_v1.read_namespaced_stateful_set(name, namespace)
-                containers = statefulset.spec.template.spec.containers
-            elif kind == 'DaemonSet':
-                daemonset = self.apps_v1.read_namespaced_daemon_set(name, namespace)
-                containers = daemonset.spec.template.spec.containers
+        with self.lock:
+            if resource == 'VerticalPodAutoscaler':
+                listed = set()
+                for item in items:
+                    metadata = item.get('metadata', {})
+                    listed.add((metadata.get('namespace'), metadata.get('name')))
+                    self._apply_vpa_event('ADDED', item)
+                for key in set(self.vpa_items) - listed:
+                    self._apply_vpa_event('DELETED', self.vpa_items[key])
             else:
-                return {}
-
-            current_resources = {}
-            for container in containers:
-                resources = container.resources
-                current_resources[container.name] = {
-                    'requests': resources.requests or {},
-                    'limits': resources.limits or {}
-                }
+                listed = set()
+                for item in items:
+                    workload = self.reporter._extract_workload(item)
+                    listed.add((workload['namespace'], resource, workload['name']))
+                    self._apply_workload_event(resource, 'ADDED', workload)
+                for key in [key for key in self.reporter.workload_index if key[1] == resource]:
+                    if key not in listed:
+                        self._apply_workload_event(resource, 'DELETED', {'namespace': key[0], 'name': key[2]})
 
-            return current_resources
-
-        except Exception as e:
-            logger.warning(f"Could not fetch current resources for {kind}/{name} in {namespace}: {e}")
-            return {}
+        return resource_version
 
-    def generate_console_report(self, vpas: List[Dict]) -> None:
-        """Generate a console report using Rich tables."""
-        if not vpas:
-            self.console.print("[yellow]No VPA recommendations found.[/yellow]")
-            return
+    def _watch(self, resource: str, list_func: Callable, args: Tuple, resource_version: Optional[str]) -> None:
+        """Consume watch events for one resource until stopped, re-listing on 410 Gone.
 
-        # Summary table
-        summary_table = Table(title="VPA Recommendations Summary")
-        summary_table.add_column("Namespace", style="cyan")
-        summary_table.add_column("VPA Name", style="green")
-        summary_table.add_column("Target", style="blue")
-        summary_table.add_column("Update Mode", style="magenta")
-        summary_table.add_column("Containers", justify="center")
+        Watch requests go through the reporter like lists, so they are counted and timed, and
+        events are parsed into plain dicts rather than typed models. Every event, bookmarks
+        included, advances the resourceVersion the next watch request resumes from.
+        """
+        while not self.stop_event.is_set():
+            try:
+                for event in self.reporter._iter_watch_events(list_func, *args, resource_version=resource_version,
+                                                              allow_watch_bookmarks=True,
+                                                              timeout_seconds=self.WATCH_TIMEOUT,
+                                                              **self._list_kwargs()):
+                    resource_version = (event.get('object') or {}).get('metadata', {}).get(
+                        'resourceVersion', resource_version)
+                    self._handle_event(resource, event)
+                    if self.stop_event.is_set():
+                        break
+            except ApiException as e:
+                if e.status == 410:
+                    logger.info(f"{resource} watch expired (410 Gone), re-listing")
+                    resource_version = self._relist(resource, list_func, args)
+                else:
+                    logger.warning(f"{resource} watch failed, retrying: {e}")
+                    self.stop_event.wait(self.RETRY_DELAY)
+            except Exception as e:
+                logger.warning(f"{resource} watch interrupted, retrying: {e}")
+                self.stop_event.wait(self.RETRY_DELAY)
 
-        for vpa in vpas:
-            summary_table.add_row(
-                vpa['namespace'],
-                vpa['name'],
-                f"{vpa['target']['kind']}/{vpa['target']['name']}",
-                vpa['updateMode'],
-                str(len(vpa['recommendations']))
-            )
+    def _handle_event(self, resource: str, event: Dict) -> None:
+        """Apply a single watch event to the in-memory state."""
+        event_type = event['type']
+        if event_type not in ('ADDED', 'MODIFIED', 'DELETED') or not self._covers(event['object']):
+            return
 
-        self.console.print(summary_table)
+        with self.lock:
+            if resource == 'VerticalPodAutoscaler':
+                self._apply_vpa_event(event_type, event['object'])
+            else:
+                workload = self.reporter._extract_workload(event['object'])
+                self._apply_workload_event(resource, event_type, workload)
 
-        # Detailed recommendations for each VPA
-        for vpa in vpas:
-            if not vpa['recommendations']:
-                continue
+    @staticmethod
+    def _vpa_target_key(item: Dict) -> Tuple[str, str, str]:
+        target_ref = item.get('spec', {}).get('targetRef', {})
+        return (item.get('metadata', {}).get('namespace'), target_ref.get('kind'), target_ref.get('name'))
 
-            self.console.print(f"\n[bold blue]VPA: {vpa['namespace']}/{vpa['name']}[/bold blue]")
-            self.console.print(f"Target: {vpa['target']['kind']}/{vpa['target']['name']}")
+    @staticmethod
+    def _vpa_fingerprint(item: Dict) -> str:
+        """Serialize the parts of a VPA that affect its report entry."""
+        spec = item.get('spec', {})
+        status = item.get('status', {})
+        return json.dumps([
+            spec.get('targetRef'),
+            spec.get('updatePolicy'),
+            status.get('recommendation'),
+            status.get('conditions')
+        ], sort_keys=True, default=str)
 
-            for container_name, rec in vpa['recommendations'].items():
-                detail_table = Table(title=f"Container: {container_name}")
-                detail_table.add_column("Resource Type")
-                detail_table.add_column("Current", style="yellow")
-                detail_table.add_column("Lower Bound", style="red")
-                detail_table.add_column("Target", style="green")
-                detail_table.add_column("Upper Bound", style="blue")
+    def _apply_vpa_event(self, event_type: str, item: Dict) -> None:
+        """Update the VPA state, marking the VPA for processing if its report entry changes. Needs self.lock."""
+        item = self.reporter._extract_vpa(item)
+        metadata = item.get('metadata', {})
+        key = (metadata.get('namespace'), metadata.get('name'))
+        previous = self.vpa_items.get(key)
 
-                # CPU recommendations
-                current_cpu = vpa['currentResources'].get(container_name, {}).get('requests', {}).get('cpu', 'N/A')
-                detail_table.add_row(
-                    "CPU",
-                    self.format_resource_value(current_cpu, 'cpu'),
-                    self.format_resource_value(rec['lowerBound'].get('cpu', 'N/A'), 'cpu'),
-                    self.format_resource_value(rec['target'].get('cpu', 'N/A'), 'cpu'),
-                    self.format_resource_value(rec['upperBound'].get('cpu', 'N/A'), 'cpu')
-                )
+        if previous is not None:
+            self.vpas_by_target.get(self._vpa_target_key(previous), set()).discard(key)
 
-                # Memory recommendations
-                current_memory = vpa['currentResources'].get(container_name, {}).get('requests', {}).get('memory', 'N/A')
-                detail_table.add_row(
-                    "Memory",
-                    self.format_resource_value(current_memory, 'memory'),
-                    self.format_resource_value(rec['lowerBound'].get('memory', 'N/A'), 'memory'),
-                    self.format_resource_value(rec['target'].get('memory', 'N/A'), 'memory'),
-                    self.format_resource_value(rec['upperBound'].get('memory', 'N/A'), 'memory')
-                )
+        if event_type == 'DELETED':
+            if previous is not None:
+                del self.vpa_items[key]
+                self.processed.pop(key, None)
+                self.dirty.discard(key)
+                self.deleted.add(key)
+            return
 
-                self.console.print(detail_table)
+        self.vpa_items[key] = item
+        self.vpas_by_target.setdefault(self._vpa_target_key(item), set()).add(key)
+        if previous is None or self._vpa_fingerprint(previous) != self._vpa_fingerprint(item):
+            self.dirty.add(key)
+            self.deleted.discard(key)
 
-    def generate_json_report(self, vpas: List[Dict], output_path: str) -> None:
-        """Generate a JSON report."""
-        report = {
-            'metadata': {
-                'generatedAt': datetime.now().isoformat(),
-                'totalVPAs': len(vpas),
-                'generator': 'vpa-goldilocks-reporter'
-            },
-            'vpas': vpas
-        }
+    def _apply_workload_event(self, kind: str, event_type: str, workload: Dict) -> None:
+        """Update the workload index, marking VPAs that target a changed workload. Needs self.lock."""
+        key = (workload['namespace'], kind, workload['name'])
+        index = self.reporter.workload_index
 
-        output_file = Path(output_path)
-        with output_file.open('w') as f:
-            json.dump(report, f, indent=2, default=str)
+        if event_type == 'DELETED':
+            if index.pop(key, None) is None:
+                return
+        elif index.get(key) == self.reporter._index_entry(workload):
+            # Status-only updates (e.g. rollout progress) do not change the report
+            return
+        else:
+            index[key] = self.reporter._index_entry(workload)
 
-        self.console.print(f"[green]JSON report generated: {output_path}[/green]")
+        self.dirty.update(self.vpas_by_target.get(key, ()))
 
-    def generate_yaml_report(self, vpas: List[Dict], output_path: str) -> None:
-        """Generate a YAML report."""
-        report = {
-            'metadata': {
-                'generatedAt': datetime.now().isoformat(),
-                'totalVPAs': len(vpas),
-                'generator': 'vpa-goldilocks-reporter'
-            },
-            'vpas': vpas
-        }
+    def refresh(self) -> Tuple[List[VPARecord], List[VPARecord], List[Tuple[str, str]]]:
+        """Process VPAs changed since the last refresh.
 
-        output_file = Path(output_path)
-        with output_file.open('w') as f:
-            yaml.dump(report, f, indent=2, default_flow_style=False)
+        Returns every report entry, the entries that changed and the keys of removed VPAs.
+        """
+        with self.lock:
+            changed = []
+            for key in sorted(self.dirty):
+                self.processed[key] = self.reporter._process_vpa(self.vpa_items[key], key[0])
+                changed.append(self.processed[key])
+            deleted = sorted(self.deleted)
+            self.dirty.clear()
+            self.deleted.clear()
+            vpas = [self.processed[key] for key in sorted(self.processed)]
 
-        self.console.print(f"[green]YAML report generated: {output_path}[/green]")
+        return vpas, changed, deleted
 
-    def generate_markdown_report(self, vpas: List[Dict], output_path: str) -> None:
-        """Generate a Markdown report."""
+    def run(self, formats: List[str], output_paths: Dict[str, str], interval: int) -> None:
+        """Re-render reports every interval seconds while anything changed, until interrupted."""
+        self.start()
         try:
-            markdown_content = self._create_markdown_template(vpas)
+            while not self.stop_event.is_set():
+                vpas, changed, deleted = self.refresh()
 
-            output_file = Path(output_path)
-            with output_file.open('w') as f:
-                f.write(markdown_content)
+                if changed or deleted:
+                    for report_format in formats:
+                        if report_format == 'console':
+                            # Only show what changed, the full state was printed before
+                            for namespace, name in deleted:
+                                self.reporter.console.print(f"[red]VPA removed: {namespace}/{name}[/red]")
+                            if changed:
+                                self.reporter.generate_console_report(changed)
+                        else:
+                            self.reporter.generate_report(vpas, report_format, output_paths[report_format])
 
-            self.console.print(f"[green]Markdown report generated: {output_path}[/green]")
-        except Exception as e:
-            logger.error(f"Error generating Markdown report: {e}")
-            raise
+                    logger.info(
+                        f"{len(changed)} VPAs updated, {len(deleted)} removed, {len(vpas)} tracked; "
+                        f"{self.reporter.api_calls} Kubernetes API calls so far"
+                    )
 
-    def _create_markdown_template(self, vpas: List[Dict]) -> str:
-        """Create Markdown template for the report."""
-        # Calculate summary stats
-        vpas_with_recs = len([vpa for vpa in vpas if vpa.get('recommendations')])
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                self.stop_event.wait(interval)
+        finally:
+            self.stop()
 
-        markdown = f"""# 🎯 VPA Goldilocks Resource Recommendations Report
 
-## 📊 Summary
+class MetricsExporter:
+    """Serves VPA recommendations and current resources as Prometheus metrics.
 
-- **Generated:** {timestamp}
-- **Total VPAs:** {len(vpas)}
-- **VPAs with Recommendations:** {vpas_with_recs}
+    Scrapes are answered from a pre-rendered exposition kept in memory; a background thread
+    refreshes it, so scrape latency does not depend on cluster size.
+    """
 
----
+    # Recommendation bounds exported from each container recommendation
+    BOUNDS = {
+        'lowerBound': 'lower_bound',
+        'target': 'target',
+        'upperBound': 'upper_bound',
+        'uncappedTarget': 'uncapped_target'
+    }
 
-"""
+    # Exported unit and help text for each resource
+    RESOURCES = {
+        'cpu': ('cores', 'CPU in cores'),
+        'memory': ('bytes', 'memory in bytes')
+    }
 
-        if not vpas:
-            markdown += "No VPA recommendations found.\n"
-            return markdown
+    LABELS = ('namespace', 'vpa', 'kind', 'workload', 'container')
 
-        # Add VPA details
-        for vpa in vpas:
-            vpa_name = f"{vpa.get('namespace', 'unknown')}/{vpa.get('name', 'unknown')}"
-            target_name = f"{vpa.get('target', {}).get('kind', 'unknown')}/{vpa.get('target', {}).get('name', 'unknown')}"
-            update_mode = str(vpa.get('updateMode', 'Off'))
+    def __init__(self, fetch: Callable[[], List[VPARecord]], refresh_interval: int = 60):
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.stop_event = threading.Event()
+        self._exposition: Optional[bytes] = None
+        self._refresh_thread: Optional[threading.Thread] = None
 
-            markdown += f"""## 🔧 VPA: {vpa_name}
+    @staticmethod
+    def _escape_label(value: Any) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
 
-- **Target:** {target_name}
-- **Update Mode:** {update_mode}
+    @staticmethod
+    def _sample_value(value: Optional[int], resource: str) -> Optional[str]:
+        """Convert a parsed quantity to cores (CPU) or bytes (memory) for exposition."""
+        if value is None:
+            return None
+        return str(value / 1000) if resource == 'cpu' else str(value)
 
-"""
+    @classmethod
+    def render_metrics(cls, vpas: List[VPARecord], refresh_duration: float = 0.0) -> str:
+        """Render report entries in the Prometheus text exposition format."""
+        samples: Dict[str, List[str]] = {}
+        help_texts: Dict[str, str] = {}
 
-            if not vpa.get('recommendations'):
-                markdown += "*No recommendations available*\n\n"
-                continue
+        def add(metric: str, help_text: str, labels: Tuple, value: Optional[str]) -> None:
+            if value is None:
+                return
+            help_texts[metric] = help_text
+            label_text = ','.join(
+                f'{name}="{cls._escape_label(label)}"' for name, label in zip(cls.LABELS, labels)
+            )
+            samples.setdefault(metric, []).append(f"{metric}{{{label_text}}} {value}")
 
-            # Add container recommendations
-            for container_name, rec in vpa.get('recommendations', {}).items():
-                current = vpa.get('currentResources', {}).get(container_name, {})
+        for vpa in vpas:
+            for row in vpa.recommended:
+                labels = (vpa.namespace, vpa.name, vpa.kind, vpa.workload, row.name)
 
-                markdown += f"""### 📦 Container: {container_name}
+                for bound, bound_suffix in cls.BOUNDS.items():
+                    for resource, (unit, resource_help) in cls.RESOURCES.items():
+                        add(f"vpa_recommendation_{bound_suffix}_{resource}_{unit}",
+                            f"VPA {bound} recommendation, {resource_help}",
+                            labels, cls._sample_value(row.value(bound, resource), resource))
 
-| Resource | Current Request | Lower Bound | Target | Upper Bound |
-|----------|----------------|-------------|---------|-------------|
-"""
+                for kind in RESOURCE_GROUPS:
+                    for resource, (unit, resource_help) in cls.RESOURCES.items():
+                        add(f"vpa_container_{resource}_{kind[:-1]}_{unit}",
+                            f"Current container {resource} {kind[:-1]}, {resource_help}",
+                            labels, cls._sample_value(row.value(kind, resource), resource))
 
-                # CPU row
-                current_cpu = current.get('requests', {}).get('cpu', 'N/A')
-                lower_cpu = rec.get('lowerBound', {}).get('cpu', 'N/A')
-                target_cpu = rec.get('target', {}).get('cpu', 'N/A')
-                upper_cpu = rec.get('upperBound', {}).get('cpu', 'N/A')
+        lines = []
+        for metric, metric_samples in samples.items():
+            lines.append(f"# HELP {metric} {help_texts[metric]}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(metric_samples)
 
-                markdown += f"| **CPU** | {self.format_resource_value(current_cpu, 'cpu')} | {self.format_resource_value(lower_cpu, 'cpu')} | **{self.format_resource_value(target_cpu, 'cpu')}** | {self.format_resource_value(upper_cpu, 'cpu')} |\n"
+        lines.extend([
+            "# HELP vpa_reporter_vpas Number of VPAs in the last refresh",
+            "# TYPE vpa_reporter_vpas gauge",
+            f"vpa_reporter_vpas {len(vpas)}",
+            "# HELP vpa_reporter_last_refresh_timestamp_seconds Unix time of the last successful refresh",
+            "# TYPE vpa_reporter_last_refresh_timestamp_seconds gauge",
+            f"vpa_reporter_last_refresh_timestamp_seconds {time.time()}",
+            "# HELP vpa_reporter_refresh_duration_seconds Duration of the last refresh",
+            "# TYPE vpa_reporter_refresh_duration_seconds gauge",
+            f"vpa_reporter_refresh_duration_seconds {refresh_duration}"
+        ])
 
-                # Memory row
-                current_memory = current.get('requests', {}).get('memory', 'N/A')
-                lower_memory = rec.get('lowerBound', {}).get('memory', 'N/A')
-                target_memory = rec.get('target', {}).get('memory', 'N/A')
-                upper_memory = rec.get('upperBound', {}).get('memory', 'N/A')
+        return '\n'.join(lines) + '\n'
 
-                markdown += f"| **Memory** | {self.format_resource_value(current_memory, 'memory')} | {self.format_resource_value(lower_memory, 'memory')} | **{self.format_resource_value(target_memory, 'memory')}** | {self.format_resource_value(upper_memory, 'memory')} |\n\n"
+    def refresh(self) -> None:
+        """Fetch report entries and replace the cached exposition."""
+        started = time.monotonic()
+        vpas = self.fetch()
+        self._exposition = self.render_metrics(vpas, time.monotonic() - started).encode()
+        logger.info(f"Metrics refreshed for {len(vpas)} VPAs in {time.monotonic() - started:.2f}s")
 
-        markdown += """---
+    def _refresh_loop(self) -> None:
+        while not self.stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous exposition until the next refresh succeeds
+                logger.warning(f"Metrics refresh failed: {e}")
 
-*Generated by vpa-goldilocks-reporter*
-"""
+    def _handler(self):
+        exporter = self
 
-        return markdown
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self._respond(200, b'<a href="/metrics">metrics</a>\n', 'text/html')
+                elif exporter._exposition is None:
+                    self._respond(503, b'metrics not ready\n', 'text/plain')
+                else:
+                    self._respond(200, exporter._exposition, 'text/plain; version=0.0.4; charset=utf-8')
 
-    def generate_kubectl_patches(self, vpas: List[Dict], output_path: str) -> None:
-        """Generate kubectl patch commands for applying VPA recommendations."""
-        patches = []
+            def _respond(self, status: int, body: bytes, content_type: str) -> None:
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
 
-        for vpa in vpas:
-            if not vpa['recommendations']:
-                continue
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} - {format % args}")
 
-            target = vpa['target']
-            namespace = vpa['namespace']
+        return MetricsHandler
 
-            for container_name, rec in vpa['recommendations'].items():
-                # Create patch for target recommendation
-                patch = {
-                    'op': 'replace',
-                    'path': f"/spec/template/spec/containers/[?(@.name=='{container_name}')]/resources/requests",
-                    'value': {}
-                }
+    def serve(self, address: str, port: int) -> None:
+        """Refresh once, then serve /metrics until interrupted."""
+        self.refresh()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name='metrics-refresh', daemon=True)
+        self._refresh_thread.start()
 
-                if 'cpu' in rec['target']:
-                    patch['value']['cpu'] = self.format_resource_value(rec['target']['cpu'], 'cpu')
-                if 'memory' in rec['target']:
-                    patch['value']['memory'] = self.format_resource_value(rec['target']['memory'], 'memory')
+        server = ThreadingHTTPServer((address, port), self._handler())
+        logger.info(f"Serving Prometheus metrics on http://{address}:{port}/metrics")
+        try:
+            server.serve_forever()
+        finally:
+            self.stop_event.set()
+            server.server_close()
 
-                kubectl_cmd = f"""# Apply VPA recommendation for {namespace}/{target['name']} container {container_name}
-kubectl patch {target['kind'].lower()} {target['name']} -n {namespace} --type='json' -p='[{json.dumps(patch)}]'
-"""
-                patches.append(kubectl_cmd)
 
-        output_file = Path(output_path)
-        with output_file.open('w') as f:
-            f.write('\n'.join(patches))
+def parse_formats(value: str) -> List[str]:
+    """Parse a comma separated list of report formats."""
+    formats = []
+    for report_format in value.split(','):
+        report_format = report_format.strip()
+        if report_format not in REPORT_FORMATS:
+            raise argparse.ArgumentTypeError(
+                f"invalid format '{report_format}' (choose from {', '.join(REPORT_FORMATS)})"
+            )
+        if report_format not in formats:
+            formats.append(report_format)
 
-        self.console.print(f"[green]Kubectl patch commands generated: {output_path}[/green]")
+    return formats
 
 
 def main():
@@ -536,20 +4484,39 @@ Examples:
   %(prog)s --format markdown --output vpa-report.md --namespace media
   %(prog)s --format yaml --output vpa-report.yaml --kubeconfig ~/.kube/config
   %(prog)s --format kubectl --output apply-recommendations.sh
+  %(prog)s --format json,markdown,kubectl --output-dir reports/  # One cluster scan, several reports
+  %(prog)s --format html --output vpa-report.html  # Sortable, filterable page for thousands of containers
   %(prog)s --format console --insecure  # For clusters with self-signed certificates
+  %(prog)s --format markdown --output report.md --from-snapshot dumps/  # Offline, from kubectl dumps
+  %(prog)s --format console --watch  # Keep running and report changed recommendations
+  %(prog)s --serve 9100 --watch  # Prometheus exporter fed by watch events
+  %(prog)s --format json --output vpa-report.json --record-history  # Nightly run feeding --trend
+  %(prog)s --trend --trend-window 90  # Are targets stable enough to apply?
+  %(prog)s --exclude-namespaces 'openshift-,re:^ci-[0-9]+$' --namespace-selector team=media
+  %(prog)s --apply --dry-run server --concurrency 16  # Validate patching every workload to its targets
+  %(prog)s --gitops --dry-run client  # Diff of the chart values.yaml changes, nothing written
+  %(prog)s --usage --usage-samples 20 --format markdown --output usage.md  # Percentiles of PodMetrics, no VPAs needed
+  %(prog)s --resolve-pods  # Current resources of CronJobs, Rollouts, DeploymentConfigs and init containers
+  %(prog)s --contexts prod-east,prod-west --format json --output fleet.json  # One report across clusters
+  %(prog)s --diff yesterday.json --format markdown --output changes.md  # Only what moved since yesterday
         """
     )
 
     parser.add_argument(
         '--format',
-        choices=['console', 'json', 'yaml', 'markdown', 'kubectl'],
-        default='console',
-        help='Output format for the report (default: console)'
+        type=parse_formats,
+        default=['console'],
+        help=f'Output format(s) for the report, comma separated: {", ".join(REPORT_FORMATS)} (default: console)'
     )
 
     parser.add_argument(
         '--output',
-        help='Output file path (required for non-console formats)'
+        help='Output file path (required for a single non-console format unless --output-dir is set)'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        help='Directory to write reports into, one default-named file per format (required for several formats)'
     )
 
     parser.add_argument(
@@ -557,11 +4524,241 @@ Examples:
         help='Specific namespace to analyze (default: all namespaces)'
     )
 
+    parser.add_argument(
+        '--exclude-namespaces',
+        metavar='PATTERNS',
+        help="Comma separated namespaces to skip, added to the config file's exclude_namespaces "
+             "(exact names, 'prefix-', globs or 're:' regular expressions)"
+    )
+
+    parser.add_argument(
+        '--namespace-selector',
+        metavar='SELECTOR',
+        help='Only report namespaces whose labels match this label selector (e.g. team=media)'
+    )
+
+    parser.add_argument(
+        '--config',
+        help=f'Reporter configuration file (default: {DEFAULT_CONFIG_PATH.name} next to this script, if present)'
+    )
+
     parser.add_argument(
         '--kubeconfig',
         help='Path to kubeconfig file (default: use in-cluster or default kubeconfig)'
     )
 
+    contexts = parser.add_mutually_exclusive_group()
+    contexts.add_argument(
+        '--contexts',
+        metavar='NAMES',
+        help='Comma separated kubeconfig contexts to fetch concurrently into one report with a cluster column'
+    )
+    contexts.add_argument(
+        '--all-contexts',
+        action='store_true',
+        help='Fetch every context of the kubeconfig concurrently into one report with a cluster column'
+    )
+
+    parser.add_argument(
+        '--from-snapshot',
+        metavar='PATH',
+        help='Build reports offline from kubectl JSON dumps or a previous JSON report (file or directory)'
+    )
+
+    parser.add_argument(
+        '--resolve-pods',
+        action='store_true',
+        help='Resolve current resources from the pods of each target, following owner references: supports '
+             'any controller (CronJob, Job, Rollout, DeploymentConfig), init containers and LimitRange defaults'
+    )
+
+    parser.add_argument(
+        '--usage',
+        action='store_true',
+        help='Recommend from percentiles of sampled pod usage instead of VPA status: metrics.k8s.io PodMetrics '
+             'from the cluster or --from-snapshot dumps, or --usage-dump'
+    )
+
+    parser.add_argument(
+        '--usage-dump',
+        metavar='PATH',
+        help='Read usage from a Prometheus text dump (e.g. promtool tsdb dump) of '
+             'container_cpu_usage_seconds_total and container_memory_working_set_bytes; implies --usage'
+    )
+
+    parser.add_argument(
+        '--usage-samples',
+        type=int,
+        default=UsageRecommender.DEFAULT_SAMPLES,
+        metavar='N',
+        help=f'PodMetrics samples taken from the metrics API with --usage (default: {UsageRecommender.DEFAULT_SAMPLES})'
+    )
+
+    parser.add_argument(
+        '--usage-interval',
+        type=float,
+        default=UsageRecommender.DEFAULT_INTERVAL,
+        metavar='SECONDS',
+        help=f'Seconds between metrics API samples (default: {UsageRecommender.DEFAULT_INTERVAL})'
+    )
+
+    parser.add_argument(
+        '--usage-window',
+        type=int,
+        default=UsageRecommender.DEFAULT_WINDOW,
+        metavar='N',
+        help=f'Most recent samples kept per container and resource (default: {UsageRecommender.DEFAULT_WINDOW})'
+    )
+
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Number of Kubernetes API requests to run in parallel (default: 1)'
+    )
+
+    parser.add_argument(
+        '--cache-ttl',
+        type=int,
+        default=SnapshotCache.DEFAULT_TTL,
+        metavar='SECONDS',
+        help=f'Reuse cached cluster snapshots younger than this if unchanged (default: {SnapshotCache.DEFAULT_TTL})'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help=f'Always fetch from the cluster and do not write the snapshot cache ({SnapshotCache.DEFAULT_DIR})'
+    )
+
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running: watch VPAs and workloads and re-render reports when recommendations change'
+    )
+
+    parser.add_argument(
+        '--watch-interval',
+        type=int,
+        default=30,
+        metavar='SECONDS',
+        help='How often watch mode checks for changes to render (default: 30)'
+    )
+
+    parser.add_argument(
+        '--serve',
+        type=int,
+        metavar='PORT',
+        help='Run as a Prometheus exporter serving /metrics on PORT instead of writing reports'
+    )
+
+    parser.add_argument(
+        '--serve-address',
+        default='0.0.0.0',
+        help='Address the exporter listens on (default: 0.0.0.0)'
+    )
+
+    parser.add_argument(
+        '--refresh-interval',
+        type=int,
+        default=60,
+        metavar='SECONDS',
+        help='How often the exporter refreshes its metrics in the background (default: 60)'
+    )
+
+    parser.add_argument(
+        '--apply',
+        action='store_true',
+        help='Patch workload requests to the target recommendations, one strategic merge patch per workload'
+    )
+
+    parser.add_argument(
+        '--gitops',
+        action='store_true',
+        help="Write the target requests into the values.yaml of the charts deploying each workload"
+    )
+
+    parser.add_argument(
+        '--charts-dir',
+        default=str(DEFAULT_CHARTS_DIR),
+        metavar='PATH',
+        help=f'Helm charts updated by --gitops, as charts/<group>/<app> (default: {DEFAULT_CHARTS_DIR})'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        choices=['none', 'client', 'server'],
+        default='none',
+        help='server: with --apply, have the API server validate the patches without persisting them; '
+             'client: with --gitops, only print the values diff (default: none)'
+    )
+
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=SavingsAnalysis.DEFAULT_TOP,
+        metavar='N',
+        help=f'Number of most over-provisioned containers and namespaces in the savings analysis '
+             f'(default: {SavingsAnalysis.DEFAULT_TOP})'
+    )
+
+    parser.add_argument(
+        '--history-db',
+        default=str(HistoryStore.DEFAULT_PATH),
+        metavar='PATH',
+        help=f'SQLite database of recorded recommendations (default: {HistoryStore.DEFAULT_PATH})'
+    )
+
+    parser.add_argument(
+        '--record-history',
+        action='store_true',
+        help='Append the recommendations of this run to the history database'
+    )
+
+    parser.add_argument(
+        '--trend',
+        action='store_true',
+        help='Report percentiles, variation and drift of recorded targets instead of querying the cluster'
+    )
+
+    parser.add_argument(
+        '--trend-window',
+        type=float,
+        default=30,
+        metavar='DAYS',
+        help='Days of history analyzed by --trend (default: 30)'
+    )
+
+    parser.add_argument(
+        '--diff',
+        nargs='+',
+        metavar='REPORT',
+        help='Report only recommendations that changed since the OLD JSON report or snapshot: '
+             '--diff OLD compares it with this run, --diff OLD NEW with the NEW report'
+    )
+
+    parser.add_argument(
+        '--diff-threshold',
+        type=float,
+        default=RecommendationDiff.DEFAULT_THRESHOLD,
+        metavar='PERCENT',
+        help=f'Smallest move of a rounded target reported by --diff, in percent of the old target '
+             f'(default: {RecommendationDiff.DEFAULT_THRESHOLD:g})'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print time per phase, API request counts and latencies, peak memory and formatting cache hit rates'
+    )
+
+    parser.add_argument(
+        '--timings',
+        metavar='PATH',
+        help='Write time per phase, API request statistics and peak memory of the run as JSON to PATH'
+    )
+
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -590,23 +4787,235 @@ Examples:
         # SSL warnings are already disabled by default, but this makes it explicit
         warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 
-    if args.format != 'console' and not args.output:
-        parser.error(f"--output is required when using --format {args.format}")
+    file_formats = [report_format for report_format in args.format if report_format != 'console']
+    if args.output and args.output_dir:
+        parser.error("--output and --output-dir are mutually exclusive")
+    if len(file_formats) > 1 and not args.output_dir:
+        parser.error(f"--output-dir is required when using --format {','.join(args.format)}")
+    if file_formats and not (args.output or args.output_dir):
+        parser.error(f"--output is required when using --format {file_formats[0]}")
+
+    output_paths = {}
+    for report_format in file_formats:
+        if args.output_dir:
+            output_paths[report_format] = str(Path(args.output_dir) / DEFAULT_OUTPUT_FILES[report_format])
+        else:
+            output_paths[report_format] = args.output
+
+    if 'html' in args.format and jinja2 is None:
+        parser.error("--format html needs Jinja2, install it with: pip install jinja2")
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.top < 0:
+        parser.error("--top must not be negative")
+
+    if args.watch and args.from_snapshot:
+        parser.error("--watch needs a live cluster and cannot be used with --from-snapshot")
+
+    if args.apply and (args.from_snapshot or args.watch or args.serve or args.trend):
+        parser.error("--apply needs a live cluster and cannot be combined with --from-snapshot, --watch, --serve or --trend")
+    if args.gitops and (args.watch or args.serve or args.trend):
+        parser.error("--gitops cannot be combined with --watch, --serve or --trend")
+    if args.dry_run == 'server' and not args.apply:
+        parser.error("--dry-run server only applies to --apply")
+    if args.dry_run == 'client' and not args.gitops:
+        parser.error("--dry-run client only applies to --gitops")
+
+    if args.record_history and (args.watch or args.serve):
+        parser.error("--record-history records single runs and cannot be combined with --watch or --serve")
+
+    if args.resolve_pods and args.watch:
+        parser.error("--resolve-pods lists pods once per run and cannot be combined with --watch")
+
+    args.usage = args.usage or bool(args.usage_dump)
+    if args.usage and (args.watch or args.serve or args.trend):
+        parser.error("--usage computes recommendations once and cannot be combined with --watch, --serve or --trend")
+    if args.usage_samples < 1 or args.usage_window < 1:
+        parser.error("--usage-samples and --usage-window must be at least 1")
+    if args.usage_interval < 0:
+        parser.error("--usage-interval must not be negative")
+
+    if args.diff:
+        unsupported = [report_format for report_format in args.format
+                       if report_format not in ('console', 'json', 'yaml', 'markdown')]
+        if unsupported:
+            parser.error(f"--diff supports the console, json, yaml and markdown formats, not {','.join(unsupported)}")
+        if len(args.diff) > 2:
+            parser.error("--diff takes an OLD report and optionally a NEW one")
+        if args.diff_threshold < 0:
+            parser.error("--diff-threshold must not be negative")
+        if args.watch or args.serve or args.trend or args.apply or args.gitops:
+            parser.error("--diff cannot be combined with --watch, --serve, --trend, --apply or --gitops")
+        if len(args.diff) == 2:
+            if args.from_snapshot or args.contexts or args.all_contexts:
+                parser.error("--diff OLD NEW compares two reports and cannot be combined with --from-snapshot, "
+                             "--contexts or --all-contexts")
+            # The new report is read like any other snapshot
+            args.from_snapshot = args.diff[1]
+
+    multi_cluster = bool(args.contexts or args.all_contexts)
+    if multi_cluster and args.usage_dump:
+        parser.error("--usage-dump holds the usage of one cluster and cannot be combined with --contexts or --all-contexts")
+    if multi_cluster and (args.from_snapshot or args.watch or args.serve or args.trend):
+        parser.error("--contexts and --all-contexts cannot be combined with --from-snapshot, --watch, --serve or --trend")
+    if multi_cluster and (args.apply or args.gitops or args.record_history):
+        # Workloads and history rows are identified by namespace and name, which clusters share
+        parser.error("--apply, --gitops and --record-history work on one cluster at a time, not with "
+                     "--contexts or --all-contexts")
+
+    if args.trend:
+        unsupported = [report_format for report_format in args.format if report_format not in ('console', 'json', 'yaml')]
+        if unsupported:
+            parser.error(f"--trend supports the console, json and yaml formats, not {','.join(unsupported)}")
+        if args.watch or args.serve:
+            parser.error("--trend cannot be combined with --watch or --serve")
+
+        history = HistoryStore(args.history_db)
+        try:
+            if args.output_dir:
+                Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+            trends = history.trends(args.trend_window, args.namespace)
+            history.generate_trend_report(trends, args.trend_window, args.format, output_paths)
+        finally:
+            history.close()
+        return
+
+    try:
+        if args.config:
+            settings = load_config(args.config)
+        elif DEFAULT_CONFIG_PATH.exists():
+            settings = load_config(DEFAULT_CONFIG_PATH)
+        else:
+            settings = {}
+    except (OSError, yaml.YAMLError) as e:
+        parser.error(f"could not read config file: {e}")
+
+    exclude_namespaces = list(settings.get('exclude_namespaces') or [])
+    if args.exclude_namespaces:
+        exclude_namespaces.extend(pattern.strip() for pattern in args.exclude_namespaces.split(',') if pattern.strip())
+    try:
+        namespace_filter = NamespaceFilter(
+            include=settings.get('default_namespaces') or [],
+            exclude=exclude_namespaces,
+            label_selector=args.namespace_selector or settings.get('namespace_selector')
+        )
+    except re.error as e:
+        parser.error(f"invalid namespace pattern: {e}")
 
     try:
-        reporter = VPARecommendationReporter(args.kubeconfig, args.insecure)
-        vpas = reporter.get_vpa_recommendations(args.namespace)
-
-        if args.format == 'console':
-            reporter.generate_console_report(vpas)
-        elif args.format == 'json':
-            reporter.generate_json_report(vpas, args.output)
-        elif args.format == 'yaml':
-            reporter.generate_yaml_report(vpas, args.output)
-        elif args.format == 'markdown':
-            reporter.generate_markdown_report(vpas, args.output)
-        elif args.format == 'kubectl':
-            reporter.generate_kubectl_patches(vpas, args.output)
+        reporter_options = dict(
+            cache_ttl=None if args.no_cache else args.cache_ttl,
+            snapshot_path=args.from_snapshot,
+            profile=args.profile,
+            namespace_filter=namespace_filter,
+            top_n=args.top,
+            html_report=settings.get('html_report'),
+            resolve_pods=args.resolve_pods
+        )
+        fan_out = None
+        if multi_cluster:
+            if args.all_contexts:
+                contexts = ClusterFanOut.contexts(args.kubeconfig)
+            else:
+                contexts = list(dict.fromkeys(name.strip() for name in args.contexts.split(',') if name.strip()))
+            if not contexts:
+                parser.error("no kubeconfig contexts to report")
+            timings = Timings()
+            fan_out = ClusterFanOut.connect(contexts, lambda context: VPARecommendationReporter(
+                args.kubeconfig, args.insecure, args.concurrency, context=context, timings=timings,
+                **reporter_options))
+            # Rendering does not touch the API, any of the reporters renders the merged report
+            reporter = next(iter(fan_out.reporters.values()))
+        else:
+            reporter = VPARecommendationReporter(args.kubeconfig, args.insecure, args.concurrency,
+                                                 **reporter_options)
+
+        if args.usage:
+            for usage_reporter in fan_out.reporters.values() if fan_out else [reporter]:
+                usage_reporter.usage = UsageRecommender(usage_reporter, args.usage_window, args.usage_samples,
+                                                        args.usage_interval, args.usage_dump)
+
+        if args.output_dir:
+            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+
+        diff = None
+        if args.diff:
+            diff = RecommendationDiff(args.diff_threshold)
+            # Reports and dumps of the old run are processed like snapshots, sharing this run's timings
+            previous = VPARecommendationReporter(snapshot_path=args.diff[0], namespace_filter=namespace_filter,
+                                                 timings=reporter.timings)
+            with reporter.timings.phase('diff'):
+                diff.index(previous.iter_vpa_recommendations(args.namespace))
+
+        if args.serve:
+            if args.watch:
+                # Refreshes only process what changed since the last scrape cache update
+                watcher = VPAWatcher(reporter, args.namespace)
+                watcher.start()
+                fetch = lambda: watcher.refresh()[0]  # noqa: E731
+            else:
+                fetch = lambda: reporter.get_vpa_recommendations(args.namespace)  # noqa: E731
+            MetricsExporter(fetch, args.refresh_interval).serve(args.serve_address, args.serve)
+            return
+
+        if args.watch:
+            VPAWatcher(reporter, args.namespace).run(args.format, output_paths, args.watch_interval)
+            return
+
+        # VPAs stream from the API pages into every report file as they are processed, the
+        # cluster is only scanned once and the full result set is never held in memory
+        render_started = time.perf_counter()
+        try:
+            timed = reporter.timings.timed
+            if fan_out:
+                vpas = timed(fan_out.iter_vpa_recommendations(args.namespace), 'cluster fetch')
+            else:
+                vpas = reporter.iter_vpa_recommendations(args.namespace)
+            vpas = track(vpas, description="Processing VPA recommendations...")
+            history = HistoryStore(args.history_db) if args.record_history else None
+            if history:
+                vpas = timed(history.recording(vpas), 'history')
+            applier = RecommendationApplier(reporter, dry_run=args.dry_run == 'server') if args.apply else None
+            if applier:
+                vpas = timed(applier.collecting(vpas), 'apply')
+            rewriter = ValuesRewriter(reporter, args.charts_dir, dry_run=args.dry_run == 'client') if args.gitops else None
+            if rewriter:
+                vpas = timed(rewriter.collecting(vpas), 'gitops')
+            if diff:
+                with reporter.timings.phase('diff'):
+                    diff.compare(vpas)
+                with reporter.timings.phase('rendering'):
+                    diff.generate_report(args.format, output_paths)
+            else:
+                reporter.generate_reports(vpas, args.format, output_paths)
+            if history:
+                with reporter.timings.phase('history'):
+                    history.close()
+        except Exception as e:
+            logger.error(f"Error fetching VPA recommendations: {e}")
+            raise
+
+        if rewriter:
+            with reporter.timings.phase('gitops'):
+                rewriter.rewrite()
+            rewriter.print_results()
+
+        if applier:
+            with reporter.timings.phase('apply'):
+                applier.apply()
+            applier.print_results()
+
+        if args.profile:
+            reporter.print_profile(time.perf_counter() - render_started)
+        if args.timings:
+            reporter.timings.write(args.timings)
+
+        if applier and applier.failed:
+            sys.exit(1)
+        if fan_out and fan_out.failed:
+            logger.error(f"The report is missing clusters that could not be read: {', '.join(fan_out.failed)}")
+            sys.exit(1)
 
     except KeyboardInterrupt:
         print("\n[yellow]Operation cancelled by user[/yellow]")
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+VPA Goldilocks Reporter Benchmarks
+
+Microbenchmarks for the hot paths of vpa-goldilocks-reporter.py. They run against
+synthetic data and need no cluster access.
+
+Usage:
+    python vpa-reporter-benchmark.py --help
+    python vpa-reporter-benchmark.py quantities --count 1000000
+    python vpa-reporter-benchmark.py yaml --vpas 5000
+    python vpa-reporter-benchmark.py history --vpas 500 --days 365
+    python vpa-reporter-benchmark.py records --vpas 20000
+    python vpa-reporter-benchmark.py usage --workloads 2000 --samples 1440
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import yaml
+
+# The reporter is a script with a dashed file name, so it is loaded by path
+REPORTER_PATH = Path(__file__).resolve().parent / 'vpa-goldilocks-reporter.py'
+
+# Quantity forms seen in VPA recommendations and workload manifests
+SAMPLE_QUANTITIES = {
+    'cpu': ['15m', '25m', '100m', '587m', '1', '2', '0.5', '1.5', '2500m', '500000n', '250u', '1e3m'],
+    'memory': ['262144k', '104857600', '100Mi', '128Mi', '300M', '1Gi', '1.5Gi', '2G', '64Ki', '1e9', '5Gi']
+}
+
+
+def load_reporter():
+    """Import vpa-goldilocks-reporter.py as a module."""
+    spec = importlib.util.spec_from_file_location('vpa_goldilocks_reporter', REPORTER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    """Print the timing of one benchmark."""
+    print(f"{name:<32} {count:>10,} ops {elapsed:8.3f}s {elapsed / count * 1e9:10.1f} ns/op")
+
+
+def benchmark_quantities(reporter, args) -> None:
+    """Parse and format a mix of CPU and memory quantities."""
+    rng = random.Random(args.seed)
+    samples = [
+        (quantity, resource_type)
+        for resource_type in ('cpu', 'memory')
+        for quantity in rng.choices(SAMPLE_QUANTITIES[resource_type], k=args.count // 2)
+    ]
+    rng.shuffle(samples)
+
+    started = time.perf_counter()
+    parsed = [(reporter.parse_quantity(quantity, resource_type), resource_type) for quantity, resource_type in samples]
+    report('parse_quantity', len(samples), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for value, resource_type in parsed:
+        reporter.format_quantity(value, resource_type)
+    report('format_quantity (parsed)', len(parsed), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for quantity, resource_type in samples:
+        reporter.VPARecommendationReporter.format_resource_value(quantity, resource_type)
+    report('format_resource_value (string)', len(samples), time.perf_counter() - started)
+
+
+def synthetic_resources(rng: random.Random) -> dict:
+    """A resource list with a random CPU and memory quantity."""
+    return {'cpu': rng.choice(SAMPLE_QUANTITIES['cpu']), 'memory': rng.choice(SAMPLE_QUANTITIES['memory'])}
+
+
+def synthetic_vpas(reporter, rng: random.Random, count: int) -> list:
+    """Build records shaped like VPARecommendationReporter._process_vpa output."""
+    vpas = []
+    for index in range(count):
+        recommendations = {}
+        current_resources = {}
+        for container in range(rng.randint(1, 3)):
+            name = f"container-{container}"
+            recommendations[name] = {bound: synthetic_resources(rng) for bound in reporter.RECOMMENDATION_BOUNDS}
+            current_resources[name] = {group: synthetic_resources(rng) for group in reporter.RESOURCE_GROUPS}
+        vpas.append(reporter.VPARecord.from_containers(
+            recommendations, current_resources,
+            name=f"app-{index}-vpa", namespace=f"namespace-{index % 50}", kind='Deployment',
+            workload=f"app-{index}", api_version='apps/v1', update_mode='Off', replicas=1 + index % 3,
+            conditions=[{'type': 'RecommendationProvided', 'status': 'True'}]
+        ))
+    return vpas
+
+
+def synthetic_snapshot(rng: random.Random, count: int) -> dict:
+    """Build a `kubectl get vpa,deploy -A -o json` List with one Deployment per VPA."""
+    items = []
+    for index in range(count):
+        namespace = f"namespace-{index % 50}"
+        name = f"app-{index}"
+        containers = [f"container-{container}" for container in range(rng.randint(1, 3))]
+        items.append({
+            'apiVersion': 'autoscaling.k8s.io/v1',
+            'kind': 'VerticalPodAutoscaler',
+            'metadata': {'name': f"{name}-vpa", 'namespace': namespace},
+            'spec': {
+                'targetRef': {'apiVersion': 'apps/v1', 'kind': 'Deployment', 'name': name},
+                'updatePolicy': {'updateMode': 'Off'}
+            },
+            'status': {
+                'conditions': [{'type': 'RecommendationProvided', 'status': 'True'}],
+                'recommendation': {'containerRecommendations': [
+                    {'containerName': container, 'lowerBound': synthetic_resources(rng),
+                     'target': synthetic_resources(rng), 'upperBound': synthetic_resources(rng),
+                     'uncappedTarget': synthetic_resources(rng)}
+                    for container in containers
+                ]}
+            }
+        })
+        items.append({
+            'apiVersion': 'apps/v1',
+            'kind': 'Deployment',
+            'metadata': {'name': name, 'namespace': namespace},
+            'spec': {
+                'replicas': 1 + index % 3,
+                'template': {'spec': {'containers': [
+                    {'name': container,
+                     'resources': {'requests': synthetic_resources(rng), 'limits': synthetic_resources(rng)}}
+                    for container in containers
+                ]}}
+            }
+        })
+    return {'apiVersion': 'v1', 'kind': 'List', 'items': items}
+
+
+def benchmark_yaml(reporter, args) -> None:
+    """Dump a synthetic YAML report with each available dumper."""
+    vpas = synthetic_vpas(reporter, random.Random(args.seed), args.vpas)
+
+    started = time.perf_counter()
+    plain = [reporter.to_plain(vpa.to_dict()) for vpa in vpas]
+    report('to_plain', len(vpas), time.perf_counter() - started)
+
+    dumpers = [('yaml.Dumper', yaml.Dumper), ('yaml.SafeDumper', yaml.SafeDumper)]
+    if yaml.__with_libyaml__:
+        dumpers.append(('yaml.CSafeDumper', yaml.CSafeDumper))
+    else:
+        print("PyYAML was built without libyaml, CSafeDumper is not available")
+
+    for name, dumper in dumpers:
+        started = time.perf_counter()
+        yaml.dump({'vpas': plain}, Dumper=dumper, indent=2, default_flow_style=False)
+        report(f"dump {name}", len(vpas), time.perf_counter() - started)
+
+    print(f"Reporter uses {reporter.YAMLDumper.__name__}")
+
+
+def benchmark_history(reporter, args) -> None:
+    """Record nightly runs into a scratch history database and compute trends over them."""
+    rng = random.Random(args.seed)
+    now = time.time()
+    # Keep the per-run log lines out of the timings
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        history = reporter.HistoryStore(Path(scratch) / 'history.db')
+
+        samples = 0
+        recording = 0.0
+        for day in range(args.days):
+            vpas = synthetic_vpas(reporter, rng, args.vpas)
+            started = time.perf_counter()
+            for vpa in history.recording(vpas, recorded_at=now - (args.days - day) * 86400):
+                samples += len(vpa.recommended)
+            recording += time.perf_counter() - started
+        report('record (per sample)', samples, recording)
+
+        for window_days in (30, args.days):
+            started = time.perf_counter()
+            trends = history.trends(window_days)
+            elapsed = time.perf_counter() - started
+            report(f"trends {window_days}d (per container)", len(trends), elapsed)
+            print(f"{'':<32} {elapsed * 1000:10.1f} ms total")
+
+        history.close()
+
+
+def measure(build):
+    """Return what build() returns, the seconds it took and the bytes it left allocated."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained
+
+
+def benchmark_records(reporter, args) -> None:
+    """Process a synthetic snapshot into records and compare their footprint with nested report dicts."""
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        snapshot = Path(scratch) / 'cluster.json'
+        snapshot.write_text(json.dumps(synthetic_snapshot(random.Random(args.seed), args.vpas)))
+        vpa_reporter = reporter.VPARecommendationReporter(snapshot_path=str(snapshot))
+
+        # Timed without tracemalloc, which slows allocation-heavy code down severalfold
+        started = time.perf_counter()
+        records = list(vpa_reporter.iter_vpa_recommendations())
+        report('process (per VPA)', len(records), time.perf_counter() - started)
+        del records
+
+        records, _, records_bytes = measure(lambda: list(vpa_reporter.iter_vpa_recommendations()))
+        # The nested entries written to JSON reports, which is how VPAs used to be held in memory
+        _, _, entries_bytes = measure(lambda: [vpa.to_dict() for vpa in records])
+
+    containers = sum(len(vpa.containers) for vpa in records)
+    print(f"{'records':<32} {records_bytes / 2**20:10.1f} MiB {records_bytes / containers:8.0f} B/container")
+    print(f"{'nested report dicts':<32} {entries_bytes / 2**20:10.1f} MiB {entries_bytes / containers:8.0f} B/container")
+
+
+def benchmark_usage(reporter, args) -> None:
+    """Compute usage percentile recommendations from a synthetic Prometheus dump."""
+    rng = random.Random(args.seed)
+    logging.disable(logging.INFO)
+    started_at = 1_700_000_000_000
+
+    with tempfile.TemporaryDirectory() as scratch:
+        snapshot = Path(scratch) / 'cluster.json'
+        dump = Path(scratch) / 'usage.prom'
+        items = []
+        with dump.open('w') as f:
+            for index in range(args.workloads):
+                namespace, name = f"namespace-{index % 50}", f"app-{index}"
+                items.append({'apiVersion': 'apps/v1', 'kind': 'Deployment',
+                              'metadata': {'name': name, 'namespace': namespace},
+                              'spec': {'replicas': 1, 'template': {'spec': {'containers': [{'name': 'app'}]}}}})
+                labels = f'container="app",namespace="{namespace}",pod="{name}-5d8f7c9b4-x2x7k"'
+                used = 0.0
+                for sample in range(args.samples):
+                    used += rng.uniform(0.01, 0.5) * 60
+                    timestamp = started_at + sample * 60000
+                    f.write(f"container_cpu_usage_seconds_total{{{labels}}} {used} {timestamp}\n")
+                    f.write(f"container_memory_working_set_bytes{{{labels}}} {rng.randint(64, 1024) * 2**20} {timestamp}\n")
+        snapshot.write_text(json.dumps({'apiVersion': 'v1', 'kind': 'List', 'items': items}))
+
+        vpa_reporter = reporter.VPARecommendationReporter(snapshot_path=str(snapshot))
+        usage = reporter.UsageRecommender(vpa_reporter, window=args.samples, dump_path=str(dump))
+
+        started = time.perf_counter()
+        usage.load_prometheus_dump(dump)
+        report('load dump (per sample)', args.workloads * args.samples * 2, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        vpas = list(usage.vpa_items())
+        report('percentiles (per container)', len(vpas), time.perf_counter() - started)
+
+        rings = sum(len(ring.samples) for containers in usage.usage.values()
+                    for resources in containers.values() for ring in resources.values())
+        print(f"{'ring buffers':<32} {rings * 8 / 2**20:10.1f} MiB of samples")
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Benchmark vpa-goldilocks-reporter.py hot paths")
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for synthetic data (default: 42)')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    quantities = subparsers.add_parser('quantities', help='Parse and format Kubernetes quantities')
+    quantities.add_argument('--count', type=int, default=1_000_000, help='Number of quantities (default: 1000000)')
+    quantities.set_defaults(func=benchmark_quantities)
+
+    yaml_dump = subparsers.add_parser('yaml', help='Dump a synthetic YAML report')
+    yaml_dump.add_argument('--vpas', type=int, default=5000, help='Number of VPAs in the report (default: 5000)')
+    yaml_dump.set_defaults(func=benchmark_yaml)
+
+    history = subparsers.add_parser('history', help='Record nightly runs and compute trends over them')
+    history.add_argument('--vpas', type=int, default=500, help='Number of VPAs per run (default: 500)')
+    history.add_argument('--days', type=int, default=365, help='Number of nightly runs (default: 365)')
+    history.set_defaults(func=benchmark_history)
+
+    records = subparsers.add_parser('records', help='Process VPAs into records and measure their memory')
+    records.add_argument('--vpas', type=int, default=20000, help='Number of VPAs in the snapshot (default: 20000)')
+    records.set_defaults(func=benchmark_records)
+
+    usage = subparsers.add_parser('usage', help='Compute usage percentile recommendations from a Prometheus dump')
+    usage.add_argument('--workloads', type=int, default=2000, help='Number of single-container workloads (default: 2000)')
+    usage.add_argument('--samples', type=int, default=1440, help='Samples per container and resource (default: 1440)')
+    usage.set_defaults(func=benchmark_usage)
+
+    args = parser.parse_args()
+    reporter = load_reporter()
+    args.func(reporter, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())